@@ -1,8 +1,7 @@
 from fastapi import FastAPI, Request, Form, WebSocket, Body
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.gzip import GZipMiddleware
-from fastapi.staticfiles import StaticFiles
 import threading
 import json
 import re
@@ -11,14 +10,31 @@ import sys
 import time
 import asyncio
 
-import upstox_client
-from upstox_client.rest import ApiException
+from functools import lru_cache
 
-from config import UPSTOX_ACCESS_TOKEN, MOBILE_NUM, api_client
-from instruments import bootstrap_instruments, FILTERED_INSTRUMENTS, ALL_INSTRUMENTS
+from config import MOBILE_NUM, get_api_client, get_gtt_collection, token_holder
+from instruments import (
+    bootstrap_instruments, refresh_instruments, get_snapshot, INSTRUMENTS_READY,
+    find_instrument, cold_shard, set_spot_source, version_history
+)
 from token_validator import is_token_valid,update_access_token
 from live_ltp_manager import ltp_manager
-from websocket_feed import start_market_feed 
+from candle_builder import candle_builder, CANDLE_INTERVALS
+from option_analytics import chain_analytics
+from websocket_feed import market_feed
+from feed_hub import FEED_MODE, hub_client
+from ltp_shm import LTP_SHM_ENABLED, LtpTableWriter
+import metrics
+from metrics import MONGO_READ_SECONDS, MONGO_SECONDS, BROKER_SECONDS
+from logging_setup import setup_logging
+from profiling import PROFILING_ENABLED, profiler, tracer, stall_monitor
+from broker_cache import balance_cache, gtt_cache, invalidate_after_order
+from feed_decode import FEED_MODES
+from market_session import market_session, PHASE_PREWARM, PHASE_OPEN, PHASE_CLOSED
+from order_validation import validate_order
+from positions import position_book
+from static_assets import asset_store
+from subscriptions import subscription_store, SUBSCRIPTION_RESTORE_TIMEOUT
 
 # ✅ Import GTT utility functions
 from utils.gtt.place_gtt_order import place_gtt_order
@@ -27,32 +43,26 @@ from utils.gtt.cancel_gtt_order import cancel_gtt_order
 from utils.gtt.get_gtt_order_details import get_gtt_order_details
 
 from datetime import datetime
-from config import gtt_collection
 import os,time,sys
 
-def restart_app():
-    time.sleep(2)
-    os.execv(sys.executable, [
-        sys.executable,
-        "-m", "uvicorn",
-        "app:app",
-        "--reload"
-    ])
-
 # -----------------------
-# UPSTOX CONFIG (UNCHANGED)
+# UPSTOX CONFIG (clients built on first use)
 # -----------------------
-order_api = upstox_client.OrderApiV3(api_client)
-user_api = upstox_client.UserApi(api_client)
+@lru_cache(maxsize=None)
+def get_user_api():
+    import upstox_client
+    return upstox_client.UserApi(get_api_client())
 
 
 # -----------------------
 # FASTAPI INIT
 # -----------------------
+setup_logging()
+
 app = FastAPI(title="Upstox GTT Trading App")
 
+# API responses; static files and pages carry their own precompressed bodies
 app.add_middleware(GZipMiddleware, minimum_size=1000)
-app.mount("/static", StaticFiles(directory="static"), name="static")
 
 templates = Jinja2Templates(directory="templates")
 
@@ -62,18 +72,34 @@ templates = Jinja2Templates(directory="templates")
 balance_clients = set()
 
 # -----------------------
-# UI PAGE
+# PAGES / STATIC (rendered and compressed once)
 # -----------------------
+def build_pages():
+    asset_store.add_page("index", templates.get_template("index.html").render(request=None))
+
+    with open("templates/token.html", "r", encoding="utf-8") as f:
+        asset_store.add_page("token", f.read().replace("{{MOBILE_NUM}}", MOBILE_NUM or ""))
+
+
+def cached_page(name, request):
+    if name not in asset_store.pages:
+        build_pages()
+    return asset_store.page(name, request)
+
+
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request})
+    return cached_page("index", request)
 
 
 @app.get("/token", response_class=HTMLResponse)
-async def token_page():
-    with open("templates/token.html", "r", encoding="utf-8") as f:
-        html = f.read()
-    return html.replace("{{MOBILE_NUM}}", MOBILE_NUM)
+async def token_page(request: Request):
+    return cached_page("token", request)
+
+
+@app.get("/static/{path:path}")
+async def static_file(path: str, request: Request):
+    return asset_store.file(path, request)
 
 @app.post("/save-token")
 async def save_token(payload: dict = Body(...)):
@@ -83,13 +109,16 @@ async def save_token(payload: dict = Body(...)):
         if not token or len(token) < 50:
             return {"status": "error", "message": "Invalid access token"}
 
-        update_access_token(token)
+        if update_access_token(token) is None:
+            return {"status": "error", "message": "Token save failed"}
 
-        threading.Thread(target=restart_app, daemon=True).start()
+        # Rotate in place: API clients pick it up on the next call,
+        # only the market data socket reconnects
+        await asyncio.to_thread(token_holder.rotate, token)
 
         return {
             "status": "success",
-            "message": "Access token updated. Server restarting..."
+            "message": "Access token updated. Live feed reconnecting..."
         }
 
     except Exception as e:
@@ -112,6 +141,19 @@ async def place_gtt(
     stoploss_price: float = Form(...)
 ):
     try:
+        # Lot / tick / expiry / freeze checks before the broker sees it
+        check = validate_order(instrument_token, quantity, {
+            "entry_price": entry_price,
+            "target_price": target_price,
+            "stoploss_price": stoploss_price
+        })
+        if check["status"] != "success":
+            return check
+
+        entry_price = check["prices"]["entry_price"]
+        target_price = check["prices"]["target_price"]
+        stoploss_price = check["prices"]["stoploss_price"]
+
         result = place_gtt_order(
             instrument_token=instrument_token,
             quantity=quantity,
@@ -149,11 +191,15 @@ async def place_gtt(
                 "broker_response": result
             }
 
-            gtt_collection.insert_one(gtt_doc)
+            with MONGO_SECONDS.labels("insert_gtt").time():
+                get_gtt_collection().insert_one(gtt_doc)
+
+            invalidate_after_order()
 
             return {
                 "status": "success",
                 "gtt_order_id": gtt_id,
+                "adjusted": check["adjusted"],
                 "message": "GTT Order placed successfully"
             }
 
@@ -175,9 +221,30 @@ async def modify_gtt(
     stoploss_price: float = Form(None),
     modify_entry: bool = Form(False),
     modify_target: bool = Form(False),
-    modify_stoploss: bool = Form(False)
+    modify_stoploss: bool = Form(False),
+    instrument_token: str = Form(None)
 ):
     try:
+        # Same checks as placement; the instrument comes from our GTT record if not sent
+        if not instrument_token:
+            with MONGO_READ_SECONDS.labels("find_gtt").time():
+                doc = await asyncio.to_thread(
+                    get_gtt_collection().find_one, {"gtt_order_id": gtt_order_id}, {"instrument_token": 1}
+                )
+            instrument_token = doc.get("instrument_token") if doc else None
+
+        check = validate_order(instrument_token, quantity, {
+            "entry_price": entry_price if modify_entry else None,
+            "target_price": target_price if modify_target else None,
+            "stoploss_price": stoploss_price if modify_stoploss else None
+        }, op="modify")
+        if check["status"] != "success":
+            return check
+
+        entry_price = check["prices"]["entry_price"] if modify_entry else entry_price
+        target_price = check["prices"]["target_price"] if modify_target else target_price
+        stoploss_price = check["prices"]["stoploss_price"] if modify_stoploss else stoploss_price
+
         result = modify_gtt_order(
             gtt_order_id=gtt_order_id,
             quantity=quantity,
@@ -188,6 +255,7 @@ async def modify_gtt(
             modify_target=modify_target,
             modify_stoploss=modify_stoploss
         )
+        invalidate_after_order(gtt_order_id)
         return result
 
     except Exception as e:
@@ -200,7 +268,9 @@ async def modify_gtt(
 @app.post("/cancel-gtt")
 async def cancel_gtt_route(gtt_order_id: str = Form(...)):
     try:
-        return cancel_gtt_order(gtt_order_id)
+        result = cancel_gtt_order(gtt_order_id)
+        invalidate_after_order(gtt_order_id)
+        return result
 
     except Exception as e:
         return {
@@ -212,7 +282,8 @@ async def cancel_gtt_route(gtt_order_id: str = Form(...)):
 @app.get("/gtt-details/{gtt_order_id}")
 async def gtt_details(gtt_order_id: str):
     try:
-        return get_gtt_order_details(gtt_order_id)
+        # Identical concurrent reads share one broker call
+        return await gtt_cache.get(gtt_order_id, get_gtt_order_details, gtt_order_id)
 
     except Exception as e:
         return {
@@ -222,37 +293,99 @@ async def gtt_details(gtt_order_id: str):
 
 
 # -----------------------
-# INSTRUMENT ROUTES (UNCHANGED)
+# INSTRUMENT ROUTES (read one snapshot per request)
 # -----------------------
+def instruments_loading():
+    return {"status": "error", "message": "Instruments are still loading"}
+
+
 @app.get("/instruments/all")
 async def get_all_instruments():
-    return {"status": "success", "count": len(ALL_INSTRUMENTS), "data": ALL_INSTRUMENTS}
+    if not INSTRUMENTS_READY.is_set():
+        return instruments_loading()
+
+    snapshot = get_snapshot()
+    return {"status": "success", "count": len(snapshot.all), "data": snapshot.all}
+
+
+# Browser cache sync: "unchanged", a diff against the version it holds, or everything
+@app.get("/instruments/sync")
+async def sync_instruments(version: str = ""):
+    if not INSTRUMENTS_READY.is_set():
+        return instruments_loading()
+
+    snapshot = get_snapshot()
+    if version == snapshot.version:
+        return {"status": "success", "mode": "unchanged", "version": version}
+
+    diff = version_history.diff(version, snapshot) if version else None
+
+    # A diff touching most rows costs more than it saves
+    if diff is not None and len(diff[0]) + len(diff[1]) < len(snapshot.all) // 2:
+        upsert, remove = diff
+        return {
+            "status": "success",
+            "mode": "delta",
+            "version": snapshot.version,
+            "upsert": [snapshot.by_key[key] for key in upsert],
+            "remove": remove
+        }
+
+    return {"status": "success", "mode": "full", "version": snapshot.version, "data": snapshot.all}
+
+
+# Far contracts live in the cold shard; looked up on demand
+@app.get("/instruments/lookup")
+async def lookup_instrument(key: str = None, symbol: str = None):
+    if not INSTRUMENTS_READY.is_set():
+        return instruments_loading()
+
+    item = await asyncio.to_thread(find_instrument, key, symbol)
+    if item is None:
+        return {"status": "error", "message": "Instrument not found"}
+    return {"status": "success", "data": item}
 
 
 @app.get("/instruments/{index_name}")
-async def get_instruments(index_name: str):
+async def get_instruments(index_name: str, include_cold: bool = False):
+    if not INSTRUMENTS_READY.is_set():
+        return instruments_loading()
+
+    snapshot = get_snapshot()
     index_name = index_name.lower()
-    if index_name not in FILTERED_INSTRUMENTS:
+    if index_name not in snapshot.filtered:
         return {"status": "error", "message": "Invalid index name"}
 
-    return {
-        "status": "success",
-        "count": len(FILTERED_INSTRUMENTS[index_name]),
-        "data": FILTERED_INSTRUMENTS[index_name]
-    }
+    data = snapshot.filtered[index_name]
+    if include_cold:
+        data = data + await asyncio.to_thread(cold_shard.rows, index_name)
+
+    return {"status": "success", "count": len(data), "data": data}
+
+
+@app.post("/instruments/refresh")
+async def refresh_instruments_route():
+    try:
+        result = await asyncio.to_thread(refresh_instruments)
+        return {"status": "success", **result}
+
+    except Exception as e:
+        return {"status": "error", "message": f"Instrument refresh failed: {str(e)}"}
 
 
 # -----------------------
 # GET BALANCE (UNCHANGED)
 # -----------------------
-@app.get("/get-balance")
-async def get_balance():
+def fetch_balance():
+    from upstox_client.rest import ApiException
+
     try:
         valid, msg = is_token_valid()
         if not valid:
             return {"status": "error", "message": msg}
 
-        response = user_api.get_user_fund_margin("2.0")
+        with BROKER_SECONDS.labels("get_balance").time():
+            response = get_user_api().get_user_fund_margin("2.0")
         return {"status": "success", "data": response.to_dict()}
 
     except ApiException as e:
@@ -260,30 +393,42 @@ async def get_balance():
     except Exception as e:
         return {"status": "error", "message": f"Balance fetch failed: {str(e)}"}
 
+
+# Shared by /get-balance and every /ws/balance client
+async def get_cached_balance():
+    return await balance_cache.get("funds", fetch_balance)
+
+
+@app.get("/get-balance")
+async def get_balance():
+    return await get_cached_balance()
+
 @app.websocket("/ws/balance")
 async def websocket_balance(websocket: WebSocket):
     await websocket.accept()
     balance_clients.add(websocket)
 
+    sent = False
+
     try:
         while True:
             await asyncio.sleep(10)  # send every 10 seconds
 
-            valid, msg = is_token_valid()
-            if not valid:
-                await websocket.send_json({
-                    "status": "error",
-                    "message": msg
-                })
+            # Margins don't move off hours; one value is enough
+            if sent and not market_session.is_open():
+                continue
+
+            result = await get_cached_balance()
+            if result["status"] != "success":
+                await websocket.send_json(result)
                 continue
 
-            response = user_api.get_user_fund_margin("2.0").to_dict()
-            
-            avail_bal = response.get("data").get("equity").get("available_margin")
+            avail_bal = result["data"].get("data").get("equity").get("available_margin")
             await websocket.send_json({
                 "status": "success",
                 "balance": avail_bal
             })
+            sent = True
 
     except Exception as e:
         print("Balance WS closed:", e)
@@ -293,38 +438,163 @@ async def websocket_balance(websocket: WebSocket):
 
 
 # -----------------------
-# LIVE LTP WEBSOCKET (UNCHANGED)
+# LIVE LTP WEBSOCKET (?format=binary for compact frames)
 # -----------------------
 @app.websocket("/ws/ltp")
 async def websocket_ltp(websocket: WebSocket):
     await websocket.accept()
-    ltp_manager.add_client(websocket)
+    ltp_manager.add_client(websocket, websocket.query_params.get("format"))
 
     try:
         while True:
             data = await websocket.receive_json()
             if data["action"] == "subscribe":
-                ltp_manager.subscribe(
-                    data["instrument_key"],
-                    data.get("trading_symbol")
-                )
-                ltp_manager.subscribe(data["instrument_key"])
+                instrument = data["instrument_key"]
+
+                # Optional "mode": option_greeks / full / full_d30 for depth, OI and greeks
+                mode = data.get("mode")
+                if mode not in FEED_MODES:
+                    mode = None
+                ltp_manager.subscribe(instrument, data.get("trading_symbol"), mode)
+
+                # Last known price right away; fetch one if the feed is down
+                sent = await ltp_manager.send_snapshot(websocket, instrument)
+                if not sent and not live_feed().connected:
+                    threading.Thread(
+                        target=market_feed.fallback, args=(instrument,), daemon=True
+                    ).start()
     except:
         ltp_manager.remove_client(websocket)
 
 
+@app.get("/ltp/snapshot")
+async def ltp_snapshot(keys: str):
+    instruments = [k for k in keys.split(",") if k]
+    return {"status": "success", "data": ltp_manager.snapshot(instruments)}
+
+
+# -----------------------
+# LIVE CANDLES
+# -----------------------
+@app.get("/candles/{instrument_key}")
+async def get_candles(instrument_key: str, interval: str = "1m", limit: int = 0):
+    if interval not in CANDLE_INTERVALS:
+        return {"status": "error", "message": "Invalid interval"}
+
+    candles = candle_builder.get_candles(instrument_key, interval, limit)
+    return {
+        "status": "success",
+        "instrument": instrument_key,
+        "interval": interval,
+        "count": len(candles),
+        "data": candles
+    }
+
+
+@app.websocket("/ws/candles")
+async def websocket_candles(websocket: WebSocket):
+    await websocket.accept()
+    candle_builder.add_client(websocket)
+
+    try:
+        while True:
+            data = await websocket.receive_json()
+            if data["action"] == "subscribe":
+                candle_builder.watch(websocket, data["instrument_key"])
+    except:
+        candle_builder.remove_client(websocket)
+
+
+# -----------------------
+# OPTION CHAIN ANALYTICS
+# -----------------------
+@app.get("/analytics/chain/{index_name}")
+async def get_chain_analytics(index_name: str, expiry: str = None):
+    chain = chain_analytics.get_chain(index_name, expiry)
+    if chain is None:
+        return {"status": "error", "message": "No option chain for this index/expiry"}
+
+    # Streamed for CHAIN_REQUEST_HOLD_SECONDS, renewed by each poll
+    chain_analytics.hold(chain)
+
+    result = chain_analytics.compute(chain)
+    if result is None:
+        return {"status": "error", "message": "Waiting for underlying price"}
+
+    return {"status": "success", "data": result}
+
+
+@app.websocket("/ws/chain")
+async def websocket_chain(websocket: WebSocket):
+    await websocket.accept()
+
+    try:
+        while True:
+            data = await websocket.receive_json()
+            if data["action"] == "subscribe":
+                chain = chain_analytics.get_chain(data["index"], data.get("expiry"))
+                if chain is None:
+                    await websocket.send_json({
+                        "status": "error",
+                        "message": "No option chain for this index/expiry"
+                    })
+                    continue
+
+                chain_analytics.add_client(websocket, chain)
+    except:
+        chain_analytics.remove_client(websocket)
+
+
+# -----------------------
+# POSITIONS (P&L marked on every tick)
+# -----------------------
+@app.get("/positions")
+async def get_positions():
+    return {"status": "success", **position_book.snapshot()}
+
+
+@app.websocket("/ws/positions")
+async def websocket_positions(websocket: WebSocket):
+    await websocket.accept()
+    await websocket.send_json(position_book.snapshot())
+    position_book.add_client(websocket)
+
+    try:
+        while True:
+            await websocket.receive_text()
+    except:
+        position_book.remove_client(websocket)
+
+
+async def load_positions_in_background():
+    try:
+        await asyncio.to_thread(position_book.load)
+    except Exception as e:
+        print(f"❌ Position book load failed: {e}")
+
+    await position_book.reconcile_loop(market_session.is_open)
+
+
 # -----------------------
 # LIVE FEED START
 # -----------------------
+def live_feed():
+    # In worker mode the Upstox socket lives in the feed hub process
+    return hub_client if FEED_MODE == "worker" else market_feed
+
+
 @app.get("/start-live-feed")
 async def start_live_feed_route():
+    if FEED_MODE == "worker":
+        return {"status": "error", "message": "Live feed is owned by the feed hub process"}
+
     valid, msg = is_token_valid()
     if not valid:
         return {"status": "error", "message": msg}
 
     try:
-        thread = threading.Thread(target=start_market_feed, daemon=True)
-        thread.start()
+        # Manual start works off hours too; a running feed is left as is
+        market_feed.resume()
         return {"status": "success", "message": "Live Market Feed Started Successfully"}
 
     except Exception as e:
@@ -332,14 +602,166 @@ async def start_live_feed_route():
 
 
 # -----------------------
-# STARTUP EVENT (UNCHANGED)
+# READINESS
+# -----------------------
+@app.get("/ready")
+async def ready():
+    instruments_ready = INSTRUMENTS_READY.is_set()
+    body = {
+        "status": "ready" if instruments_ready else "loading",
+        "instruments": instruments_ready,
+        "feed": live_feed().connected
+    }
+    return JSONResponse(body, status_code=200 if instruments_ready else 503)
+
+
+# -----------------------
+# METRICS (Prometheus text format)
+# -----------------------
+@app.get("/metrics")
+async def metrics_route():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+# -----------------------
+# PROFILING (opt-in with PROFILING_ENABLED=1)
 # -----------------------
+def profiling_disabled():
+    return {"status": "error", "message": "Profiling is disabled (set PROFILING_ENABLED=1)"}
+
+
+@app.post("/debug/profile/start")
+async def start_profile(interval_ms: float = 5):
+    if not PROFILING_ENABLED:
+        return profiling_disabled()
+    started = profiler.start(interval_ms)
+    return {"status": "success" if started else "error", **profiler.status()}
+
+
+@app.post("/debug/profile/stop")
+async def stop_profile():
+    if not PROFILING_ENABLED:
+        return profiling_disabled()
+    profiler.stop()
+    return {"status": "success", **profiler.status()}
+
+
+# Collapsed stacks, one "frame;frame;frame count" per line
+@app.get("/debug/profile")
+async def get_profile(limit: int = 200):
+    if not PROFILING_ENABLED:
+        return profiling_disabled()
+    return PlainTextResponse(profiler.collapsed(limit))
+
+
+@app.post("/debug/trace")
+async def toggle_trace(enabled: bool = True):
+    if not PROFILING_ENABLED:
+        return profiling_disabled()
+    tracer.enabled = enabled
+    return {"status": "success", "tracing": tracer.enabled}
+
+
+# -----------------------
+# MARKET SESSION
+# -----------------------
+@app.get("/market/status")
+async def market_status():
+    return {"status": "success", **market_session.status()}
+
+
+def prewarm_session():
+    # Shortly before the open: fail fast on a bad token, build clients,
+    # pick up new contracts, then connect the feed
+    valid, msg = is_token_valid()
+    if not valid:
+        print(f"⚠️ Pre-open token check failed: {msg}")
+
+    get_api_client()
+    if INSTRUMENTS_READY.is_set():
+        refresh_instruments()
+    market_feed.resume()
+
+
+def wire_market_session():
+    def in_thread(fn):
+        return lambda: threading.Thread(target=fn, daemon=True).start()
+
+    market_session.on(PHASE_PREWARM, in_thread(prewarm_session))
+    market_session.on(PHASE_OPEN, market_feed.resume)
+    # pause() waits on the websocket close handshake: keep it off the loop
+    market_session.on(PHASE_CLOSED, lambda: asyncio.to_thread(market_feed.pause))
+
+
+# -----------------------
+# STARTUP EVENT (server accepts traffic before instruments load)
+# -----------------------
+async def load_instruments_in_background():
+    try:
+        await asyncio.to_thread(bootstrap_instruments)
+    except Exception as e:
+        print(f"❌ Instrument bootstrap failed: {e}")
+        return
+
+    # Worker processes share the hub's table instead of writing their own
+    if LTP_SHM_ENABLED and FEED_MODE != "worker":
+        shm_table = LtpTableWriter(get_snapshot().id_by_key, ltp_manager)
+        ltp_manager.add_tick_listener(shm_table.on_tick)
+
+
 @app.on_event("startup")
 async def startup_event():
-    bootstrap_instruments()
-
     loop = asyncio.get_running_loop()
     ltp_manager.set_loop(loop)
-
-    start_market_feed()
+    candle_builder.set_loop(loop)
+    position_book.set_loop(loop)
+    ltp_manager.add_tick_listener(candle_builder.on_tick)
+    ltp_manager.add_tick_listener(chain_analytics.on_tick)
+    ltp_manager.add_tick_listener(position_book.on_tick)
+
+    # Workers get decoded records (oi, greeks, depth) forwarded by the hub
+    records = hub_client if FEED_MODE == "worker" else market_feed
+    records.add_record_listener(chain_analytics.on_record)
+    records.add_record_listener(ltp_manager.on_record)
+    asyncio.create_task(chain_analytics.run())
+    asyncio.create_task(position_book.run())
+    asset_store.build()
+    build_pages()
+    asyncio.create_task(load_positions_in_background())
+    stall_monitor.start()
+
+    # Strike-window pruning centres on the last underlying price
+    set_spot_source(lambda key: (ltp_manager.last_values.get(key) or (None,))[0])
+
+    asyncio.create_task(load_instruments_in_background())
+
+    if FEED_MODE == "worker":
+        asyncio.create_task(hub_client.run())
+    else:
+        asyncio.create_task(start_feed_with_subscriptions())
     print("🚀 Application and Market Feed initializing...")
+
+
+async def start_feed_with_subscriptions():
+    # Saved subscriptions go in before the feed connects, so its open
+    # replays them in one bulk subscribe before any browser is back
+    try:
+        await asyncio.wait_for(asyncio.to_thread(subscription_store.restore), SUBSCRIPTION_RESTORE_TIMEOUT)
+    except Exception as e:
+        print(f"⚠️ Subscriptions not restored: {e!r}")
+    ltp_manager.add_subscription_listener(subscription_store.on_change)
+
+    # Restored watches are held until chains, positions or browsers have taken them over
+    asyncio.create_task(subscription_store.release_restored_after())
+
+    # The session scheduler connects the feed now if the market is
+    # open (or MARKET_SESSION_ENABLED=0), otherwise just before the open
+    wire_market_session()
+    asyncio.create_task(market_session.run())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Last debounced change, and a fresh last-seen stamp for everything still streamed
+    if FEED_MODE != "worker":
+        await asyncio.to_thread(subscription_store.flush)
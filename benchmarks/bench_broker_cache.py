@@ -0,0 +1,75 @@
+"""
+Upstream broker calls for a dashboard refresh storm, with and without
+the single-flight cache.
+
+Simulates TABS tabs each reading /get-balance and /gtt-details every
+REFRESH seconds for DURATION seconds against a fake broker with 80 ms
+latency, and counts how many calls reach the broker.
+
+    python benchmarks/bench_broker_cache.py
+"""
+import asyncio
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from broker_cache import SingleFlightCache
+
+TABS = 8
+REFRESH = 1.0
+DURATION = 5.0
+BROKER_LATENCY = 0.08
+
+
+class FakeBroker:
+    def __init__(self):
+        self.calls = 0
+
+    def read(self, what):
+        self.calls += 1
+        time.sleep(BROKER_LATENCY)
+        return {"status": "success", "data": what}
+
+
+async def tab(read, rnd):
+    end = time.monotonic() + DURATION
+    latencies = []
+    await asyncio.sleep(rnd.random() * 0.05)
+    while time.monotonic() < end:
+        start = time.perf_counter()
+        await asyncio.gather(read("funds"), read("GTT-C1"))
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(REFRESH)
+    return latencies
+
+
+async def run(cached, ttl=2.0):
+    broker = FakeBroker()
+    cache = SingleFlightCache("bench", ttl)
+
+    async def read(key):
+        if cached:
+            return await cache.get(key, broker.read, key)
+        return await asyncio.to_thread(broker.read, key)
+
+    rnd = random.Random(1)
+    results = await asyncio.gather(*[tab(read, rnd) for _ in range(TABS)])
+    latencies = sorted(l for r in results for l in r)
+    return broker.calls, len(latencies) * 2, latencies[len(latencies) // 2]
+
+
+def main():
+    print(f"{TABS} tabs, refresh every {REFRESH:.0f}s for {DURATION:.0f}s, broker latency {BROKER_LATENCY * 1000:.0f} ms\n")
+    print(f"{'mode':<28}{'reads':>8}{'upstream':>10}{'p50 ms':>9}")
+    for label, cached, ttl in [("direct", False, 0), ("single-flight only", True, 0), ("single-flight + 2s TTL", True, 2.0)]:
+        calls, reads, p50 = asyncio.run(run(cached, ttl))
+        print(f"{label:<28}{reads:>8}{calls:>10}{p50 * 1000:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Feed decode throughput per subscription mode.
+
+Builds MarketDataStreamerV3-shaped "feeds" messages (50 instruments
+each, as MessageToDict produces them) and reports messages/sec through
+decode_feed() for every mode, plus a mixed message where only 5
+instruments stream in full.
+
+    python benchmarks/bench_feed_decode.py
+"""
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from feed_decode import decode_feed
+
+INSTRUMENTS = 50
+MESSAGES = 2000
+
+
+def ltpc(n):
+    return {"ltp": 100.0 + n * 0.05, "ltt": "1740000000000", "ltq": "75", "cp": 99.5}
+
+
+def greeks():
+    return {"delta": 0.52, "theta": -11.2, "gamma": 0.0011, "vega": 12.4, "rho": 3.1}
+
+
+def depth(levels):
+    return [
+        {"bidQ": str(75 * (i + 1)), "bidP": 99.95 - i * 0.05, "askQ": str(75 * (i + 2)), "askP": 100.05 + i * 0.05}
+        for i in range(levels)
+    ]
+
+
+def entry(mode, n):
+    if mode == "ltpc":
+        return {"ltpc": ltpc(n), "requestMode": "ltpc"}
+
+    if mode == "option_greeks":
+        return {"firstLevelWithGreeks": {
+            "ltpc": ltpc(n), "firstDepth": depth(1)[0], "optionGreeks": greeks(),
+            "vtt": "1234500", "oi": 456000.0, "iv": 0.142
+        }, "requestMode": "option_greeks"}
+
+    levels = 30 if mode == "full_d30" else 5
+    return {"fullFeed": {"marketFF": {
+        "ltpc": ltpc(n),
+        "marketLevel": {"bidAskQuote": depth(levels)},
+        "optionGreeks": greeks(),
+        "marketOHLC": {"ohlc": [
+            {"interval": interval, "open": 98.0, "high": 101.0, "low": 97.5, "close": 100.0, "vol": "1000", "ts": "1740000000000"}
+            for interval in ("1d", "I1")
+        ]},
+        "atp": 99.8, "vtt": "1234500", "oi": 456000.0, "iv": 0.142, "tbq": 120000.0, "tsq": 98000.0
+    }}, "requestMode": "full_d30" if mode == "full_d30" else "full_d5"}
+
+
+def messages(modes):
+    return [
+        {"type": "live_feed", "feeds": {
+            f"NSE_FO|{65000 + i}": entry(modes[i], n) for i in range(INSTRUMENTS)
+        }}
+        for n in range(MESSAGES)
+    ]
+
+
+def measure(batch):
+    start = time.perf_counter()
+    for message in batch:
+        for instrument, data in message["feeds"].items():
+            decode_feed(instrument, data)
+    return len(batch) / (time.perf_counter() - start)
+
+
+def main():
+    cases = [(mode, [mode] * INSTRUMENTS) for mode in ("ltpc", "option_greeks", "full", "full_d30")]
+    cases.append(("mixed: 45 ltpc + 5 full", ["full"] * 5 + ["ltpc"] * (INSTRUMENTS - 5)))
+
+    print(f"{INSTRUMENTS} instruments per message\n")
+    print(f"{'mode':<26}{'msgs/sec':>12}{'entries/sec':>14}")
+    for label, modes in cases:
+        batch = messages(modes)
+        rate = max(measure(batch) for _ in range(5))
+        print(f"{label:<26}{rate:>12,.0f}{rate * INSTRUMENTS:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Fan-out throughput vs uvicorn-style worker count in FEED_MODE=worker.
+
+One hub (this process) publishes ticks for a single instrument as fast as
+it can; each worker process holds CLIENTS fake websockets and broadcasts
+through its own LiveLTPManager. Delivered frames/sec should grow linearly
+with workers until the box runs out of cores.
+
+    python benchmarks/bench_feed_fanout.py
+"""
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from bench_ltp_protocol import FakeWebSocket
+from feed_hub import FeedHub, FeedHubClient
+from live_ltp_manager import LiveLTPManager
+
+KEY = "NSE_FO|65083"
+CLIENTS = 200
+DURATION = 5.0
+
+
+def worker(path, results):
+    async def run():
+        manager = LiveLTPManager()
+        manager.set_loop(asyncio.get_running_loop())
+        manager.subscribed.add(KEY)
+        manager.active_instrument = KEY
+
+        clients = [FakeWebSocket() for _ in range(CLIENTS)]
+        for ws in clients:
+            manager.add_client(ws)
+
+        task = asyncio.create_task(FeedHubClient(path, manager).run())
+        await asyncio.sleep(0.5)
+
+        start = sum(ws.frames for ws in clients)
+        await asyncio.sleep(DURATION)
+        results.put(sum(ws.frames for ws in clients) - start)
+        task.cancel()
+
+    asyncio.run(run())
+
+
+def start_hub(path):
+    hub = FeedHub(path, manager=LiveLTPManager())
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_until_complete, args=(hub.serve(),), daemon=True).start()
+
+    stop = threading.Event()
+
+    def produce():
+        price = 100.0
+        while not stop.is_set():
+            price += 0.05
+            hub.publish(KEY, round(price, 2))
+            time.sleep(0.0002)
+
+    threading.Thread(target=produce, daemon=True).start()
+    return stop
+
+
+def run(workers):
+    path = os.path.join(tempfile.mkdtemp(), "feed.sock")
+    stop = start_hub(path)
+    time.sleep(0.2)
+
+    ctx = multiprocessing.get_context("fork")
+    results = ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(path, results)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+
+    frames = sum(results.get() for _ in procs)
+    for p in procs:
+        p.join()
+    stop.set()
+
+    return frames / DURATION
+
+
+def main():
+    print(f"cores: {os.cpu_count()}, clients per worker: {CLIENTS}")
+    base = None
+    for workers in (1, 2, 4):
+        rate = run(workers)
+        base = base or rate
+        print(f"workers={workers}  frames/sec={rate:12,.0f}  scaling={rate / base:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Market feed time-to-recover after a forced disconnect.
+
+Drives MarketFeed's supervisor against a local fake streamer (same event
+API as MarketDataStreamerV3, no network) with 500 subscribed keys:
+
+    drop      server drops the socket, next connect succeeds
+    flapping  server drops the socket and refuses the next 3 connects
+    start     20 concurrent start() / resume() calls
+
+and reports time from the drop until every key is resubscribed, the
+connect attempts made and the subscribe frames sent. Backoff is scaled
+down (FEED_BACKOFF_BASE=0.05) so the run takes a couple of seconds.
+
+    python benchmarks/bench_feed_recovery.py
+"""
+import os
+import sys
+import threading
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+os.environ.setdefault("FEED_BACKOFF_BASE", "0.05")
+os.environ.setdefault("FEED_STABLE_SECONDS", "0")
+
+from live_ltp_manager import ltp_manager
+from websocket_feed import MarketFeed, FEED_BACKOFF_BASE
+
+KEYS = 500
+OPEN_DELAY = 0.005  # handshake time of the fake server
+
+
+class FakeServer:
+    def __init__(self):
+        self.refuse = 0
+        self.connects = 0
+        self.frames = 0
+        self.keys = set()
+        self.resubscribed = threading.Event()
+        self.lock = threading.Lock()
+
+
+class FakeStreamer:
+    """MarketDataStreamerV3 event surface over FakeServer."""
+
+    def __init__(self, server):
+        self.server = server
+        self.listeners = {"open": [], "message": [], "error": [], "close": []}
+        self.open = False
+
+    def on(self, event, listener):
+        self.listeners[event].append(listener)
+
+    def emit(self, event, *args):
+        for listener in self.listeners[event]:
+            listener(*args)
+
+    def connect(self):
+        with self.server.lock:
+            self.server.connects += 1
+            refused = self.server.refuse > 0
+            self.server.refuse -= refused
+
+        def handshake():
+            time.sleep(OPEN_DELAY)
+            if refused:
+                self.emit("error", "Connection refused")
+                self.emit("close", 1006, "refused")
+                return
+            self.open = True
+            self.emit("open")
+
+        threading.Thread(target=handshake, daemon=True).start()
+
+    def drop(self):
+        self.open = False
+        self.emit("close", 1006, "forced")
+
+    def disconnect(self):
+        if self.open:
+            self.open = False
+            self.emit("close", 1000, "client")
+
+    def subscribe(self, keys, mode):
+        if not self.open:
+            raise Exception("WebSocket is not open.")
+        with self.server.lock:
+            self.server.frames += 1
+            self.server.keys.update(keys)
+            if len(self.server.keys) >= KEYS:
+                self.server.resubscribed.set()
+
+    def unsubscribe(self, keys):
+        pass
+
+    def change_mode(self, keys, mode):
+        pass
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise RuntimeError("timed out")
+        time.sleep(0.001)
+
+
+def new_feed(server):
+    feed = MarketFeed(streamer_factory=lambda: FakeStreamer(server))
+
+    # No Groww calls during market hours
+    feed.fallback = lambda instrument, reason="feed_down": None
+    return feed
+
+
+def run_drop(refuse):
+    server = FakeServer()
+    feed = new_feed(server)
+    feed.start()
+    wait_for(lambda: feed.connected)
+
+    server.keys.clear()
+    server.frames = 0
+    server.connects = 0
+    server.resubscribed.clear()
+    server.refuse = refuse
+
+    start = time.perf_counter()
+    feed.streamer.drop()
+    server.resubscribed.wait(30)
+    elapsed = time.perf_counter() - start
+
+    return elapsed, server.connects, server.frames
+
+
+def run_start():
+    server = FakeServer()
+    feed = new_feed(server)
+    feed.paused = True
+
+    threads = [
+        threading.Thread(target=feed.start if n % 2 else feed.resume)
+        for n in range(20)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    wait_for(lambda: feed.connected)
+    time.sleep(0.05)
+    return server.connects
+
+
+def main():
+    # Keep the refused-connect errors out of the table
+    import logging
+    logging.disable(logging.ERROR)
+
+    ltp_manager.subscribed.update(f"NSE_FO|{60000 + i}" for i in range(KEYS))
+
+    print(f"Keys subscribed: {KEYS}, backoff base {FEED_BACKOFF_BASE}s, handshake {OPEN_DELAY * 1000:.0f} ms\n")
+    print(f"{'scenario':<24}{'recover ms':>12}{'connects':>10}{'frames':>8}")
+
+    for name, refuse in (("drop", 0), ("flapping (3 refused)", 3)):
+        elapsed, connects, frames = run_drop(refuse)
+        print(f"{name:<24}{elapsed * 1000:>12.1f}{connects:>10}{frames:>8}")
+
+    connects = run_start()
+    print(f"\n20 concurrent start()/resume(): {connects} connect(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Instrument master download against a local HTTP server.
+
+Serves a synthetic complete.json.gz with ETag / Last-Modified / Range
+support and reports bytes transferred and wall time for a cold download,
+a conditional refresh (304), a resumed partial download, and the
+decompress-and-parse step.
+
+    python benchmarks/bench_instrument_download.py
+"""
+import email.utils
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from fixtures import write_master_gz
+import instruments
+
+
+class MasterHandler(BaseHTTPRequestHandler):
+    body = b""
+    etag = ""
+    last_modified = ""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        cls = type(self)
+        if self.headers.get("If-None-Match") == cls.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        start = 0
+        range_header = self.headers.get("Range")
+        if range_header and self.headers.get("If-Range") in (cls.etag, cls.last_modified):
+            start = int(range_header.split("=")[1].split("-")[0])
+            if start >= len(cls.body):
+                self.send_response(416)
+                self.end_headers()
+                return
+
+        payload = cls.body[start:]
+        self.send_response(206 if start else 200)
+        if start:
+            self.send_header("Content-Range", f"bytes {start}-{len(cls.body) - 1}/{len(cls.body)}")
+        self.send_header("ETag", cls.etag)
+        self.send_header("Last-Modified", cls.last_modified)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def report(label, stats):
+    print(f"{label:<22} {stats['status']:<13} {stats['bytes']:>12,} bytes {stats['seconds']:>8.3f} s")
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+
+    # Cold shard and version history go to the temp dir, not the real data/
+    instruments.cold_shard = instruments.ColdShard(os.path.join(tmp, "cold.json.gz"))
+    instruments.version_history.path = os.path.join(tmp, "versions")
+
+    server = None
+    try:
+        fixture = os.path.join(tmp, "fixture.json.gz")
+        rows = write_master_gz(fixture)
+
+        with open(fixture, "rb") as f:
+            MasterHandler.body = f.read()
+        MasterHandler.etag = '"' + hashlib.md5(MasterHandler.body).hexdigest() + '"'
+        MasterHandler.last_modified = email.utils.formatdate(usegmt=True)
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), MasterHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_port}/complete.json.gz"
+        data_dir = os.path.join(tmp, "data")
+
+        print(f"fixture: {len(rows):,} rows, {len(MasterHandler.body):,} bytes gz")
+
+        report("cold download", instruments.download_master(url=url, data_dir=data_dir))
+        report("conditional refresh", instruments.download_master(url=url, data_dir=data_dir))
+
+        # Simulate a download cut off half way
+        gz_file, part_file, meta_file = instruments.get_master_paths(data_dir)
+        os.replace(gz_file, part_file)
+        with open(part_file, "r+b") as f:
+            f.truncate(len(MasterHandler.body) // 2)
+        instruments._write_meta(meta_file, {"partial": {"validator": MasterHandler.etag}})
+        report("resume from 50%", instruments.download_master(url=url, data_dir=data_dir))
+
+        start = time.perf_counter()
+        instruments.load_and_filter(gz_file)
+        print(f"{'gunzip + parse + filter':<22} {time.perf_counter() - start:>43.3f} s")
+    finally:
+        if server is not None:
+            server.shutdown()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
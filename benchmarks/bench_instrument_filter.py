@@ -0,0 +1,76 @@
+"""
+Instrument filter throughput over a full synthetic master (~94k rows).
+
+Compares the old hardcoded if/elif filter with filter_master() driven by
+a compiled spec, for the default index set, a wider index set and all
+stock options grouped per underlying. Parsing is excluded.
+
+    python benchmarks/bench_instrument_filter.py
+"""
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from fixtures import synthetic_master
+from instruments import INSTRUMENT_FILTER, filter_master
+
+RUNS = 10
+
+
+def legacy_filter(data):
+    nifty, banknifty, sensex = [], [], []
+    for item in data:
+        name = item.get("name", "").upper()
+        segment = item.get("segment", "")
+        inst_type = item.get("instrument_type")
+        asset_type = item.get("asset_type")
+        underlying_type = item.get("underlying_type")
+
+        if segment in ["NSE_FO", "BSE_FO"]:
+            if name == "NIFTY":
+                nifty.append(item)
+            elif name == "BANKNIFTY":
+                banknifty.append(item)
+            elif name == "SENSEX":
+                sensex.append(item)
+            else:
+                continue
+    return {"nifty": nifty, "banknifty": banknifty, "sensex": sensex}
+
+
+def measure(fn, data):
+    best = float("inf")
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        groups = fn(data)
+        best = min(best, time.perf_counter() - start)
+    return groups, best
+
+
+def main():
+    data = synthetic_master()
+    specs = [
+        ("legacy if/elif (3 indexes)", legacy_filter),
+        ("spec: 3 indexes", lambda d: filter_master(d, INSTRUMENT_FILTER)),
+        ("spec: 5 indexes", lambda d: filter_master(d, {
+            **INSTRUMENT_FILTER,
+            "underlyings": ["NIFTY", "BANKNIFTY", "FINNIFTY", "MIDCPNIFTY", "SENSEX"]})),
+        ("spec: all stock options", lambda d: filter_master(d, {
+            "segments": ["NSE_FO"], "underlyings": [],
+            "instrument_types": ["CE", "PE"], "asset_types": ["EQUITY"]})),
+    ]
+
+    print(f"{len(data)} rows, best of {RUNS}\n")
+    print(f"{'filter':<30}{'groups':>8}{'kept':>8}{'ms':>8}{'rows/sec':>14}")
+    for label, fn in specs:
+        groups, seconds = measure(fn, data)
+        kept = sum(len(rows) for rows in groups.values())
+        print(f"{label:<30}{len(groups):>8}{kept:>8}{seconds * 1e3:>8.1f}{len(data) / seconds:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Hot/cold instrument split.
+
+Loads a synthetic master with no pruning and with a hot-set policy
+(next 2 expiries, strikes within 5% of spot) and reports hot rows,
+traced memory of the snapshot, /instruments/{index} payload size and
+the cost of a first and a repeated cold-shard lookup.
+
+    python benchmarks/bench_instrument_pruning.py
+"""
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from fixtures import INDEXES, write_master_gz
+import instruments
+
+SPOTS = {underlying_key: spot for _, _, _, underlying_key, spot, _, _ in INDEXES}
+
+
+def load(gz_file, policy):
+    instruments._snapshot = instruments.InstrumentSnapshot.build({})
+    gc.collect()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    instruments.load_and_filter(gz_file, policy=policy)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Retained size of the hot snapshot alone
+    snapshot = instruments.get_snapshot()
+    tracemalloc.start()
+    clone = instruments.InstrumentSnapshot.build(json.loads(json.dumps(snapshot.filtered)))
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del clone
+
+    payload = len(json.dumps({"status": "success", "data": snapshot.filtered["nifty"]}))
+    return snapshot, seconds, peak, retained, payload
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        gz_file = os.path.join(tmp, "complete.json.gz")
+        write_master_gz(gz_file)
+        instruments.cold_shard = instruments.ColdShard(os.path.join(tmp, "cold.json.gz"))
+        instruments.version_history.path = os.path.join(tmp, "versions")
+        instruments.set_spot_source(SPOTS.get)
+
+        policies = [
+            ("all contracts", instruments.PrunePolicy(0, 0, [])),
+            ("2 expiries, 5% strikes", instruments.PrunePolicy(2, 5.0, [])),
+        ]
+
+        print(f"{'policy':<24}{'hot rows':>10}{'load s':>9}{'snapshot MB':>13}{'nifty KB':>10}")
+        for label, policy in policies:
+            snapshot, seconds, _, retained, payload = load(gz_file, policy)
+            print(f"{label:<24}{len(snapshot.all):>10}{seconds:>9.2f}"
+                  f"{retained / 1e6:>13.1f}{payload / 1e3:>10.0f}")
+
+        # Far contract: last expiry, deepest strike
+        cold_key = instruments.cold_shard.rows("nifty")[-1]["instrument_key"]
+        instruments.cold_shard.unload()
+
+        start = time.perf_counter()
+        instruments.find_instrument(cold_key)
+        first = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(10000):
+            instruments.find_instrument(cold_key)
+        repeat = (time.perf_counter() - start) / 10000
+
+        print(f"\ncold lookup: first {first * 1e3:.1f} ms (loads shard), then {repeat * 1e6:.2f} us")
+
+
+if __name__ == "__main__":
+    main()
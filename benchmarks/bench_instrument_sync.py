@@ -0,0 +1,97 @@
+"""
+Browser instrument-cache sync: bytes per page load.
+
+Loads a synthetic master as "yesterday", then a "today" master where the
+nearest expiry has rolled off, a new far expiry is listed and a few rows
+changed, and calls /instruments/sync the way the browser does:
+
+    first visit       no cached version → full list
+    same day reload   current version   → unchanged
+    next day          yesterday's version → delta
+
+reporting JSON and gzip bytes (what GZipMiddleware sends) and the
+server time per call.
+
+    python benchmarks/bench_instrument_sync.py
+"""
+import asyncio
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from fixtures import INDEXES, DAY_MS, _option, synthetic_master, write_master_gz
+import instruments
+import app
+
+RUNS = 20
+
+
+def next_day(rows):
+    option_expiries = sorted({row["expiry"] for row in rows if row.get("expiry")})
+    rolled_off, last = option_expiries[0], option_expiries[-1]
+
+    today = [row for row in rows if row.get("expiry") != rolled_off]
+    token = 900000
+    for name, segment, exchange, underlying_key, spot, step, lot in INDEXES:
+        for i in range(-60, 61):
+            for opt in ("CE", "PE"):
+                token += 1
+                today.append(_option(name, segment, exchange, underlying_key, "INDEX",
+                                     spot + i * step, opt, last + 7 * DAY_MS, lot, token))
+
+    # A handful of freeze-limit revisions
+    for row in today[:200]:
+        if row.get("freeze_quantity"):
+            row["freeze_quantity"] += row["lot_size"]
+    return today
+
+
+def call(version):
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        result = asyncio.run(app.sync_instruments(version))
+    seconds = (time.perf_counter() - start) / RUNS
+
+    body = json.dumps(result).encode()
+    return result, len(body), len(gzip.compress(body, 9)), seconds
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        instruments.cold_shard = instruments.ColdShard(os.path.join(tmp, "cold.json.gz"))
+        instruments.version_history.path = os.path.join(tmp, "versions")
+        sys.stdout = open(os.devnull, "w")
+        try:
+            rows = synthetic_master()
+            gz_file = os.path.join(tmp, "complete.json.gz")
+
+            write_master_gz(gz_file, rows)
+            instruments.load_and_filter(gz_file)
+            instruments.INSTRUMENTS_READY.set()
+            yesterday = instruments.get_snapshot().version
+
+            write_master_gz(gz_file, next_day(rows))
+            instruments.load_and_filter(gz_file, delta=True)
+            today = instruments.get_snapshot().version
+        finally:
+            sys.stdout.close()
+            sys.stdout = sys.__stdout__
+
+        print(f"Hot instruments: {len(instruments.get_snapshot().all)}\n")
+        print(f"{'page load':<22}{'mode':>10}{'rows':>8}{'json KB':>10}{'gzip KB':>10}{'server ms':>11}")
+        for label, version in (("first visit", ""), ("same day reload", today), ("next day", yesterday)):
+            result, raw, packed, seconds = call(version)
+            rows_sent = len(result.get("data") or result.get("upsert") or [])
+            print(f"{label:<22}{result['mode']:>10}{rows_sent:>8}{raw / 1024:>10.1f}"
+                  f"{packed / 1024:>10.1f}{seconds * 1000:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
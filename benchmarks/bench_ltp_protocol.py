@@ -0,0 +1,79 @@
+"""
+/ws/ltp JSON vs binary framing through LiveLTPManager.broadcast.
+
+    python benchmarks/bench_ltp_protocol.py
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from live_ltp_manager import LiveLTPManager
+from ltp_protocol import FORMAT_BINARY, FORMAT_JSON
+
+CLIENTS = 50
+BATCHES = 2000
+
+
+class FakeWebSocket:
+    """Counts bytes the way Starlette's WebSocket would put them on the wire."""
+
+    def __init__(self):
+        self.bytes = 0
+        self.frames = 0
+
+    async def send_json(self, data):
+        text = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+        await self.send_text(text)
+
+    async def send_text(self, text):
+        self.bytes += len(text.encode("utf-8"))
+        self.frames += 1
+
+    async def send_bytes(self, data):
+        self.bytes += len(data)
+        self.frames += 1
+
+
+def make_batches(size):
+    return [
+        {f"NSE_FO|{65000 + i}": 100.0 + n * 0.05 + i for i in range(size)}
+        for n in range(BATCHES)
+    ]
+
+
+async def run(fmt, batch_size):
+    manager = LiveLTPManager()
+    clients = [FakeWebSocket() for _ in range(CLIENTS)]
+    for ws in clients:
+        manager.add_client(ws, fmt)
+
+    batches = make_batches(batch_size)
+
+    start = time.process_time()
+    for batch in batches:
+        await manager.broadcast(batch)
+    cpu = time.process_time() - start
+
+    ticks = BATCHES * batch_size * CLIENTS
+    total_bytes = sum(ws.bytes for ws in clients)
+    return total_bytes / ticks, cpu / ticks * 1e6
+
+
+def main():
+    print(f"{CLIENTS} clients, {BATCHES} batches")
+    print(f"{'batch':>6} {'format':>7} {'bytes/tick':>11} {'cpu us/tick':>12}")
+
+    for batch_size in (1, 5, 20):
+        for fmt in (FORMAT_JSON, FORMAT_BINARY):
+            per_tick, cpu_us = asyncio.run(run(fmt, batch_size))
+            print(f"{batch_size:>6} {fmt:>7} {per_tick:>11.1f} {cpu_us:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Shared-memory LTP table: reads/sec with and without a concurrent writer.
+
+The writer stores the same value as ltp and timestamp, so any torn read
+(ltp != timestamp) would show up in the count.
+
+    python benchmarks/bench_ltp_shm.py
+"""
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from ltp_shm import LtpTableReader, LtpTableWriter
+
+INSTRUMENTS = 5000
+DURATION = 3.0
+
+
+class NoManager:
+    last_values = {}
+
+
+def keys():
+    return {f"NSE_FO|{40000 + i}": i + 1 for i in range(INSTRUMENTS)}
+
+
+def writer(path, stop, started):
+    table = LtpTableWriter(keys(), NoManager(), path=path)
+    names = list(table.slots)
+    for name in names:
+        table.write(name, 1.0, 1.0)
+    started.set()
+
+    writes, value = 0, 1.0
+    while not stop.is_set():
+        for name in random.sample(names, 100):
+            value += 1.0
+            table.write(name, value, value)
+        writes += 100
+    print(f"writer           : {writes / DURATION:12,.0f} writes/sec")
+
+
+def read_for(table, names, seconds):
+    reads = torn = 0
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        for name in names:
+            ltp, ts, _ = table.get(name)
+            if ltp != ts:
+                torn += 1
+        reads += len(names)
+    return reads / seconds, torn
+
+
+def main():
+    path = os.path.join(tempfile.mkdtemp(), "ltp.tbl")
+
+    ctx = multiprocessing.get_context("fork")
+    stop, started = ctx.Event(), ctx.Event()
+    proc = ctx.Process(target=writer, args=(path, stop, started))
+    proc.start()
+    started.wait()
+
+    table = LtpTableReader(path)
+    names = random.sample(list(table.slots), 200)
+
+    rate, torn = read_for(table, names, DURATION)
+    stop.set()
+    proc.join()
+    print(f"reader (writing) : {rate:12,.0f} reads/sec, torn reads: {torn}")
+
+    rate, torn = read_for(table, names, DURATION)
+    print(f"reader (idle)    : {rate:12,.0f} reads/sec, torn reads: {torn}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Position book mark-to-market cost per tick.
+
+Opens N positions, then pushes ticks through LiveLTPManager.update_ltp
+with the position book as a tick listener: half the ticks hit a held
+instrument, half hit instruments we only stream. Compared with marking
+by rescanning every position on each tick.
+
+    python benchmarks/bench_positions.py
+"""
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from live_ltp_manager import LiveLTPManager
+import positions
+from positions import PositionBook
+
+TICKS = 200000
+
+
+def build(n):
+    manager = LiveLTPManager()
+    positions.ltp_manager = manager
+
+    book = PositionBook()
+    held = [f"NSE_FO|{40000 + i}" for i in range(n)]
+    for i, instrument in enumerate(held):
+        book.apply_fill(instrument, "BUY", 75, 100.0 + i % 50, order_id=f"B{i}")
+
+    streamed = [f"NSE_FO|{90000 + i}" for i in range(n)]
+    rnd = random.Random(7)
+    ticks = [
+        (rnd.choice(held if t % 2 else streamed), 100.0 + rnd.randint(-400, 400) * 0.05)
+        for t in range(TICKS)
+    ]
+    return manager, book, ticks
+
+
+def rescan(book):
+    # What an unindexed engine does: re-mark every position on every tick
+    def on_tick(instrument, ltp):
+        total = 0.0
+        for position in book.positions.values():
+            price = ltp if position.instrument == instrument else position.ltp
+            total += (price - position.avg_price) * position.quantity
+        book.unrealised = total
+    return on_tick
+
+
+def run(manager, listener, ticks):
+    manager.tick_listeners = [listener]
+    start = time.perf_counter()
+    for instrument, ltp in ticks:
+        manager.update_ltp(instrument, ltp)
+    return time.perf_counter() - start
+
+
+def main():
+    import logging
+    logging.disable(logging.INFO)
+
+    print(f"{'positions':>10}{'book us/tick':>15}{'ticks/s':>12}{'rescan us/tick':>17}")
+    for n in (10, 100, 500, 1000):
+        manager, book, ticks = build(n)
+        incremental = run(manager, book.on_tick, ticks)
+
+        # Running total must match a full recompute
+        expected = sum(p.unrealised for p in book.positions.values())
+        assert abs(book.unrealised - expected) < 1e-3, (book.unrealised, expected)
+
+        naive = run(manager, rescan(book), ticks[:TICKS // 10]) * 10
+        print(f"{n:>10}{incremental / TICKS * 1e6:>15.2f}{TICKS / incremental:>12,.0f}{naive / TICKS * 1e6:>17.2f}")
+
+
+if __name__ == "__main__":
+    main()
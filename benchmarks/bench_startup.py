@@ -0,0 +1,67 @@
+"""
+Time from process start to first byte, and to instrument readiness.
+
+Starts `uvicorn app:app` on a free port and polls /ready: the first
+response (200 or 503) is time-to-first-byte, the first 200 is readiness.
+
+    python benchmarks/bench_startup.py
+"""
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+READY_TIMEOUT = 180
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def poll(url):
+    try:
+        with urllib.request.urlopen(url, timeout=1) as r:
+            return r.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return None
+
+
+def main():
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/ready"
+
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port)],
+        cwd=ROOT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    first_byte = ready = None
+    try:
+        while time.perf_counter() - start < READY_TIMEOUT:
+            status = poll(url)
+            if status and first_byte is None:
+                first_byte = time.perf_counter() - start
+            if status == 200:
+                ready = time.perf_counter() - start
+                break
+            time.sleep(0.02)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    print(f"time to first byte  : {first_byte:.3f} s" if first_byte else "no response")
+    print(f"instruments ready   : {ready:.3f} s" if ready else "instruments not ready")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Page load cost: CPU and bytes for / plus its CSS and scripts.
+
+Drives the ASGI app in-process (no server, no network) with a browser's
+Accept-Encoding, before (Jinja render + StaticFiles + GZipMiddleware
+compressing per request) and after (pages and assets compressed once,
+hashed asset URLs), for a first visit and a repeat visit where the
+browser revalidates with If-None-Match and, after, skips the immutable
+assets entirely.
+
+    python benchmarks/bench_static_assets.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+os.chdir(ROOT_DIR)
+
+LOADS = 100
+ACCEPT = b"gzip, deflate, br"
+
+
+async def get(app, path, etag=None):
+    headers = [(b"host", b"localhost"), (b"accept-encoding", ACCEPT)]
+    if etag:
+        headers.append((b"if-none-match", etag.encode()))
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "headers": headers, "client": ("127.0.0.1", 1), "server": ("localhost", 80),
+    }
+    response = {"status": None, "headers": {}, "body": b""}
+
+    requested = []
+
+    async def receive():
+        if not requested:
+            requested.append(True)
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        # Client stays connected; disconnect listeners wait here until cancelled
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {k.decode().lower(): v.decode() for k, v in message["headers"]}
+        elif message["type"] == "http.response.body":
+            response["body"] += message.get("body", b"")
+
+    await app(scope, receive, send)
+    return response
+
+
+def before_app():
+    from fastapi import FastAPI, Request
+    from fastapi.middleware.gzip import GZipMiddleware
+    from fastapi.responses import HTMLResponse
+    from fastapi.staticfiles import StaticFiles
+    from fastapi.templating import Jinja2Templates
+
+    old = FastAPI()
+    old.add_middleware(GZipMiddleware, minimum_size=1000)
+    old.mount("/static", StaticFiles(directory="static"), name="static")
+    templates = Jinja2Templates(directory="templates")
+
+    @old.get("/", response_class=HTMLResponse)
+    async def home(request: Request):
+        return templates.TemplateResponse(request, "index.html")
+
+    return old
+
+
+async def page_load(app, assets, cache):
+    """One visit to / and the assets it links; cache holds path → etag between visits."""
+
+    sent = 0
+    for path in ["/"] + assets:
+        # Hashed names are immutable: the browser doesn't even ask
+        if cache.get(path) == "immutable":
+            continue
+
+        response = await get(app, path, cache.get(path))
+        sent += len(response["body"])
+        if response["status"] == 200:
+            immutable = "immutable" in response["headers"].get("cache-control", "")
+            cache[path] = "immutable" if immutable else response["headers"].get("etag")
+    return sent
+
+
+def measure(app, assets):
+    async def run():
+        first = await page_load(app, assets, {})
+
+        cache = {}
+        await page_load(app, assets, cache)
+        repeat = await page_load(app, assets, cache)
+
+        start = time.process_time()
+        for _ in range(LOADS):
+            await page_load(app, assets, {})
+        cpu_first = (time.process_time() - start) / LOADS
+
+        start = time.process_time()
+        for _ in range(LOADS):
+            await page_load(app, assets, cache)
+        cpu_repeat = (time.process_time() - start) / LOADS
+        return first, repeat, cpu_first, cpu_repeat
+
+    return asyncio.run(run())
+
+
+def main():
+    sys.stdout = open(os.devnull, "w")
+    try:
+        import app as new
+        new.asset_store.build()
+        new.build_pages()
+    finally:
+        sys.stdout.close()
+        sys.stdout = sys.__stdout__
+
+    from static_assets import STATIC_LINK, brotli
+    html = open("templates/index.html", encoding="utf-8").read()
+    old_assets = STATIC_LINK.findall(html)
+    new_assets = STATIC_LINK.findall(new.asset_store.rewrite(html))
+
+    print(f"Page load = / + css + 2 scripts, Accept-Encoding: {ACCEPT.decode()} (brotli {'on' if brotli else 'off'})\n")
+    print(f"{'':<10}{'first KB':>10}{'repeat KB':>11}{'CPU first ms':>14}{'CPU repeat ms':>15}")
+    for label, app, assets in (("before", before_app(), old_assets), ("after", new.app, new_assets)):
+        first, repeat, cpu_first, cpu_repeat = measure(app, assets)
+        print(f"{label:<10}{first / 1024:>10.1f}{repeat / 1024:>11.1f}{cpu_first * 1000:>14.3f}{cpu_repeat * 1000:>15.3f}")
+
+
+if __name__ == "__main__":
+    main()
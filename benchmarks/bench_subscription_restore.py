@@ -0,0 +1,196 @@
+"""
+Time from process start to a hot feed, with and without saved subscriptions.
+
+20 browsers each watch a 25-strike chain (500 keys) and one of them has
+an active instrument. The feed is a local fake streamer (same event API
+as MarketDataStreamerV3, no network) that answers every subscribe with a
+first tick per key.
+
+    before   feed connects empty; browsers come back 50 ms apart, the
+             first 250 ms after the app is up, and resubscribe one by one
+    after    restore() loads the saved keys before the feed connects, so
+             its open replays them in one chunked bulk subscribe
+
+reporting time from process start until the feed is started, to the
+first broadcast tick and to every key streaming, and the subscribe
+frames sent. Each scenario runs in a fresh process so
+the start time is real. Also counts the Mongo writes for a burst of 500
+subscription changes through the debounced store.
+
+    python benchmarks/bench_subscription_restore.py
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+os.environ.setdefault("SUBSCRIPTION_FLUSH_SECONDS", "0.05")
+
+CLIENTS = 20
+CHAIN = 25
+FIRST_CLIENT = 0.25
+CLIENT_GAP = 0.05
+OPEN_DELAY = 0.005  # handshake time of the fake server
+
+CHAINS = [[f"NSE_FO|{60000 + c * CHAIN + i}" for i in range(CHAIN)] for c in range(CLIENTS)]
+ACTIVE = CHAINS[0][CHAIN // 2]
+KEYS = CLIENTS * CHAIN
+
+
+class FakeStreamer:
+    """MarketDataStreamerV3 event surface; each subscribed key ticks once, at a new price."""
+
+    def __init__(self, manager, stats):
+        self.manager = manager
+        self.stats = stats
+        self.listeners = {"open": [], "message": [], "error": [], "close": []}
+        self.open = False
+
+    def on(self, event, listener):
+        self.listeners[event].append(listener)
+
+    def connect(self):
+        def handshake():
+            time.sleep(OPEN_DELAY)
+            self.open = True
+            for listener in self.listeners["open"]:
+                listener()
+
+        threading.Thread(target=handshake, daemon=True).start()
+
+    def disconnect(self):
+        self.open = False
+
+    def subscribe(self, keys, mode):
+        if not self.open:
+            raise Exception("WebSocket is not open.")
+        self.stats["frames"] += 1
+        self.stats["keys"].update(keys)
+        if len(self.stats["keys"]) >= KEYS and not self.stats["all_at"]:
+            self.stats["all_at"] = time.time()
+        for key in keys:
+            self.stats["ticks"] += 1
+            self.manager.update_ltp(key, 100.0 + self.stats["ticks"] * 0.05)
+
+    def unsubscribe(self, keys):
+        pass
+
+    def change_mode(self, keys, mode):
+        pass
+
+
+class FakeCollection:
+    def __init__(self, docs=()):
+        self.docs = {doc["_id"]: doc for doc in docs}
+        self.writes = 0
+
+    def find(self, query):
+        cutoff = query["updated_at"]["$gte"]
+        return [doc for doc in self.docs.values() if doc["updated_at"] >= cutoff]
+
+    def bulk_write(self, ops, ordered=True):
+        self.writes += 1
+        for op in ops:
+            ids = op._filter["_id"]
+            update = getattr(op, "_doc", None)
+            for _id in ids["$in"] if isinstance(ids, dict) else [ids]:
+                if update is None:
+                    self.docs.pop(_id, None)
+                else:
+                    self.docs[_id] = dict(self.docs.get(_id, {}), **update["$set"], _id=_id)
+
+
+def saved_docs():
+    now = time.time()
+    docs = [
+        {"_id": key, "instrument_key": key, "trading_symbol": key, "mode": "ltpc",
+         "active": False, "watched": True, "updated_at": now}
+        for chain in CHAINS for key in chain
+    ]
+    docs[CHAIN // 2]["active"] = True
+    return docs
+
+
+def run_scenario(name):
+    from metrics import PROCESS_STARTED
+    from live_ltp_manager import ltp_manager
+    from subscriptions import SubscriptionStore
+    from websocket_feed import MarketFeed
+
+    stats = {"frames": 0, "keys": set(), "all_at": 0, "ready_at": 0, "ticks": 0}
+
+    async def main():
+        ltp_manager.set_loop(asyncio.get_running_loop())
+
+        if name == "after":
+            SubscriptionStore(collection=lambda: FakeCollection(saved_docs())).restore()
+
+        feed = MarketFeed(streamer_factory=lambda: FakeStreamer(ltp_manager, stats))
+        feed.fallback = lambda instrument, reason="feed_down": None
+        feed.start()
+        stats["ready_at"] = time.time()
+
+        if name == "before":
+            await asyncio.sleep(FIRST_CLIENT)
+            for chain in CHAINS:
+                ltp_manager.watch(chain)
+                if ACTIVE in chain:
+                    ltp_manager.subscribe(ACTIVE, ACTIVE)
+                await asyncio.sleep(CLIENT_GAP)
+
+        while not (stats["all_at"] and ltp_manager.first_broadcast_at):
+            await asyncio.sleep(0.001)
+        feed.pause()
+
+    asyncio.run(main())
+    print(stats["ready_at"] - PROCESS_STARTED, ltp_manager.first_broadcast_at - PROCESS_STARTED,
+          stats["all_at"] - PROCESS_STARTED, stats["frames"])
+
+
+def debounced_writes():
+    from live_ltp_manager import LiveLTPManager
+    from subscriptions import SubscriptionStore, SUBSCRIPTION_FLUSH_SECONDS
+
+    manager = LiveLTPManager()
+    collection = FakeCollection()
+    store = SubscriptionStore(manager, collection=lambda: collection)
+    manager.add_subscription_listener(store.on_change)
+
+    for chain in CHAINS:
+        for key in chain:
+            manager.watch([key])
+    time.sleep(SUBSCRIPTION_FLUSH_SECONDS)
+    while store.timer is not None or not collection.writes:
+        time.sleep(0.01)
+    return collection.writes, len(collection.docs)
+
+
+def main():
+    import logging
+    logging.disable(logging.ERROR)
+
+    print(f"{CLIENTS} browsers x {CHAIN} keys = {KEYS} keys, handshake {OPEN_DELAY * 1000:.0f} ms, "
+          f"browsers back {FIRST_CLIENT * 1000:.0f} ms after ready, {CLIENT_GAP * 1000:.0f} ms apart\n")
+    print(f"{'':<10}{'ready ms':>10}{'first tick ms':>15}{'all keys ms':>13}{'frames':>8}")
+    for name in ("before", "after"):
+        out = subprocess.run([sys.executable, __file__, name], capture_output=True, text=True, check=True, timeout=60)
+        ready, first, everything, frames = out.stdout.split()
+        print(f"{name:<10}{float(ready) * 1000:>10.0f}{float(first) * 1000:>15.0f}{float(everything) * 1000:>13.0f}{frames:>8}")
+
+    writes, docs = debounced_writes()
+    print(f"\n{KEYS} watch() calls → {writes} bulk_write(s), {docs} documents")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        import logging
+        logging.disable(logging.ERROR)
+        run_scenario(sys.argv[1])
+    else:
+        main()
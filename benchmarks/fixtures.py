@@ -0,0 +1,100 @@
+"""
+Synthetic Upstox instrument master, shaped like complete.json.gz.
+"""
+import gzip
+import json
+import random
+import time
+
+INDEXES = [
+    # name, segment, exchange, underlying_key, spot, step, lot
+    ("NIFTY", "NSE_FO", "NSE", "NSE_INDEX|Nifty 50", 24500, 50, 75),
+    ("BANKNIFTY", "NSE_FO", "NSE", "NSE_INDEX|Nifty Bank", 52000, 100, 35),
+    ("FINNIFTY", "NSE_FO", "NSE", "NSE_INDEX|Nifty Fin Service", 23500, 50, 65),
+    ("MIDCPNIFTY", "NSE_FO", "NSE", "NSE_INDEX|NIFTY MID SELECT", 12500, 25, 140),
+    ("SENSEX", "BSE_FO", "BSE", "BSE_INDEX|SENSEX", 80500, 100, 20),
+]
+
+DAY_MS = 86400 * 1000
+
+
+def _option(name, segment, exchange, underlying_key, asset_type, strike, opt, expiry, lot, token):
+    return {
+        "weekly": False,
+        "segment": segment,
+        "name": name,
+        "exchange": exchange,
+        "expiry": expiry,
+        "instrument_type": opt,
+        "asset_symbol": name,
+        "underlying_symbol": name,
+        "instrument_key": f"{segment}|{token}",
+        "lot_size": lot,
+        "freeze_quantity": lot * 24.0,
+        "exchange_token": str(token),
+        "minimum_lot": lot,
+        "asset_key": underlying_key,
+        "underlying_key": underlying_key,
+        "tick_size": 5.0,
+        "asset_type": asset_type,
+        "underlying_type": asset_type,
+        "trading_symbol": f"{name} {int(strike)} {opt} {time.strftime('%d %b %y', time.gmtime(expiry / 1000)).upper()}",
+        "strike_price": float(strike),
+        "qty_multiplier": 1.0
+    }
+
+
+def synthetic_master(stocks=220, equities=30000, seed=7):
+    """About 100k rows: index and stock options over several expiries, plus cash equities."""
+    rnd = random.Random(seed)
+    now_ms = int(time.time() * 1000)
+    expiries = [now_ms + (7 * i + 2) * DAY_MS for i in range(8)]
+    rows, token = [], 30000
+
+    for name, segment, exchange, underlying_key, spot, step, lot in INDEXES:
+        for expiry in expiries:
+            for i in range(-60, 61):
+                for opt in ("CE", "PE"):
+                    token += 1
+                    rows.append(_option(name, segment, exchange, underlying_key, "INDEX",
+                                        spot + i * step, opt, expiry, lot, token))
+
+    for n in range(stocks):
+        name = f"STOCK{n:03d}"
+        spot = rnd.randint(100, 5000)
+        step = max(spot // 50, 1)
+        underlying_key = f"NSE_EQ|INE{n:06d}01"
+        for expiry in expiries[:3]:
+            for i in range(-20, 21):
+                for opt in ("CE", "PE"):
+                    token += 1
+                    rows.append(_option(name, "NSE_FO", "NSE", underlying_key, "EQUITY",
+                                        spot + i * step, opt, expiry, rnd.choice([250, 500, 1000]), token))
+
+    for n in range(equities):
+        token += 1
+        rows.append({
+            "segment": "NSE_EQ",
+            "name": f"COMPANY {n} LTD",
+            "exchange": "NSE",
+            "isin": f"INE{n:06d}01",
+            "instrument_type": "EQ",
+            "instrument_key": f"NSE_EQ|INE{n:06d}01",
+            "lot_size": 1,
+            "freeze_quantity": 100000.0,
+            "exchange_token": str(token),
+            "tick_size": 5.0,
+            "trading_symbol": f"CMP{n}",
+            "short_name": f"Company {n}",
+            "security_type": "NORMAL"
+        })
+
+    rnd.shuffle(rows)
+    return rows
+
+
+def write_master_gz(path, rows=None):
+    rows = rows if rows is not None else synthetic_master()
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(rows, f)
+    return rows
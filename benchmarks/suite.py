@@ -0,0 +1,323 @@
+"""
+Hot-path micro-benchmark suite, runs offline.
+
+Each case reports microseconds per operation (best of several rounds)
+and is compared against benchmarks/baselines.json. A case slower than
+its baseline by more than the threshold is a regression and the run
+exits with status 1. Baselines are per machine: re-record them with
+--save on the machine that runs the comparison.
+
+    python benchmarks/suite.py                  # compare with baselines
+    python benchmarks/suite.py --save           # record new baselines
+    python benchmarks/suite.py --only gtt       # cases whose name contains "gtt"
+    python benchmarks/suite.py --threshold 0.1
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from fixtures import write_master_gz
+from bench_ltp_protocol import FakeWebSocket
+
+BASELINES_FILE = os.path.join(os.path.dirname(__file__), "baselines.json")
+DEFAULT_THRESHOLD = 0.25
+ROUNDS = 7
+
+CASES = {}
+
+
+def case(name, ops, rounds=ROUNDS):
+    """Registers fn(ops) -> elapsed seconds for `ops` operations."""
+    def register(fn):
+        CASES[name] = (fn, ops, rounds)
+        return fn
+    return register
+
+
+# -------------------------
+# INSTRUMENTS
+# -------------------------
+@case("instruments.load_and_filter", ops=1, rounds=3)
+def bench_load_and_filter(ops):
+    import instruments
+
+    with tempfile.TemporaryDirectory() as tmp:
+        gz_file = os.path.join(tmp, "complete.json.gz")
+        write_master_gz(gz_file)
+        instruments.cold_shard = instruments.ColdShard(os.path.join(tmp, "cold.json.gz"))
+        instruments.version_history.path = os.path.join(tmp, "versions")
+
+        start = time.perf_counter()
+        for _ in range(ops):
+            instruments.load_and_filter(gz_file)
+        return time.perf_counter() - start
+
+
+# -------------------------
+# FEED
+# -------------------------
+def feeds_message(n, tick):
+    return {
+        "type": "live_feed",
+        "feeds": {
+            f"NSE_FO|{65000 + i}": {"ltpc": {"ltp": 100.0 + i + tick * 0.05, "ltt": "1740000000000", "cp": 99.5}}
+            for i in range(n)
+        }
+    }
+
+
+@case("feed.on_message[50 instruments]", ops=2000)
+def bench_on_message(ops):
+    from live_ltp_manager import ltp_manager
+    from websocket_feed import MarketFeed
+
+    feed = MarketFeed()
+    ltp_manager.set_loop(None)
+    messages = [feeds_message(50, n) for n in range(ops)]
+
+    start = time.perf_counter()
+    for message in messages:
+        feed.on_message(message)
+    return time.perf_counter() - start
+
+
+# -------------------------
+# LTP MANAGER
+# -------------------------
+@case("ltp.update_ltp[1 active of 50]", ops=50000)
+def bench_update_ltp(ops):
+    from live_ltp_manager import LiveLTPManager
+
+    async def run():
+        manager = LiveLTPManager()
+        manager.set_loop(asyncio.get_running_loop())
+        manager.add_client(FakeWebSocket())
+        manager.active_instrument = "NSE_FO|65000"
+        keys = [f"NSE_FO|{65000 + i}" for i in range(50)]
+
+        start = time.perf_counter()
+        for n in range(ops):
+            manager.update_ltp(keys[n % 50], 100.0 + n * 0.05)
+        elapsed = time.perf_counter() - start
+
+        await manager.flush()
+        return elapsed
+
+    return asyncio.run(run())
+
+
+@case("ltp.broadcast[10 instruments, 50 json + 50 binary]", ops=500)
+def bench_broadcast(ops):
+    from live_ltp_manager import LiveLTPManager
+    from ltp_protocol import FORMAT_BINARY
+
+    async def run():
+        manager = LiveLTPManager()
+        for n in range(100):
+            manager.add_client(FakeWebSocket(), FORMAT_BINARY if n % 2 else None)
+        batches = [
+            {f"NSE_FO|{65000 + i}": 100.0 + i + n * 0.05 for i in range(10)}
+            for n in range(ops)
+        ]
+
+        start = time.perf_counter()
+        for batch in batches:
+            await manager.broadcast(batch)
+        return time.perf_counter() - start
+
+    return asyncio.run(run())
+
+
+# -------------------------
+# GTT (real SDK request building, fake HTTP transport)
+# -------------------------
+class FakeHTTPResponse:
+    def __init__(self, body):
+        self.status = 200
+        self.reason = "OK"
+        self.data = body
+
+    def getheaders(self):
+        return {"Content-Type": "application/json"}
+
+    def getheader(self, name, default=None):
+        return self.getheaders().get(name, default)
+
+
+class FakePoolManager:
+    """Stands in for urllib3 under upstox_client's RESTClientObject."""
+
+    def __init__(self):
+        self.requests = 0
+
+    def request(self, method, url, **kwargs):
+        self.requests += 1
+        if method == "GET":
+            body = {"status": "success", "data": [{"gtt_order_id": "GTT-C1", "type": "MULTIPLE", "rules": []}]}
+        else:
+            body = {"status": "success", "data": {"gtt_order_ids": ["GTT-C1"]}}
+        return FakeHTTPResponse(json.dumps(body).encode())
+
+
+def fake_transport():
+    from config import get_api_client, token_holder
+
+    token_holder.token = token_holder.token or "bench-token"
+    client = get_api_client()
+    client.rest_client.pool_manager = FakePoolManager()
+    return client
+
+
+def gtt_case(name, call):
+    @case(f"gtt.{name}", ops=500)
+    def bench(ops):
+        fake_transport()
+        start = time.perf_counter()
+        for _ in range(ops):
+            result = call()
+            if result["status"] != "success":
+                raise RuntimeError(result)
+        return time.perf_counter() - start
+    return bench
+
+
+def _place():
+    from utils.gtt.place_gtt_order import place_gtt_order
+    return place_gtt_order("NSE_FO|65083", 75, 38.0, 45.0, 30.0)
+
+
+def _modify():
+    from utils.gtt.modify_gtt_order import modify_gtt_order
+    return modify_gtt_order("GTT-C1", 75, entry_price=39.0, modify_entry=True)
+
+
+def _cancel():
+    from utils.gtt.cancel_gtt_order import cancel_gtt_order
+    return cancel_gtt_order("GTT-C1")
+
+
+def _details():
+    from utils.gtt.get_gtt_order_details import get_gtt_order_details
+    return get_gtt_order_details("GTT-C1")
+
+
+gtt_case("place_gtt_order", _place)
+gtt_case("modify_gtt_order", _modify)
+gtt_case("cancel_gtt_order", _cancel)
+gtt_case("get_gtt_order_details", _details)
+
+
+# -------------------------
+# ORDERS
+# -------------------------
+@case("orders.validate_order[3 prices, 1 off-tick]", ops=20000)
+def bench_validate_order(ops):
+    import instruments
+    from order_validation import validate_order
+
+    with tempfile.TemporaryDirectory() as tmp:
+        gz_file = os.path.join(tmp, "complete.json.gz")
+        write_master_gz(gz_file)
+        instruments.cold_shard = instruments.ColdShard(os.path.join(tmp, "cold.json.gz"))
+        instruments.version_history.path = os.path.join(tmp, "versions")
+        instruments.load_and_filter(gz_file)
+
+    item = next(item for item in instruments.get_snapshot().all if item.get("lot_size", 1) > 1)
+    key, lot = item["instrument_key"], item["lot_size"]
+
+    start = time.perf_counter()
+    for _ in range(ops):
+        validate_order(key, lot, {"entry_price": 38.0, "target_price": 45.03, "stoploss_price": 30.1})
+    return time.perf_counter() - start
+
+
+# -------------------------
+# RUNNER
+# -------------------------
+def run_case(name):
+    fn, ops, rounds = CASES[name]
+    fn(ops)  # warm up imports and caches
+
+    # Collector pauses are the main source of run-to-run noise
+    gc.collect()
+    gc.disable()
+    try:
+        best = min(fn(ops) for _ in range(rounds))
+    finally:
+        gc.enable()
+    return best / ops * 1e6
+
+
+def load_baselines():
+    try:
+        with open(BASELINES_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except OSError:
+        return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--save", action="store_true", help="write results as the new baselines")
+    parser.add_argument("--only", default="", help="run cases whose name contains this")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown vs baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    # Keep instrument loading / fallback chatter out of the table
+    import logging
+    logging.disable(logging.WARNING)
+
+    baselines = load_baselines()
+    results, regressions = {}, []
+
+    print(f"{'case':<52}{'us/op':>12}{'baseline':>12}{'change':>9}")
+    for name in CASES:
+        if args.only not in name:
+            continue
+
+        sys.stdout = open(os.devnull, "w")
+        try:
+            us = run_case(name)
+        finally:
+            sys.stdout.close()
+            sys.stdout = sys.__stdout__
+
+        results[name] = round(us, 3)
+        baseline = baselines.get(name)
+        if baseline:
+            change = us / baseline - 1
+            flag = "  ❌" if change > args.threshold else ""
+            if flag:
+                regressions.append(name)
+            print(f"{name:<52}{us:>12.2f}{baseline:>12.2f}{change:>+9.0%}{flag}")
+        else:
+            print(f"{name:<52}{us:>12.2f}{'-':>12}{'':>9}")
+
+    if args.save:
+        baselines.update(results)
+        with open(BASELINES_FILE, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\n💾 Baselines saved to {BASELINES_FILE}")
+        return 0
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+
+    print("\n✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
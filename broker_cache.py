@@ -0,0 +1,103 @@
+"""
+Single-flight + short-TTL cache for broker reads.
+
+Concurrent identical reads (several tabs refreshing the dashboard) share
+one upstream call, and a successful result is reused for a few seconds.
+Our own place / modify / cancel actions invalidate what they change.
+
+    BALANCE_CACHE_TTL=5     seconds, 0 disables caching (coalescing stays on)
+    GTT_CACHE_TTL=2
+"""
+import asyncio
+import os
+import time
+
+from metrics import Counter
+
+BALANCE_CACHE_TTL = float(os.getenv("BALANCE_CACHE_TTL", "5"))
+GTT_CACHE_TTL = float(os.getenv("GTT_CACHE_TTL", "2"))
+
+# result: hit (cached), joined (shared an in-flight call), upstream (called the broker)
+CACHE_LOOKUPS = Counter("broker_cache_lookups_total", "Broker read cache lookups", ["cache", "result"])
+
+
+class SingleFlightCache:
+    def __init__(self, name, ttl):
+        self.name = name
+        self.ttl = ttl
+
+        # key → (expires_at, result)
+        self.entries = {}
+
+        # key → Future shared by concurrent callers
+        self.inflight = {}
+
+        # Bumped by invalidate(); a call started before it is not cached
+        self.generation = 0
+
+    async def get(self, key, fetch, *args):
+        """
+        Returns fetch(*args) for key, run in a worker thread. Only results
+        with status "success" are cached; errors are shared but not kept.
+        """
+
+        entry = self.entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            CACHE_LOOKUPS.labels(self.name, "hit").inc()
+            return entry[1]
+
+        future = self.inflight.get(key)
+        if future is not None:
+            CACHE_LOOKUPS.labels(self.name, "joined").inc()
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # The leader was cancelled (its client went away), not us: take over
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                return await self.get(key, fetch, *args)
+
+        CACHE_LOOKUPS.labels(self.name, "upstream").inc()
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+        generation = self.generation
+
+        try:
+            result = await asyncio.to_thread(fetch, *args)
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so a call nobody joined doesn't warn
+            future.exception()
+            raise
+        else:
+            if (self.ttl > 0 and generation == self.generation
+                    and isinstance(result, dict) and result.get("status") == "success"):
+                self.entries[key] = (time.monotonic() + self.ttl, result)
+
+            future.set_result(result)
+            return result
+        finally:
+            self.inflight.pop(key, None)
+
+            # Cancelled leader (CancelledError is not an Exception): don't strand joiners
+            if not future.done():
+                future.cancel()
+
+    def invalidate(self, key=None):
+        self.generation += 1
+        if key is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(key, None)
+
+
+balance_cache = SingleFlightCache("balance", BALANCE_CACHE_TTL)
+gtt_cache = SingleFlightCache("gtt_details", GTT_CACHE_TTL)
+
+
+def invalidate_after_order(gtt_order_id=None):
+    """Orders move margins; a modify / cancel also changes that GTT's details."""
+
+    balance_cache.invalidate()
+    if gtt_order_id:
+        gtt_cache.invalidate(gtt_order_id)
@@ -0,0 +1,149 @@
+import asyncio
+import threading
+import time
+from collections import deque
+
+# Bar intervals built from live ticks (label → seconds)
+CANDLE_INTERVALS = {
+    "1m": 60,
+    "5m": 300
+}
+
+# Bars kept per instrument per interval (375 x 1m = one full NSE session)
+MAX_CANDLES = 375
+
+# Bar layout inside the ring buffers: [time, open, high, low, close, ticks]
+TIME, OPEN, HIGH, LOW, CLOSE, TICKS = range(6)
+
+
+def bar_to_dict(bar):
+    return {
+        "time": bar[TIME],
+        "open": bar[OPEN],
+        "high": bar[HIGH],
+        "low": bar[LOW],
+        "close": bar[CLOSE],
+        "ticks": bar[TICKS]
+    }
+
+
+class CandleBuilder:
+    def __init__(self, intervals=None, max_candles=MAX_CANDLES):
+        self.intervals = intervals or CANDLE_INTERVALS
+        self.max_candles = max_candles
+
+        # instrument_key → {interval_label: deque of bars}
+        self.series = {}
+        self.lock = threading.Lock()
+
+        # websocket → set of instrument keys it streams
+        self.clients = {}
+
+        # instrument_key → number of clients streaming it; read on the feed thread
+        self.watched = {}
+        self.loop = None
+
+    # -------------------------
+    # SETTERS
+    # -------------------------
+    def set_loop(self, loop):
+        self.loop = loop
+
+    # -------------------------
+    # CLIENT HANDLING
+    # -------------------------
+    def add_client(self, ws):
+        self.clients[ws] = set()
+
+    def remove_client(self, ws):
+        for instrument in self.clients.pop(ws, ()):
+            self.watched[instrument] -= 1
+            if not self.watched[instrument]:
+                del self.watched[instrument]
+
+    def watch(self, ws, instrument):
+        watched = self.clients.get(ws)
+        if watched is None or instrument in watched:
+            return
+        watched.add(instrument)
+        self.watched[instrument] = self.watched.get(instrument, 0) + 1
+
+    # -------------------------
+    # TICK → BAR (O(1) per interval)
+    # -------------------------
+    def on_tick(self, instrument, ltp, ts=None):
+        if ts is None:
+            ts = time.time()
+
+        updated = []
+
+        with self.lock:
+            series = self.series.get(instrument)
+            if series is None:
+                series = {
+                    label: deque(maxlen=self.max_candles)
+                    for label in self.intervals
+                }
+                self.series[instrument] = series
+
+            for label, seconds in self.intervals.items():
+                bucket = int(ts // seconds) * seconds
+                bars = series[label]
+
+                if bars and bars[-1][TIME] == bucket:
+                    bar = bars[-1]
+                    if ltp > bar[HIGH]:
+                        bar[HIGH] = ltp
+                    if ltp < bar[LOW]:
+                        bar[LOW] = ltp
+                    bar[CLOSE] = ltp
+                    bar[TICKS] += 1
+                else:
+                    bar = [bucket, ltp, ltp, ltp, ltp, 1]
+                    bars.append(bar)
+
+                updated.append((label, tuple(bar)))
+
+        # Only schedule onto the loop for bars someone is actually streaming
+        if self.loop and instrument in self.watched:
+            asyncio.run_coroutine_threadsafe(
+                self.broadcast(instrument, updated),
+                self.loop
+            )
+
+    # -------------------------
+    # QUERY
+    # -------------------------
+    def get_candles(self, instrument, interval="1m", limit=None):
+        with self.lock:
+            series = self.series.get(instrument)
+            if not series or interval not in series:
+                return []
+            bars = list(series[interval])
+
+        if limit:
+            bars = bars[-limit:]
+
+        return [bar_to_dict(bar) for bar in bars]
+
+    # -------------------------
+    # BROADCAST TO WS CLIENTS
+    # -------------------------
+    async def broadcast(self, instrument, updated):
+        for ws, watched in list(self.clients.items()):
+            if instrument not in watched:
+                continue
+
+            for label, bar in updated:
+                try:
+                    await ws.send_json({
+                        "instrument": instrument,
+                        "interval": label,
+                        "candle": bar_to_dict(bar)
+                    })
+                except:
+                    pass
+
+
+# Singleton
+candle_builder = CandleBuilder()
@@ -1,26 +1,100 @@
 
 import os
+import threading
+from functools import lru_cache
 from dotenv import load_dotenv
-import upstox_client
-from pymongo import MongoClient
-from token_loader import fetch_access_token_from_api
 
 load_dotenv()
 
-UPSTOX_ACCESS_TOKEN = fetch_access_token_from_api()
-configuration = upstox_client.Configuration()
-configuration.access_token = str(UPSTOX_ACCESS_TOKEN)
-api_client = upstox_client.ApiClient(configuration)
-
 MOBILE_NUM = os.getenv("MOBILE_NUM")
 SERIAL_NUM = os.getenv("SERIAL_NUM")
 MSG_API_URL = os.getenv("MSG_API_URL")
 
+MONGO_URL = os.getenv("MONGO_URL")
+
+
+# -------------------------
+# ACCESS TOKEN (single holder, rotated in place)
+# -------------------------
+class TokenHolder:
+    def __init__(self):
+        self.token = None
+        self.lock = threading.Lock()
+
+        # Called with the new token after rotate()
+        self.listeners = []
+
+    def get(self):
+        if self.token is None:
+            with self.lock:
+                if self.token is None:
+                    from token_loader import fetch_access_token_from_api
+                    self.token = fetch_access_token_from_api()
+        return self.token
+
+    def rotate(self, token):
+        with self.lock:
+            self.token = token
+
+        # Shared ApiClient reads the token from its configuration on every call
+        if get_api_client.cache_info().currsize:
+            get_api_client().configuration.access_token = str(token)
+
+        for listener in self.listeners:
+            try:
+                listener(token)
+            except Exception as e:
+                print(f"❌ Token rotation listener error: {e}")
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+
+token_holder = TokenHolder()
+
+
+def get_access_token():
+    return token_holder.get()
+
+
+# -------------------------
+# LAZY CLIENTS (built on first use, not at import)
+# -------------------------
+@lru_cache(maxsize=None)
+def get_api_client():
+    import upstox_client
+
+    configuration = upstox_client.Configuration()
+    configuration.access_token = str(get_access_token())
+    return upstox_client.ApiClient(configuration)
+
+
+@lru_cache(maxsize=None)
+def get_mongo_db():
+    from pymongo import MongoClient
+    return MongoClient(MONGO_URL)["gtt_trading"]
+
+
+def get_gtt_collection():
+    return get_mongo_db()["gtt_orders"]
 
 
-MONGO_URL = os.getenv("MONGO_URL")
-mongo_client = MongoClient(MONGO_URL)
-mongo_db = mongo_client["gtt_trading"]
-gtt_collection = mongo_db["gtt_orders"]
 # Collection for live subscribed instruments
-subscribed_collection = mongo_db["subscribed_symbols"]
\ No newline at end of file
+def get_subscribed_collection():
+    return get_mongo_db()["subscribed_symbols"]
+
+
+# Old module attributes, resolved on first access
+_LAZY_ATTRS = {
+    "UPSTOX_ACCESS_TOKEN": get_access_token,
+    "api_client": get_api_client,
+    "mongo_db": get_mongo_db,
+    "gtt_collection": get_gtt_collection,
+    "subscribed_collection": get_subscribed_collection,
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        return _LAZY_ATTRS[name]()
+    raise AttributeError(f"module 'config' has no attribute '{name}'")
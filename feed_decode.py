@@ -0,0 +1,103 @@
+"""
+Compact decode of MarketDataStreamerV3 feed entries.
+
+Each instrument in a "feeds" message arrives in the shape of its
+subscription mode:
+
+    ltpc          {"ltpc": {...}}
+    option_greeks {"firstLevelWithGreeks": {"ltpc", "firstDepth", "optionGreeks", "oi", "iv", ...}}
+    full          {"fullFeed": {"marketFF": {"ltpc", "marketLevel", "optionGreeks", "oi", "iv", ...}}}
+    full_d30      same as full with 30 depth levels
+    (indices)     {"fullFeed": {"indexFF": {"ltpc", "marketOHLC"}}}
+
+decode_feed() reads only the fields consumers use into a FeedRecord, and
+ltpc entries (the bulk of the stream) take a path that touches ltpc alone.
+"""
+
+# Ascending detail; an instrument streams in the richest mode anyone asked for
+FEED_MODES = ("ltpc", "option_greeks", "full", "full_d30")
+DEFAULT_MODE = "ltpc"
+
+
+class FeedRecord:
+    __slots__ = ("instrument", "ltp", "cp", "oi", "iv", "greeks", "bid", "ask", "depth")
+
+    def __init__(self, instrument, ltp, cp, oi=None, iv=None, greeks=None, bid=None, ask=None, depth=None):
+        self.instrument = instrument
+        self.ltp = ltp
+        self.cp = cp
+        self.oi = oi
+        self.iv = iv
+
+        # (delta, gamma, theta, vega) as sent by the exchange feed
+        self.greeks = greeks
+
+        # Top of book: (price, quantity)
+        self.bid = bid
+        self.ask = ask
+
+        # Full depth levels, untouched from the feed (full / full_d30 only)
+        self.depth = depth
+
+    @property
+    def price(self):
+        """Last traded price, falling back to the previous close."""
+        return self.ltp or self.cp
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _num(value):
+    # int64 fields come through MessageToDict as strings
+    return float(value) if value is not None else None
+
+
+def _greeks(block):
+    greeks = block.get("optionGreeks")
+    if not greeks:
+        return None
+    return (greeks.get("delta"), greeks.get("gamma"), greeks.get("theta"), greeks.get("vega"))
+
+
+def decode_feed(instrument, data):
+    """Returns a FeedRecord, or None for an entry with no price block."""
+
+    ltpc = data.get("ltpc")
+    if ltpc is not None:
+        return FeedRecord(instrument, ltpc.get("ltp"), ltpc.get("cp"))
+
+    block = data.get("firstLevelWithGreeks")
+    if block is not None:
+        ltpc = block.get("ltpc") or {}
+        top = block.get("firstDepth")
+        return FeedRecord(
+            instrument, ltpc.get("ltp"), ltpc.get("cp"),
+            oi=_num(block.get("oi")), iv=block.get("iv"), greeks=_greeks(block),
+            bid=(top.get("bidP"), _num(top.get("bidQ"))) if top else None,
+            ask=(top.get("askP"), _num(top.get("askQ"))) if top else None
+        )
+
+    full = data.get("fullFeed")
+    if full is None:
+        return None
+
+    block = full.get("marketFF")
+    if block is None:
+        ltpc = (full.get("indexFF") or {}).get("ltpc") or {}
+        return FeedRecord(instrument, ltpc.get("ltp"), ltpc.get("cp"))
+
+    ltpc = block.get("ltpc") or {}
+    levels = (block.get("marketLevel") or {}).get("bidAskQuote") or None
+    top = levels[0] if levels else None
+    return FeedRecord(
+        instrument, ltpc.get("ltp"), ltpc.get("cp"),
+        oi=_num(block.get("oi")), iv=block.get("iv"), greeks=_greeks(block),
+        bid=(top.get("bidP"), _num(top.get("bidQ"))) if top else None,
+        ask=(top.get("askP"), _num(top.get("askQ"))) if top else None,
+        depth=levels
+    )
+
+
+def richest_mode(modes):
+    return max(modes, key=FEED_MODES.index, default=DEFAULT_MODE)
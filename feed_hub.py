@@ -0,0 +1,325 @@
+"""
+Single-feed, multi-worker mode.
+
+One hub process owns the Upstox MarketDataStreamerV3 connection and
+publishes ticks over a Unix socket; every uvicorn worker connects to it
+and fans out to its own websocket clients.
+
+    FEED_MODE=hub python feed_hub.py
+    FEED_MODE=worker python -m uvicorn app:app --workers 4
+
+Wire format is newline-delimited JSON in both directions:
+    worker → hub : {"op": "subscribe" | "unsubscribe" | "mode", "keys": [...], "mode": "ltpc"}
+    hub → worker : [[instrument_key, ltp, source], ...]
+                   {"records": [FeedRecord.as_dict(), ...]}   keys the worker wants beyond ltpc
+"""
+import asyncio
+import json
+import os
+import threading
+
+from feed_decode import DEFAULT_MODE, FeedRecord
+from live_ltp_manager import ltp_manager
+
+# local  : this process owns the Upstox feed (default, single worker)
+# hub    : standalone feed owner publishing on FEED_SOCKET_PATH
+# worker : uvicorn worker fed by the hub
+FEED_MODE = os.getenv("FEED_MODE", "local")
+FEED_SOCKET_PATH = os.getenv("FEED_SOCKET_PATH", "/tmp/upstox_feed.sock")
+
+# Subscribe requests can carry a whole option chain
+LINE_LIMIT = 4 * 1024 * 1024
+
+
+# -------------------------
+# HUB (feed owner)
+# -------------------------
+class HubConnection:
+    def __init__(self, writer):
+        self.writer = writer
+        self.keys = set()
+
+        # key → feed mode this worker asked for (absent = ltpc)
+        self.modes = {}
+
+        # Conflated per worker: a slow worker gets the latest price, not a backlog
+        self.pending = {}
+        self.records = {}
+        self.ready = asyncio.Event()
+
+    def push(self, instrument, ltp, source):
+        self.pending[instrument] = (ltp, source)
+        self.ready.set()
+
+    def push_record(self, record):
+        self.records[record.instrument] = record
+        self.ready.set()
+
+    async def pump(self):
+        while True:
+            await self.ready.wait()
+            self.ready.clear()
+
+            batch, self.pending = self.pending, {}
+            records, self.records = self.records, {}
+            if batch:
+                line = json.dumps([[k, v[0], v[1]] for k, v in batch.items()])
+                self.writer.write(line.encode() + b"\n")
+            if records:
+                line = json.dumps({"records": [record.as_dict() for record in records.values()]})
+                self.writer.write(line.encode() + b"\n")
+            await self.writer.drain()
+
+
+class FeedHub:
+    def __init__(self, path=FEED_SOCKET_PATH, manager=ltp_manager):
+        self.path = path
+        self.manager = manager
+        self.loop = None
+        self.connections = set()
+
+        # instrument → number of workers that want it
+        self.refs = {}
+
+    # Tick listener on the hub's LiveLTPManager (feed thread)
+    def on_tick(self, instrument, ltp):
+        value = self.manager.last_values.get(instrument)
+        self.publish(instrument, ltp, value[1] if value else "upstox")
+
+    def publish(self, instrument, ltp, source="upstox"):
+        if self.loop:
+            self.loop.call_soon_threadsafe(self._fan_out, instrument, ltp, source)
+
+    def _fan_out(self, instrument, ltp, source):
+        for conn in self.connections:
+            if instrument in conn.keys:
+                conn.push(instrument, ltp, source)
+
+    # Record listener on MarketFeed (feed thread): oi, greeks and depth for rich modes
+    def on_record(self, record):
+        if self.loop:
+            self.loop.call_soon_threadsafe(self._fan_out_record, record)
+
+    def _fan_out_record(self, record):
+        for conn in self.connections:
+            if record.instrument in conn.modes:
+                conn.push_record(record)
+
+    def add_keys(self, conn, keys, mode=None):
+        new = []
+        for key in keys:
+            if key in conn.keys:
+                continue
+            conn.keys.add(key)
+            self.refs[key] = self.refs.get(key, 0) + 1
+            if self.refs[key] == 1:
+                new.append(key)
+
+        # Before watching, so new keys are subscribed in the richest mode straight away
+        if mode:
+            self.set_modes(conn, keys, mode)
+        if new:
+            self.manager.watch(new, owner="hub")
+
+        # Workers get the last known price straight away
+        for key in keys:
+            value = self.manager.last_values.get(key)
+            if value:
+                conn.push(key, value[0], value[1])
+
+    def set_modes(self, conn, keys, mode):
+        # Per worker, so one worker downgrading (even to ltpc) only drops its own request
+        requested, released = [], {}
+        for key in keys:
+            if key not in conn.keys:
+                continue
+            previous = conn.modes.get(key, DEFAULT_MODE)
+            if previous == mode:
+                continue
+
+            if previous != DEFAULT_MODE:
+                released.setdefault(previous, []).append(key)
+            if mode != DEFAULT_MODE:
+                requested.append(key)
+                conn.modes[key] = mode
+            else:
+                del conn.modes[key]
+
+        # Request first, so a swap between rich modes doesn't dip to ltpc in between
+        if requested:
+            self.manager.request_mode(requested, mode)
+        for previous, released_keys in released.items():
+            self.manager.release_mode(released_keys, previous)
+
+    def remove_keys(self, conn, keys):
+        self.set_modes(conn, keys, DEFAULT_MODE)
+
+        gone = []
+        for key in keys:
+            if key not in conn.keys:
+                continue
+            conn.keys.discard(key)
+            self.refs[key] -= 1
+            if self.refs[key] == 0:
+                del self.refs[key]
+                gone.append(key)
+
+        if gone:
+            self.manager.unwatch(gone, owner="hub")
+
+    async def handle(self, reader, writer):
+        conn = HubConnection(writer)
+        self.connections.add(conn)
+        pump = asyncio.create_task(conn.pump())
+        print(f"🔗 Feed hub: worker connected ({len(self.connections)} total)")
+
+        try:
+            async for line in reader:
+                msg = json.loads(line)
+                if msg.get("op") == "subscribe":
+                    self.add_keys(conn, msg.get("keys", []), msg.get("mode"))
+                elif msg.get("op") == "mode":
+                    self.set_modes(conn, msg.get("keys", []), msg.get("mode") or DEFAULT_MODE)
+                elif msg.get("op") == "unsubscribe":
+                    self.remove_keys(conn, msg.get("keys", []))
+        except Exception as e:
+            print(f"❌ Feed hub worker error: {e}")
+        finally:
+            pump.cancel()
+            self.connections.discard(conn)
+            self.remove_keys(conn, list(conn.keys))
+            writer.close()
+            print(f"🔌 Feed hub: worker disconnected ({len(self.connections)} left)")
+
+    async def serve(self, start_feed=None):
+        self.loop = asyncio.get_running_loop()
+
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+        server = await asyncio.start_unix_server(self.handle, path=self.path, limit=LINE_LIMIT)
+        print(f"🚀 Feed hub listening on {self.path}")
+
+        if start_feed:
+            threading.Thread(target=start_feed, daemon=True).start()
+
+        async with server:
+            await server.serve_forever()
+
+
+# -------------------------
+# WORKER (hub subscriber, stands in for the streamer)
+# -------------------------
+class FeedHubClient:
+    def __init__(self, path=FEED_SOCKET_PATH, manager=ltp_manager):
+        self.path = path
+        self.manager = manager
+        self.writer = None
+        self.connected = False
+
+        # Same role as MarketFeed's: decoded records for keys streamed beyond ltpc
+        self.record_listeners = []
+
+    def add_record_listener(self, listener):
+        self.record_listeners.append(listener)
+
+    def on_record(self, fields):
+        record = FeedRecord(**fields)
+
+        # JSON turned the tuples into lists
+        for name in ("greeks", "bid", "ask"):
+            value = getattr(record, name)
+            if value is not None:
+                setattr(record, name, tuple(value))
+
+        for listener in self.record_listeners:
+            try:
+                listener(record)
+            except Exception as e:
+                print(f"❌ Record listener error: {e}")
+
+    # Streamer interface used by LiveLTPManager
+    def subscribe(self, keys, mode="ltpc"):
+        self._send({"op": "subscribe", "keys": list(keys), "mode": mode})
+
+    def unsubscribe(self, keys):
+        self._send({"op": "unsubscribe", "keys": list(keys)})
+
+    def change_mode(self, keys, mode):
+        self._send({"op": "mode", "keys": list(keys), "mode": mode})
+
+    def _send(self, msg):
+        if not self.connected:
+            raise Exception("Feed hub is not connected.")
+        self.writer.write(json.dumps(msg).encode() + b"\n")
+
+    async def run(self, retry_seconds=1.0):
+        self.manager.set_streamer(self)
+
+        while True:
+            try:
+                reader, self.writer = await asyncio.open_unix_connection(self.path, limit=LINE_LIMIT)
+                self.connected = True
+                print(f"✅ Connected to feed hub at {self.path}")
+
+                self.manager.resubscribe_all()
+
+                async for line in reader:
+                    msg = json.loads(line)
+                    if isinstance(msg, dict):
+                        for fields in msg.get("records", []):
+                            self.on_record(fields)
+                        continue
+
+                    for instrument, ltp, source in msg:
+                        self.manager.update_ltp(instrument, ltp, source)
+
+            except Exception as e:
+                print(f"❌ Feed hub connection error: {e}")
+
+            self.connected = False
+            await asyncio.sleep(retry_seconds)
+
+
+# Singleton (worker side)
+hub_client = FeedHubClient()
+
+
+def main():
+    from logging_setup import setup_logging
+    from websocket_feed import market_feed
+    from ltp_shm import LTP_SHM_ENABLED, LtpTableWriter
+
+    setup_logging()
+
+    # Saved subscriptions go in before workers reconnect; the feed's open replays them in bulk
+    from subscriptions import subscription_store
+    try:
+        subscription_store.restore()
+    except Exception as e:
+        print(f"⚠️ Subscriptions not restored: {e!r}")
+    ltp_manager.add_subscription_listener(subscription_store.on_change)
+
+    hub = FeedHub()
+    ltp_manager.add_tick_listener(hub.on_tick)
+    market_feed.add_record_listener(hub.on_record)
+
+    if LTP_SHM_ENABLED:
+        from instruments import bootstrap_instruments, get_snapshot
+
+        bootstrap_instruments()
+        shm_table = LtpTableWriter(get_snapshot().id_by_key, ltp_manager)
+        ltp_manager.add_tick_listener(shm_table.on_tick)
+
+    async def serve():
+        asyncio.create_task(subscription_store.release_restored_after())
+        try:
+            await hub.serve(start_feed=market_feed.start)
+        finally:
+            subscription_store.flush()
+
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
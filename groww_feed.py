@@ -1,5 +1,10 @@
+import logging
 from utils.get_index_id import search_groww_option
 from utils.latest_candle import get_latest_option_candle
+from metrics import FALLBACK_SECONDS
+import time
+
+log = logging.getLogger("groww_feed")
 
 
 def start_alternative_feed(trading_symbol):
@@ -8,32 +13,39 @@ def start_alternative_feed(trading_symbol):
     NIFTY26JAN26300CE
     """
 
+    start = time.perf_counter()
+    price = _fetch_alternative_price(trading_symbol)
+    FALLBACK_SECONDS.labels("hit" if price else "miss").observe(time.perf_counter() - start)
+    return price
+
+
+def _fetch_alternative_price(trading_symbol):
     try:
-        print(f"🔁 Switching to Groww fallback feed for {trading_symbol}")
+        log.info("🔁 Switching to Groww fallback feed for %s", trading_symbol)
 
         # Search Groww option
         possible_options = search_groww_option(trading_symbol)
 
         if not possible_options:
-            print("❌ Groww: No matching option found")
+            log.warning("❌ Groww: No matching option found for %s", trading_symbol)
             return None
 
         option_id = possible_options[0].get("id")
 
         if not option_id:
-            print("❌ Groww: Option ID not found")
+            log.warning("❌ Groww: Option ID not found for %s", trading_symbol)
             return None
 
         # Fetch latest candle
         candle = get_latest_option_candle(option_id)
-        print(candle)
+        log.debug("Groww candle: %s", candle)
         if candle:
-            print(f"📊 Groww Fallback Price: {option_id} @ {candle['price']}")
+            log.info("📊 Groww Fallback Price: %s @ %s", option_id, candle["price"])
             return candle["price"]
 
-        print("❌ Groww: Candle data not available")
+        log.warning("❌ Groww: Candle data not available for %s", trading_symbol)
 
     except Exception as e:
-        print(f"❌ Groww fallback error: {e}")
+        log.error("❌ Groww fallback error: %s", e)
 
     return None
@@ -1,10 +1,14 @@
 import os
 import json
 import gzip
-import shutil
+import hashlib
+import threading
+import time
 import requests
 from datetime import datetime
 
+from metrics import INSTRUMENT_STAGE_SECONDS
+
 BASE_DATA_DIR = "data"
 
 INSTRUMENT_URL = "https://assets.upstox.com/market-quote/instruments/exchange/complete.json.gz"
@@ -12,16 +16,47 @@ INSTRUMENT_URL = "https://assets.upstox.com/market-quote/instruments/exchange/co
 # 🔁 Overwrite control flag
 OVERWRITE_TODAY_FILES = False   # set True to force re-download
  
-# Global caches
-FILTERED_INSTRUMENTS = {
-    "nifty": [],
-    "banknifty": [],
-    "sensex": []
+
+def _env_list(name, default):
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return [v.strip().upper() for v in value.split(",") if v.strip()]
+
+
+# What load_and_filter() keeps, one group per underlying. An empty list
+# means "any", so INSTRUMENT_UNDERLYINGS= with INSTRUMENT_ASSET_TYPES=EQUITY
+# keeps every stock option, grouped by stock.
+INSTRUMENT_FILTER = {
+    "segments": _env_list("INSTRUMENT_SEGMENTS", ["NSE_FO", "BSE_FO"]),
+    "underlyings": _env_list("INSTRUMENT_UNDERLYINGS", ["NIFTY", "BANKNIFTY", "SENSEX"]),
+    "instrument_types": _env_list("INSTRUMENT_TYPES", []),
+    "asset_types": _env_list("INSTRUMENT_ASSET_TYPES", []),
 }
 
-ALL_INSTRUMENTS = []
-INSTRUMENT_BY_KEY = {}
-INSTRUMENT_BY_SYMBOL = {}
+# Groups that always exist, even when empty
+INSTRUMENT_GROUPS = [name.lower() for name in INSTRUMENT_FILTER["underlyings"]]
+
+# Set once the first snapshot is loaded (startup loads it in the background)
+INSTRUMENTS_READY = threading.Event()
+
+# Serialises reloads; readers never take it
+_reload_lock = threading.Lock()
+
+# Serialises bootstrap / refresh end to end: they share the .part file and the master on disk
+_download_lock = threading.Lock()
+
+# Hot-set policy: contracts outside it go to the cold shard on disk
+#   HOT_EXPIRIES      keep the next N expiries per underlying (0 = all)
+#   HOT_STRIKE_PCT    keep options with strikes within X% of spot (0 = all)
+#   HOT_UNDERLYINGS   comma separated groups to keep hot (empty = all)
+HOT_EXPIRIES = int(os.getenv("HOT_EXPIRIES", "0"))
+HOT_STRIKE_PCT = float(os.getenv("HOT_STRIKE_PCT", "0"))
+HOT_UNDERLYINGS = [
+    name.strip().lower()
+    for name in os.getenv("HOT_UNDERLYINGS", "").split(",")
+    if name.strip()
+]
 
 
 def get_today_dir():
@@ -29,151 +64,646 @@ def get_today_dir():
     return os.path.join(BASE_DATA_DIR, today)
 
 
-def get_file_paths():
-    today_dir = get_today_dir()
-    gz_file = os.path.join(today_dir, "complete.json.gz")
-    json_file = os.path.join(today_dir, "complete.json")
-    return today_dir, gz_file, json_file
+# Cached master, revalidated with ETag / Last-Modified instead of per-day copies
+MASTER_FILE = "complete.json.gz"
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
 
 
-def download_and_extract(overwrite=False):
-    today_dir, gz_file, json_file = get_file_paths()
+def get_master_paths(data_dir=BASE_DATA_DIR):
+    gz_file = os.path.join(data_dir, MASTER_FILE)
+    return gz_file, gz_file + ".part", gz_file + ".meta.json"
 
-    os.makedirs(today_dir, exist_ok=True)
 
-    # ---------- DOWNLOAD ----------
-    if overwrite or not os.path.exists(gz_file):
-        print(f"⬇ Downloading instruments file for {today_dir} ...")
+def _read_meta(meta_file):
+    try:
+        with open(meta_file, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
 
-        r = requests.get(INSTRUMENT_URL, stream=True, timeout=30)
-        r.raise_for_status()
 
-        with open(gz_file, "wb") as f:
-            for chunk in r.iter_content(chunk_size=8192):
-                f.write(chunk)
-    else:
-        print(f"✅ Instruments file already exists for today: {gz_file}")
+def _write_meta(meta_file, meta):
+    tmp = meta_file + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp, meta_file)
 
-    # ---------- EXTRACT ----------
-    if overwrite or not os.path.exists(json_file):
-        print("📦 Extracting complete.json...")
 
-        with gzip.open(gz_file, "rb") as f_in:
-            with open(json_file, "wb") as f_out:
-                shutil.copyfileobj(f_in, f_out)
-    else:
-        print("✅ Extracted JSON already exists")
+def download_master(overwrite=False, url=INSTRUMENT_URL, data_dir=BASE_DATA_DIR):
+    """
+    Fetches complete.json.gz only when it changed upstream, resuming a
+    partial download when the server supports ranges. The file is written
+    to a .part file and renamed into place once complete.
 
+    Returns {"status": ..., "bytes": bytes received, "seconds": wall time}
+    """
 
-def load_and_filter():
-    print("📊 Loading instruments data...")
+    os.makedirs(data_dir, exist_ok=True)
+    gz_file, part_file, meta_file = get_master_paths(data_dir)
+    meta = {} if overwrite else _read_meta(meta_file)
+    start = time.perf_counter()
 
-    _, _, json_file = get_file_paths()
+    def result(status, received=0):
+        return {"status": status, "bytes": received, "seconds": time.perf_counter() - start}
 
-    with open(json_file, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    headers = {}
+    if not overwrite and os.path.exists(gz_file):
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
 
-    nifty = []
-    banknifty = []
-    sensex = []
+    offset = 0
+    partial = meta.get("partial") or {}
+    if not overwrite and os.path.exists(part_file) and partial.get("validator"):
+        offset = os.path.getsize(part_file)
+        headers["Range"] = f"bytes={offset}-"
+        headers["If-Range"] = partial["validator"]
 
-    by_key = {}
-    by_symbol = {}
+    try:
+        with requests.get(url, headers=headers, stream=True, timeout=30) as r:
+            if r.status_code == 304:
+                print("✅ Instruments file not modified upstream")
+                return result("not_modified")
 
-    for item in data:
-        name = item.get("name", "").upper()
-        segment = item.get("segment", "")
-        inst_type = item.get("instrument_type")
-        asset_type = item.get("asset_type")
-        underlying_type = item.get("underlying_type")
-
-        # ✅ Strict Index Options Filter
-        if (
-            segment in ["NSE_FO", "BSE_FO"]
-            # and inst_type in ["CE", "PE"]
-            # and asset_type == "INDEX"
-            # and underlying_type == "INDEX"
-        ):
-
-            if name == "NIFTY":
-                nifty.append(item)
-            elif name == "BANKNIFTY":
-                banknifty.append(item)
-            elif name == "SENSEX":
-                sensex.append(item)
-            else:
-                continue   # ❌ Skip stock options
+            if r.status_code == 416:
+                # Stale partial file; start over
+                os.remove(part_file)
+                return download_master(overwrite=True, url=url, data_dir=data_dir)
 
-            key = item.get("instrument_key")
-            symbol = item.get("trading_symbol")
+            r.raise_for_status()
+            resumed = r.status_code == 206
+            etag = r.headers.get("ETag")
+            last_modified = r.headers.get("Last-Modified")
+
+            # Remember what the partial file belongs to, so an interrupted
+            # download can resume with If-Range
+            meta["partial"] = {"validator": etag or last_modified}
+            _write_meta(meta_file, meta)
+
+            if resumed:
+                print(f"⬇ Resuming instruments download at {offset} bytes ...")
+            else:
+                print("⬇ Downloading instruments file ...")
+
+            received = 0
+            with open(part_file, "ab" if resumed else "wb") as f:
+                for chunk in r.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+                    received += len(chunk)
+
+    except requests.RequestException as e:
+        if os.path.exists(gz_file):
+            print(f"⚠️ Instruments download failed ({e}), using cached file")
+            return result("cached")
+        raise
+
+    os.replace(part_file, gz_file)
+    _write_meta(meta_file, {
+        "etag": etag,
+        "last_modified": last_modified,
+        "fetched_at": datetime.now().isoformat()
+    })
+
+    return result("resumed" if resumed else "downloaded", received)
+
+
+# -------------------------
+# SNAPSHOT (one immutable version of the tables)
+# -------------------------
+def _row_hash(item):
+    digest = hashlib.blake2b(
+        json.dumps(item, sort_keys=True).encode("utf-8"), digest_size=8
+    ).digest()
+    return int.from_bytes(digest, "big")
+
+
+class InstrumentSnapshot:
+    """
+    All instrument tables for one version of the master. A reload builds a
+    new snapshot and swaps it in with a single assignment, so a reader that
+    took get_snapshot() never sees a half-built table.
+    """
+
+    def __init__(self, filtered, by_key, by_symbol, group_of, id_by_key, next_id, row_hashes, checksum):
+        self.filtered = filtered
+        self.all = [item for name in filtered for item in filtered[name]]
+        self.by_key = by_key
+        self.by_symbol = by_symbol
+        self.group_of = group_of
+
+        # Small integer id per instrument_key, stable across delta refreshes
+        self.id_by_key = id_by_key
+        self.next_id = next_id
+
+        # XOR of per-row hashes: content version, updated per changed row
+        self.row_hashes = row_hashes
+        self.checksum = checksum
+        self.version = f"{checksum:016x}"
+
+    @classmethod
+    def build(cls, groups):
+        by_key, by_symbol, group_of, id_by_key, row_hashes = {}, {}, {}, {}, {}
+        checksum = 0
+
+        for name, rows in groups.items():
+            for item in rows:
+                key = item.get("instrument_key")
+                symbol = item.get("trading_symbol")
+
+                if key:
+                    by_key[key] = item
+                    group_of[key] = name
+                    id_by_key[key] = len(id_by_key) + 1
+                    row_hashes[key] = _row_hash(item)
+                    checksum ^= row_hashes[key]
+
+                if symbol:
+                    by_symbol[symbol.upper()] = item
+
+        return cls(groups, by_key, by_symbol, group_of, id_by_key,
+                   len(id_by_key) + 1, row_hashes, checksum)
+
+    def apply_delta(self, groups):
+        """
+        Returns (new_snapshot, diff). Only added/removed/changed rows touch
+        the indexes; untouched groups keep their existing lists.
+        """
+
+        new_by_key, new_group_of = {}, {}
+        for name, rows in groups.items():
+            for item in rows:
+                key = item.get("instrument_key")
+                if key:
+                    new_by_key[key] = item
+                    new_group_of[key] = name
+
+        old_by_key = self.by_key
+        added = [k for k in new_by_key if k not in old_by_key]
+        removed = [k for k in old_by_key if k not in new_by_key]
+        changed = [k for k in new_by_key if k in old_by_key and new_by_key[k] != old_by_key[k]]
+
+        diff = {"added": added, "removed": removed, "changed": changed}
+        if not (added or removed or changed):
+            return self, diff
+
+        by_key = dict(old_by_key)
+        by_symbol = dict(self.by_symbol)
+        group_of = dict(self.group_of)
+        id_by_key = dict(self.id_by_key)
+        row_hashes = dict(self.row_hashes)
+        checksum = self.checksum
+        next_id = self.next_id
+        touched = set()
+
+        for key in removed + changed:
+            old = old_by_key[key]
+            symbol = old.get("trading_symbol")
+            if symbol:
+                by_symbol.pop(symbol.upper(), None)
+            touched.add(group_of[key])
+            checksum ^= row_hashes.pop(key)
 
-            if key:
-                by_key[key] = item
+        for key in removed:
+            del by_key[key]
+            del group_of[key]
+            del id_by_key[key]
 
+        for key in added + changed:
+            item = new_by_key[key]
+            symbol = item.get("trading_symbol")
+            by_key[key] = item
+            group_of[key] = new_group_of[key]
+            touched.add(new_group_of[key])
             if symbol:
                 by_symbol[symbol.upper()] = item
 
-    # Store filtered groups
-    FILTERED_INSTRUMENTS["nifty"] = nifty
-    FILTERED_INSTRUMENTS["banknifty"] = banknifty
-    FILTERED_INSTRUMENTS["sensex"] = sensex
+            row_hashes[key] = _row_hash(item)
+            checksum ^= row_hashes[key]
+
+        for key in added:
+            id_by_key[key] = next_id
+            next_id += 1
+
+        filtered = {
+            name: rows if name in touched else self.filtered.get(name, rows)
+            for name, rows in groups.items()
+        }
+
+        snapshot = InstrumentSnapshot(filtered, by_key, by_symbol, group_of,
+                                      id_by_key, next_id, row_hashes, checksum)
+        return snapshot, diff
+
+
+_snapshot = InstrumentSnapshot.build({name: [] for name in INSTRUMENT_GROUPS})
+
+
+def get_snapshot():
+    return _snapshot
+
+
+# -------------------------
+# LOAD / REFRESH
+# -------------------------
+def compile_filter(spec):
+    """
+    Turns a filter spec into (segments, checks, group_of):
+    a segment set tested first since it rejects most of the master, the
+    remaining (field, allowed) set lookups, and name → group resolution.
+    """
+
+    segments = frozenset(spec.get("segments") or [])
+    checks = tuple(
+        (field, frozenset(spec[name]))
+        for field, name in (("instrument_type", "instrument_types"),
+                            ("asset_type", "asset_types"))
+        if spec.get(name)
+    )
+
+    # Name → group, filled in as new spellings / underlyings show up
+    groups = {name.upper(): name.lower() for name in spec.get("underlyings") or []}
+    any_underlying = not groups
+    unknown = set()
+
+    def group_of(name):
+        group = groups.get(name)
+        if group is None and name not in unknown:
+            upper = name.upper()
+            group = groups.get(upper)
+            if group is None and any_underlying and upper:
+                group = upper.lower()
+            if group is None:
+                unknown.add(name)
+            else:
+                groups[name] = group
+        return group
 
-    # Combine only index options into ALL_INSTRUMENTS
-    ALL_INSTRUMENTS.clear()
-    ALL_INSTRUMENTS.extend(nifty)
-    ALL_INSTRUMENTS.extend(banknifty)
-    ALL_INSTRUMENTS.extend(sensex)
+    return segments, checks, group_of
 
-    INSTRUMENT_BY_KEY.clear()
-    INSTRUMENT_BY_KEY.update(by_key)
 
-    INSTRUMENT_BY_SYMBOL.clear()
-    INSTRUMENT_BY_SYMBOL.update(by_symbol)
+def filter_master(data, spec=None):
+    spec = spec or INSTRUMENT_FILTER
+    segments, checks, group_of = compile_filter(spec)
+    groups = {name.lower(): [] for name in spec.get("underlyings") or []}
 
-    print(f"✅ NIFTY Options     : {len(nifty)}")
-    print(f"✅ BANKNIFTY Options : {len(banknifty)}")
-    print(f"✅ SENSEX Options    : {len(sensex)}")
-    print(f"✅ TOTAL INDEX OPTS : {len(ALL_INSTRUMENTS)}")
+    for item in data:
+        if segments and item.get("segment") not in segments:
+            continue
+        for field, allowed in checks:
+            if item.get(field) not in allowed:
+                break
+        else:
+            group = group_of(item.get("name") or "")
+            if group is not None:
+                rows = groups.get(group)
+                if rows is None:
+                    rows = groups[group] = []
+                rows.append(item)
+
+    return groups
+
+
+# -------------------------
+# HOT / COLD SPLIT
+# -------------------------
+class PrunePolicy:
+    def __init__(self, expiries=HOT_EXPIRIES, strike_pct=HOT_STRIKE_PCT, underlyings=HOT_UNDERLYINGS):
+        self.expiries = expiries
+        self.strike_pct = strike_pct
+        self.underlyings = set(underlyings)
+
+    @property
+    def active(self):
+        return bool(self.expiries or self.strike_pct or self.underlyings)
+
+    def split(self, groups, spot_of=None, now_ms=None):
+        """Returns (hot_groups, cold_groups) with the same group names."""
+
+        now_ms = now_ms if now_ms is not None else time.time() * 1000
+        hot, cold = {}, {}
 
+        for name, rows in groups.items():
+            if self.underlyings and name not in self.underlyings:
+                hot[name], cold[name] = [], rows
+                continue
 
-def save_filtered_files():
-    today_dir, _, _ = get_file_paths()
+            # Next N expiries still trading for this underlying
+            live = sorted({item["expiry"] for item in rows if item.get("expiry", 0) >= now_ms})
+            keep_expiries = set(live[:self.expiries]) if self.expiries else None
 
-    with open(os.path.join(today_dir, "nifty_options.json"), "w", encoding="utf-8") as f:
-        json.dump(FILTERED_INSTRUMENTS["nifty"], f, indent=2)
+            hot_rows, cold_rows = [], []
+            for item in rows:
+                expiry = item.get("expiry", 0)
+                keep = expiry >= now_ms if expiry else True
 
-    with open(os.path.join(today_dir, "banknifty_options.json"), "w", encoding="utf-8") as f:
-        json.dump(FILTERED_INSTRUMENTS["banknifty"], f, indent=2)
+                if keep and keep_expiries is not None and expiry:
+                    keep = expiry in keep_expiries
 
-    with open(os.path.join(today_dir, "sensex_options.json"), "w", encoding="utf-8") as f:
-        json.dump(FILTERED_INSTRUMENTS["sensex"], f, indent=2)
+                if keep and self.strike_pct and item.get("strike_price"):
+                    spot = spot_of(item.get("underlying_key")) if spot_of else None
+                    if spot:
+                        keep = abs(item["strike_price"] - spot) <= spot * self.strike_pct / 100.0
 
-    with open(os.path.join(today_dir, "all_index_options.json"), "w", encoding="utf-8") as f:
-        json.dump(ALL_INSTRUMENTS, f, indent=2)
+                (hot_rows if keep else cold_rows).append(item)
 
-    print("💾 Filtered index option files saved")
+            hot[name], cold[name] = hot_rows, cold_rows
 
+        return hot, cold
 
-def cleanup_raw_files():
-    today_dir, gz_file, json_file = get_file_paths()
 
-    if os.path.exists(gz_file):
-        os.remove(gz_file)
-        print("🗑 Removed complete.json.gz")
+prune_policy = PrunePolicy()
+
+# underlying_key → spot, used by the strike window (set by the app at startup)
+_spot_source = None
+
+
+def set_spot_source(spot_of):
+    global _spot_source
+    _spot_source = spot_of
+
+
+class ColdShard:
+    """
+    Contracts outside the hot set, kept on disk and only parsed the first
+    time a far contract is looked up.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(BASE_DATA_DIR, "cold_instruments.json.gz")
+        self.lock = threading.Lock()
+        self.groups = None
+        self.by_key = None
+        self.by_symbol = None
+
+    def write(self, groups):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump(groups, f)
+
+        with self.lock:
+            os.replace(tmp, self.path)
+            self.groups = self.by_key = self.by_symbol = None
+
+        print(f"🧊 Cold shard: {sum(len(rows) for rows in groups.values())} contracts")
+
+    def _load(self):
+        with self.lock:
+            if self.groups is None:
+                try:
+                    with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                        groups = json.load(f)
+                except OSError:
+                    groups = {}
+
+                self.by_key, self.by_symbol = {}, {}
+                for rows in groups.values():
+                    for item in rows:
+                        if item.get("instrument_key"):
+                            self.by_key[item["instrument_key"]] = item
+                        if item.get("trading_symbol"):
+                            self.by_symbol[item["trading_symbol"].upper()] = item
+                self.groups = groups
+        return self
+
+    def get(self, instrument_key):
+        return self._load().by_key.get(instrument_key)
+
+    def get_by_symbol(self, symbol):
+        return self._load().by_symbol.get(symbol.upper())
+
+    def rows(self, name):
+        return self._load().groups.get(name, [])
+
+    def unload(self):
+        with self.lock:
+            self.groups = self.by_key = self.by_symbol = None
+
+
+cold_shard = ColdShard()
+
+
+# -------------------------
+# VERSION HISTORY (browser cache delta sync)
+# -------------------------
+SYNC_HISTORY = int(os.getenv("INSTRUMENT_SYNC_HISTORY", "7"))
+
+
+class VersionHistory:
+    """
+    Row hashes (instrument_key → hash) of the last few snapshot versions,
+    so a browser holding an older version gets only what changed since.
+    """
+
+    def __init__(self, path=None, keep=SYNC_HISTORY):
+        self.path = path or os.path.join(BASE_DATA_DIR, "instrument_versions")
+        self.keep = keep
+        self.lock = threading.Lock()
+
+        # version → row hashes, read from disk on demand
+        self.manifests = {}
+
+        # (old version, new version) → (upsert keys, remove keys)
+        self.diffs = {}
 
-    if os.path.exists(json_file):
-        # keep file but reformat JSON
-        with open(json_file, encoding='utf-8') as f:
+    def _file(self, version):
+        return os.path.join(self.path, f"{version}.json.gz")
+
+    def record(self, snapshot):
+        version = snapshot.version
+        with self.lock:
+            self.manifests[version] = snapshot.row_hashes
+            self.diffs.clear()
+
+        os.makedirs(self.path, exist_ok=True)
+        path = self._file(version)
+        if os.path.exists(path):
+            # Seen before (e.g. restart): just mark it recent
+            os.utime(path)
+        else:
+            tmp = path + ".tmp"
+            with gzip.open(tmp, "wt", encoding="utf-8") as f:
+                json.dump(snapshot.row_hashes, f)
+            os.replace(tmp, path)
+
+        self._prune()
+
+    def _prune(self):
+        files = sorted(
+            (os.path.join(self.path, name) for name in os.listdir(self.path) if name.endswith(".json.gz")),
+            key=os.path.getmtime, reverse=True
+        )
+        kept = {os.path.basename(path)[:-len(".json.gz")] for path in files[:self.keep]}
+        for path in files[self.keep:]:
+            os.remove(path)
+
+        with self.lock:
+            for version in list(self.manifests):
+                if version not in kept:
+                    del self.manifests[version]
+
+    def get(self, version):
+        # Versions are 16 hex digits; anything else never touches the filesystem
+        if len(version) != 16 or any(c not in "0123456789abcdef" for c in version):
+            return None
+
+        with self.lock:
+            manifest = self.manifests.get(version)
+        if manifest is not None:
+            return manifest
+
+        try:
+            with gzip.open(self._file(version), "rt", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except OSError:
+            return None
+
+        with self.lock:
+            self.manifests[version] = manifest
+        return manifest
+
+    def diff(self, version, snapshot):
+        """(upsert keys, remove keys) from version to snapshot, None if unknown."""
+
+        cached = self.diffs.get((version, snapshot.version))
+        if cached is not None:
+            return cached
+
+        old = self.get(version)
+        if old is None:
+            return None
+
+        current = snapshot.row_hashes
+        upsert = [key for key, row_hash in current.items() if old.get(key) != row_hash]
+        remove = [key for key in old if key not in current]
+
+        self.diffs[(version, snapshot.version)] = (upsert, remove)
+        return upsert, remove
+
+
+version_history = VersionHistory()
+
+
+def find_instrument(instrument_key=None, symbol=None):
+    """Hot snapshot first, then the cold shard."""
+
+    snapshot = get_snapshot()
+    if instrument_key:
+        return snapshot.by_key.get(instrument_key) or cold_shard.get(instrument_key)
+    if symbol:
+        return snapshot.by_symbol.get(symbol.upper()) or cold_shard.get_by_symbol(symbol)
+    return None
+
+
+def load_and_filter(gz_file=None, delta=False, policy=None):
+    """
+    Parses the master and swaps in a new snapshot. With delta=True the
+    current snapshot is patched with only what changed.
+    Returns the diff (None for a full build).
+    """
+
+    global _snapshot
+
+    print("📊 Loading instruments data...")
+
+    gz_file = gz_file or get_master_paths()[0]
+
+    # Decompress straight into the parser, no extracted copy on disk
+    with INSTRUMENT_STAGE_SECONDS.labels("parse").time():
+        with gzip.open(gz_file, "rt", encoding="utf-8") as f:
             data = json.load(f)
 
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4)
+    with INSTRUMENT_STAGE_SECONDS.labels("filter").time():
+        groups, cold = (policy or prune_policy).split(filter_master(data), _spot_source)
+    del data
+
+    with _reload_lock, INSTRUMENT_STAGE_SECONDS.labels("swap").time():
+        if delta and INSTRUMENTS_READY.is_set():
+            snapshot, diff = _snapshot.apply_delta(groups)
+            print(f"🔁 Instruments delta: +{len(diff['added'])} "
+                  f"-{len(diff['removed'])} ~{len(diff['changed'])}")
+        else:
+            snapshot, diff = InstrumentSnapshot.build(groups), None
+
+        _snapshot = snapshot
+        cold_shard.write(cold)
+
+    try:
+        version_history.record(snapshot)
+    except OSError as e:
+        print(f"⚠️ Instrument version history not saved: {e}")
+
+    for name, rows in list(snapshot.filtered.items())[:20]:
+        print(f"✅ {name.upper():<10} Options : {len(rows)}")
+    if len(snapshot.filtered) > 20:
+        print(f"✅ ... {len(snapshot.filtered) - 20} more underlyings")
+    print(f"✅ TOTAL OPTIONS    : {len(snapshot.all)} hot  (version {snapshot.version})")
+
+    return diff
+
+
+def save_filtered_files():
+    today_dir = get_today_dir()
+    os.makedirs(today_dir, exist_ok=True)
+    snapshot = get_snapshot()
+
+    for name, rows in snapshot.filtered.items():
+        with open(os.path.join(today_dir, f"{name}_options.json"), "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+    with open(os.path.join(today_dir, "all_index_options.json"), "w", encoding="utf-8") as f:
+        json.dump(snapshot.all, f, indent=2)
+
+    print("💾 Filtered index option files saved")
+
+
+def cleanup_raw_files():
+    # Per-day raw copies written by older versions; the master now lives in BASE_DATA_DIR
+    today_dir = get_today_dir()
 
-        print("🗑 Removed complete.json")
+    for name in ("complete.json.gz", "complete.json"):
+        path = os.path.join(today_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
+            print(f"🗑 Removed {name}")
 
 
 def bootstrap_instruments(overwrite=False):
-    download_and_extract(overwrite=overwrite)
-    load_and_filter()
-    save_filtered_files()
-    cleanup_raw_files()
+    with _download_lock:
+        stats = download_master(overwrite=overwrite)
+        INSTRUMENT_STAGE_SECONDS.labels("download").observe(stats["seconds"])
+        print(f"📦 Instruments master: {stats['status']}, {stats['bytes']} bytes in {stats['seconds']:.2f}s")
+
+        load_and_filter()
+        INSTRUMENTS_READY.set()
+
+        with INSTRUMENT_STAGE_SECONDS.labels("save").time():
+            save_filtered_files()
+            cleanup_raw_files()
+        return stats
+
+
+def refresh_instruments():
+    """
+    Intraday refresh: re-fetch the master if it changed upstream and patch
+    the live snapshot in place of a full rebuild. Waits for a bootstrap or
+    refresh already in progress, then usually finds the master unchanged.
+    """
+
+    with _download_lock:
+        stats = download_master()
+
+        # With a pruning policy the hot set moves with spot and expiry, so re-split anyway
+        unchanged = stats["status"] in ("not_modified", "cached")
+        if unchanged and INSTRUMENTS_READY.is_set() and not prune_policy.active:
+            return {"stats": stats, "diff": None, "version": get_snapshot().version}
+
+        diff = load_and_filter(delta=True)
+        INSTRUMENTS_READY.set()
+        save_filtered_files()
+
+    return {
+        "stats": stats,
+        "diff": {k: len(v) for k, v in diff.items()} if diff else None,
+        "version": get_snapshot().version
+    }
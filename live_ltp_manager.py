@@ -1,8 +1,26 @@
 import asyncio
+import logging
+import os
+import threading
+import time
+
+from ltp_protocol import BinarySession, FORMAT_BINARY
+from feed_decode import DEFAULT_MODE, richest_mode
+from metrics import Gauge, PROCESS_STARTED, BROADCAST_SECONDS, BROADCAST_BATCH, BROADCAST_ERRORS
+from profiling import tracer
+
+log = logging.getLogger("live_ltp_manager")
+
+# Keys per subscribe request, so a reconnect replays hundreds of keys as a few small frames
+SUBSCRIBE_CHUNK = int(os.getenv("FEED_SUBSCRIBE_CHUNK", "100"))
+
 
 class LiveLTPManager:
     def __init__(self):
         self.clients = []
+
+        # ws → BinarySession for clients that negotiated binary framing
+        self.binary_sessions = {}
         self.subscribed = set()
         self.streamer = None
         self.loop = None
@@ -13,6 +31,40 @@ class LiveLTPManager:
         # Map instrument_key → trading_symbol (for Groww fallback)
         self.instrument_to_symbol = {}
 
+        # Extra instruments streamed for analytics (not broadcast as LTP)
+        self.watched = set()
+
+        # Who watches what: instrument → {owner: mode or None}. An instrument
+        # stays watched until its last owner (chains, positions, hub, ...) lets go
+        self.watch_owners = {}
+
+        # Feed mode requests: instrument → {mode: count}; unlisted = ltpc
+        self.mode_requests = {}
+        self.active_mode = None
+
+        # Latest decoded record for instruments streamed beyond ltpc
+        self.quotes = {}
+
+        # Callables fed every tick, for all subscribed instruments
+        self.tick_listeners = []
+
+        # Called (no args) when the set of streamed instruments may have changed
+        self.subscription_listeners = []
+
+        # First broadcast, for time-to-first-tick after start
+        self.first_broadcast_at = None
+
+        # Last known value per instrument: instrument → (ltp, source, timestamp)
+        self.last_values = {}
+
+        # Ticks waiting for the next broadcast batch (instrument → ltp)
+        self.pending = {}
+        self.pending_lock = threading.Lock()
+        self.flush_scheduled = False
+
+        # Receipt time of the oldest traced tick in pending (0 = untraced)
+        self.pending_received = 0
+
     # -------------------------
     # SETTERS
     # -------------------------
@@ -22,20 +74,36 @@ class LiveLTPManager:
     def set_loop(self, loop):
         self.loop = loop
 
+    def add_tick_listener(self, listener):
+        self.tick_listeners.append(listener)
+
+    def add_subscription_listener(self, listener):
+        self.subscription_listeners.append(listener)
+
+    def _changed(self):
+        for listener in self.subscription_listeners:
+            try:
+                listener()
+            except Exception as e:
+                log.error("❌ Subscription listener error: %s", e)
+
     # -------------------------
     # CLIENT HANDLING
     # -------------------------
-    def add_client(self, ws):
+    def add_client(self, ws, fmt=None):
         self.clients.append(ws)
+        if fmt == FORMAT_BINARY:
+            self.binary_sessions[ws] = BinarySession()
 
     def remove_client(self, ws):
         if ws in self.clients:
             self.clients.remove(ws)
+        self.binary_sessions.pop(ws, None)
 
     # -------------------------
     # SUBSCRIBE (single active instrument)
     # -------------------------
-    def subscribe(self, instrument, trading_symbol=None):
+    def subscribe(self, instrument, trading_symbol=None, mode=None):
 
         # Store trading symbol for Groww fallback
         if trading_symbol:
@@ -45,18 +113,32 @@ class LiveLTPManager:
         if self.active_instrument and self.active_instrument != instrument:
             self.unsubscribe(self.active_instrument)
 
+        # Same instrument, different detail level
+        if self.active_instrument == instrument and mode != self.active_mode:
+            self._set_active_mode(instrument, mode)
+
         # Subscribe new one
         if instrument not in self.subscribed:
+            self._set_active_mode(instrument, mode)
             self.subscribed.add(instrument)
             self.active_instrument = instrument
 
-            print(f"📡 Subscribing to Upstox for: {instrument}")
+            log.info("📡 Subscribing to Upstox for: %s (%s)", instrument, self.mode_of(instrument))
 
             if self.streamer:
                 try:
-                    self.streamer.subscribe([instrument], "ltpc")
+                    self._stream_subscribe([instrument])
                 except Exception as e:
-                    print(f"❌ Subscription Error: {e}")
+                    log.error("❌ Subscription Error: %s", e)
+
+        self._changed()
+
+    def _set_active_mode(self, instrument, mode):
+        if self.active_mode:
+            self.release_mode([instrument], self.active_mode)
+        self.active_mode = mode
+        if mode:
+            self.request_mode([instrument], mode)
 
     # -------------------------
     # UNSUBSCRIBE
@@ -65,44 +147,289 @@ class LiveLTPManager:
         if instrument in self.subscribed:
             self.subscribed.remove(instrument)
 
-            print(f"🛑 Unsubscribing from Upstox for: {instrument}")
+            log.info("🛑 Unsubscribing from Upstox for: %s", instrument)
 
-            if self.streamer:
+            # Still streamed for a watcher (e.g. an open option chain)
+            if self.streamer and instrument not in self.watched:
                 try:
                     self.streamer.unsubscribe([instrument])
                 except Exception as e:
-                    print(f"❌ Unsubscribe Error: {e}")
+                    log.error("❌ Unsubscribe Error: %s", e)
 
         if self.active_instrument == instrument:
             self.active_instrument = None
+            if self.active_mode:
+                self.release_mode([instrument], self.active_mode)
+                self.active_mode = None
+
+        self._changed()
+
+    # -------------------------
+    # WATCH (background instruments, e.g. option chains)
+    # -------------------------
+    def watch(self, instruments, mode=None, owner=None):
+        # mode None / ltpc keeps whatever this owner asked for before
+        requested, released, new = [], {}, []
+        for instrument in instruments:
+            owners = self.watch_owners.setdefault(instrument, {})
+            if not owners:
+                new.append(instrument)
+
+            previous = owners.get(owner)
+            if mode and mode != DEFAULT_MODE and previous != mode:
+                if previous:
+                    released.setdefault(previous, []).append(instrument)
+                requested.append(instrument)
+                owners[owner] = mode
+            else:
+                owners[owner] = previous
+
+        # Request first, so a swap between rich modes doesn't dip to ltpc in between
+        if requested:
+            self.request_mode(requested, mode)
+        for previous, keys in released.items():
+            self.release_mode(keys, previous)
+
+        if not new:
+            # Modes may still have changed
+            self._changed()
+            return
+
+        self.watched.update(new)
+        self._changed()
+        log.info("📡 Watching %d instruments on Upstox", len(new))
+
+        streamed = [i for i in new if i not in self.subscribed]
+        if self.streamer and streamed:
+            try:
+                self._stream_subscribe(streamed)
+            except Exception as e:
+                log.error("❌ Watch Subscription Error: %s", e)
+
+    def unwatch(self, instruments, owner=None):
+        gone, released = [], {}
+        for instrument in instruments:
+            owners = self.watch_owners.get(instrument)
+            if not owners or owner not in owners:
+                continue
+
+            mode = owners.pop(owner)
+            if mode:
+                released.setdefault(mode, []).append(instrument)
+            if not owners:
+                del self.watch_owners[instrument]
+                gone.append(instrument)
+
+        self.watched.difference_update(gone)
+        for mode, keys in released.items():
+            self.release_mode(keys, mode)
+
+        # Still wanted by another owner: only this owner's mode request went
+        if not gone:
+            if released:
+                self._changed()
+            return
+
+        log.info("🛑 Unwatching %d instruments on Upstox", len(gone))
+        self._changed()
+
+        streamed = [i for i in gone if i not in self.subscribed]
+        if self.streamer and streamed:
+            try:
+                self.streamer.unsubscribe(streamed)
+            except Exception as e:
+                log.error("❌ Unwatch Error: %s", e)
+
+    # -------------------------
+    # FEED MODES (richest requested mode wins per instrument)
+    # -------------------------
+    def watch_mode(self, instrument):
+        modes = [mode for mode in self.watch_owners.get(instrument, {}).values() if mode]
+        return richest_mode(modes) if modes else None
+
+    def mode_of(self, instrument):
+        requested = self.mode_requests.get(instrument)
+        return richest_mode(requested) if requested else DEFAULT_MODE
+
+    def request_mode(self, instruments, mode):
+        self._update_modes(instruments, mode, 1)
+
+    def release_mode(self, instruments, mode):
+        self._update_modes(instruments, mode, -1)
+
+    def _update_modes(self, instruments, mode, delta):
+        changed = {}
+        for instrument in instruments:
+            before = self.mode_of(instrument)
+
+            counts = self.mode_requests.setdefault(instrument, {})
+            counts[mode] = counts.get(mode, 0) + delta
+            if counts[mode] <= 0:
+                del counts[mode]
+            if not counts:
+                del self.mode_requests[instrument]
+                self.quotes.pop(instrument, None)
+
+            after = self.mode_of(instrument)
+            if after != before and (instrument in self.subscribed or instrument in self.watched):
+                changed.setdefault(after, []).append(instrument)
+
+        if not self.streamer:
+            return
+
+        for new_mode, keys in changed.items():
+            log.info("🎚 Switching %d instruments to %s", len(keys), new_mode)
+            try:
+                self.streamer.change_mode(keys, new_mode)
+            except Exception as e:
+                log.error("❌ Mode change Error: %s", e)
+
+    def _stream_subscribe(self, instruments):
+        by_mode = {}
+        for instrument in instruments:
+            by_mode.setdefault(self.mode_of(instrument), []).append(instrument)
+        for mode, keys in by_mode.items():
+            for i in range(0, len(keys), SUBSCRIBE_CHUNK):
+                self.streamer.subscribe(keys[i:i + SUBSCRIBE_CHUNK], mode)
+
+    def resubscribe_all(self):
+        self._stream_subscribe(list(self.subscribed | self.watched))
+
+    # Record listener on MarketFeed (non-ltpc instruments only)
+    def on_record(self, record):
+        self.quotes[record.instrument] = record
 
     # -------------------------
     # UPDATE LTP (only active instrument)
     # -------------------------
-    def update_ltp(self, instrument, ltp):
+    def update_ltp(self, instrument, ltp, source="upstox", received=0):
+
+        previous = self.last_values.get(instrument)
+        self.last_values[instrument] = (ltp, source, time.time())
 
-        # Only broadcast active instrument
+        for listener in self.tick_listeners:
+            try:
+                listener(instrument, ltp)
+            except Exception as e:
+                log.error("❌ Tick listener error: %s", e)
+
+        # Only broadcast active instrument, and only when the price moved
         if instrument != self.active_instrument:
             return
+        if previous and previous[0] == ltp:
+            return
+
+        if not self.loop:
+            return
 
-        if self.loop:
-            asyncio.run_coroutine_threadsafe(
-                self.broadcast(instrument, ltp),
-                self.loop
-            )
+        with self.pending_lock:
+            self.pending[instrument] = ltp
+            if received:
+                tracer.span("tick_to_queue", received)
+                self.pending_received = self.pending_received or received
+            if self.flush_scheduled:
+                return
+            self.flush_scheduled = True
+
+        self.loop.call_soon_threadsafe(self._start_flush)
+
+    def _start_flush(self):
+        asyncio.ensure_future(self.flush())
+
+    # -------------------------
+    # FLUSH PENDING (one flusher, ticks conflate while it sends)
+    # -------------------------
+    async def flush(self):
+        while True:
+            with self.pending_lock:
+                batch, self.pending = self.pending, {}
+                received, self.pending_received = self.pending_received, 0
+                if not batch:
+                    self.flush_scheduled = False
+                    return
+
+            tracer.span("tick_to_flush", received)
+            await self.broadcast(batch)
+            if received:
+                tracer.done(received, len(batch))
 
     # -------------------------
     # BROADCAST TO WS CLIENTS
     # -------------------------
-    async def broadcast(self, instrument, ltp):
-        for ws in self.clients:
+    async def broadcast(self, batch):
+        start = time.perf_counter()
+        BROADCAST_BATCH.observe(len(batch))
+
+        if self.first_broadcast_at is None:
+            self.first_broadcast_at = time.time()
+            log.info("⚡ First tick broadcast %.2fs after start", self.first_broadcast_at - PROCESS_STARTED)
+
+        for ws in list(self.clients):
+            session = self.binary_sessions.get(ws)
             try:
+                if session is None:
+                    for instrument, ltp in batch.items():
+                        await ws.send_json({
+                            "instrument": instrument,
+                            "ltp": ltp
+                        })
+                    continue
+
+                new_ids = session.assign(batch)
+                if new_ids:
+                    await ws.send_json({"type": "map", "ids": new_ids})
+                await ws.send_bytes(session.encode(batch))
+            except:
+                BROADCAST_ERRORS.inc()
+
+        BROADCAST_SECONDS.observe(time.perf_counter() - start)
+
+    # -------------------------
+    # LAST VALUE CACHE
+    # -------------------------
+    def get_last_value(self, instrument):
+        value = self.last_values.get(instrument)
+        if not value:
+            return None
+
+        ltp, source, ts = value
+        result = {"ltp": ltp, "source": source, "timestamp": ts}
+
+        record = self.quotes.get(instrument)
+        if record is not None:
+            result["quote"] = record.as_dict()
+        return result
+
+    def snapshot(self, instruments):
+        return {
+            instrument: self.get_last_value(instrument)
+            for instrument in instruments
+        }
+
+    async def send_snapshot(self, ws, instrument):
+        value = self.last_values.get(instrument)
+        if not value:
+            return False
+
+        batch = {instrument: value[0]}
+        session = self.binary_sessions.get(ws)
+        try:
+            if session is None:
                 await ws.send_json({
                     "instrument": instrument,
-                    "ltp": ltp
+                    "ltp": value[0],
+                    "source": value[1],
+                    "timestamp": value[2],
+                    "snapshot": True
                 })
-            except:
-                pass
+            else:
+                new_ids = session.assign(batch)
+                if new_ids:
+                    await ws.send_json({"type": "map", "ids": new_ids})
+                await ws.send_bytes(session.encode(batch))
+        except:
+            pass
+        return True
 
     # -------------------------
     # Groww fallback helper
@@ -113,3 +440,10 @@ class LiveLTPManager:
 
 # Singleton
 ltp_manager = LiveLTPManager()
+
+Gauge("ltp_pending_ticks", "Ticks waiting for the next broadcast batch", fn=lambda: len(ltp_manager.pending))
+Gauge("startup_first_tick_seconds", "Seconds from process start to the first LTP broadcast",
+      fn=lambda: round(ltp_manager.first_broadcast_at - PROCESS_STARTED, 3) if ltp_manager.first_broadcast_at else 0)
+Gauge("ltp_clients", "Connected LTP websocket clients", fn=lambda: len(ltp_manager.clients))
+Gauge("feed_instruments", "Instruments streamed from the feed",
+      fn=lambda: len(ltp_manager.subscribed | ltp_manager.watched))
@@ -0,0 +1,168 @@
+"""
+Non-blocking logging.
+
+Records go onto a bounded queue and a background thread writes them to
+stdout, so the feed thread and the event loop never wait on the stdout
+pipe. When the queue is full, records are dropped and counted instead of
+blocking.
+
+    LOG_LEVEL=INFO
+    LOG_LEVELS=websocket_feed=DEBUG,instruments=WARNING
+    LOG_FORMAT=text | json
+    LOG_RATE_LIMIT=5        same message template per logger per window
+    LOG_RATE_WINDOW=10      seconds
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+
+from metrics import Gauge
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_RATE_LIMIT = int(os.getenv("LOG_RATE_LIMIT", "5"))
+LOG_RATE_WINDOW = float(os.getenv("LOG_RATE_WINDOW", "10"))
+
+_listener = None
+_setup_lock = threading.Lock()
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record):
+        # Formatting happens on the listener thread, not the caller's
+        return record
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets through at most `limit` warnings/errors per (logger, message
+    template) every `window` seconds. The first record after a quiet
+    window carries the number suppressed, e.g. repeated "No LTP for %s"
+    feed errors.
+    """
+
+    def __init__(self, limit=LOG_RATE_LIMIT, window=LOG_RATE_WINDOW, min_level=logging.WARNING):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self.min_level = min_level
+        self.lock = threading.Lock()
+
+        # (logger, msg) → [window_start, emitted, suppressed]
+        self.state = {}
+
+    def filter(self, record):
+        if self.limit <= 0 or record.levelno < self.min_level:
+            return True
+
+        now = time.monotonic()
+        key = (record.name, record.msg)
+
+        with self.lock:
+            state = self.state.get(key)
+            if state is None or now - state[0] >= self.window:
+                suppressed = state[2] if state else 0
+                self.state[key] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+
+            if state[1] < self.limit:
+                state[1] += 1
+                return True
+
+            state[2] += 1
+            return False
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s")
+
+    def format(self, record):
+        line = super().format(record)
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            line += f" (+{suppressed} similar suppressed)"
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            entry["suppressed"] = suppressed
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def _parse_levels(spec):
+    levels = {}
+    for part in spec.split(","):
+        if "=" in part:
+            name, level = part.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging(level=LOG_LEVEL, levels=LOG_LEVELS, fmt=LOG_FORMAT):
+    """Installs the queue handler on the root logger; safe to call twice."""
+
+    global _listener
+
+    with _setup_lock:
+        if _listener is not None:
+            return _listener
+
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+        log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        handler = DroppingQueueHandler(log_queue)
+        handler.addFilter(RateLimitFilter())
+
+        root = logging.getLogger()
+        root.handlers[:] = [handler]
+        root.setLevel(level)
+
+        for name, module_level in _parse_levels(levels).items():
+            logging.getLogger(name).setLevel(module_level)
+
+        _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+        return _listener
+
+
+def dropped_records():
+    root = logging.getLogger()
+    return sum(getattr(h, "dropped", 0) for h in root.handlers)
+
+
+Gauge("log_records_dropped", "Log records dropped because the log queue was full", fn=dropped_records)
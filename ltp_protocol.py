@@ -0,0 +1,58 @@
+import struct
+
+# Compact /ws/ltp framing, negotiated with ?format=binary on connect.
+#
+# Text frame, sent once per new instrument in a session:
+#     {"type": "map", "ids": {"NSE_FO|65083": 1}}
+#
+# Binary frame, one per broadcast batch (little endian):
+#     uint16 count
+#     count x (uint16 instrument_id, float64 ltp)
+
+FORMAT_JSON = "json"
+FORMAT_BINARY = "binary"
+
+HEADER = struct.Struct("<H")
+ENTRY = struct.Struct("<Hd")
+
+# Struct per batch size, built on first use
+_frame_structs = {}
+
+
+def _frame_struct(count):
+    frame = _frame_structs.get(count)
+    if frame is None:
+        frame = struct.Struct("<H" + "Hd" * count)
+        _frame_structs[count] = frame
+    return frame
+
+
+class BinarySession:
+    """Per-client instrument_key → small integer id table."""
+
+    def __init__(self):
+        self.ids = {}
+
+    def assign(self, batch):
+        """Returns ids for instruments in batch not yet sent to this client."""
+        new = {}
+        for instrument in batch:
+            if instrument not in self.ids:
+                self.ids[instrument] = len(self.ids) + 1
+                new[instrument] = self.ids[instrument]
+        return new
+
+    def encode(self, batch):
+        flat = []
+        for instrument, ltp in batch.items():
+            flat.append(self.ids[instrument])
+            flat.append(ltp)
+        return _frame_struct(len(batch)).pack(len(batch), *flat)
+
+
+def decode_frame(frame):
+    count, = HEADER.unpack_from(frame, 0)
+    return [
+        ENTRY.unpack_from(frame, HEADER.size + i * ENTRY.size)
+        for i in range(count)
+    ]
@@ -0,0 +1,216 @@
+"""
+Memory-mapped latest-price table for local strategy processes.
+
+The dashboard (or feed hub) writes every tick into a fixed slot per
+instrument; readers map the same file and read prices with plain memory
+loads, no socket and no syscall per read.
+
+Layout (little endian):
+    header : magic "LTPT", version u32, capacity u32, generation u32, 48 pad bytes
+    slot i : seq u32, pad u32, ltp f64, timestamp f64, source u8, 7 pad bytes
+
+Slots are seqlock protected: the writer makes seq odd, writes, then makes
+it even again; readers retry until they see the same even seq on both
+sides of the read. The instrument_key → slot map lives next to the table
+in "<path>.keys.json" and is re-read when the header generation changes.
+
+A restarted writer builds a new table file and renames it over the old
+one, then bumps the old file's generation; readers see the change,
+notice the new inode and remap, so they never read slots through a
+stale key map. Generations start from the clock and don't repeat across
+restarts.
+
+    from ltp_shm import LtpTableReader
+    table = LtpTableReader()
+    ltp, ts, source = table.get("NSE_FO|65083")
+"""
+import json
+import mmap
+import os
+import struct
+import time
+
+LTP_SHM_ENABLED = os.getenv("LTP_SHM_ENABLED", "0") == "1"
+LTP_SHM_PATH = os.getenv("LTP_SHM_PATH", "/dev/shm/upstox_ltp.tbl")
+
+# Slots reserved for keys outside the instrument store (index underlyings, ...)
+EXTRA_SLOTS = 1024
+
+MAGIC = b"LTPT"
+VERSION = 1
+
+HEADER = struct.Struct("<4sIII48x")
+GENERATION_OFFSET = 12
+SEQ = struct.Struct("<I")
+GENERATION = struct.Struct("<I")
+VALUE = struct.Struct("<ddB7x")
+SLOT_SIZE = SEQ.size + 4 + VALUE.size
+
+SOURCES = {"upstox": 1, "groww": 2}
+SOURCE_NAMES = {code: name for name, code in SOURCES.items()}
+
+
+def _slot_offset(slot):
+    return HEADER.size + slot * SLOT_SIZE
+
+
+def _keys_path(path):
+    return path + ".keys.json"
+
+
+# -------------------------
+# WRITER (dashboard side)
+# -------------------------
+class LtpTableWriter:
+    def __init__(self, id_by_key, manager, path=LTP_SHM_PATH, extra_slots=EXTRA_SLOTS):
+        self.path = path
+        self.manager = manager
+        self.slots = dict(id_by_key)
+        self.next_slot = max(self.slots.values(), default=0) + 1
+        self.capacity = self.next_slot + extra_slots
+        self.generation = int(time.time()) & 0xFFFFFFFF
+
+        # Built beside the live table and renamed over it: readers of the old
+        # file keep a consistent (old) table until they notice and remap
+        size = _slot_offset(self.capacity)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.truncate(size)
+
+        self.file = open(tmp, "r+b")
+        self.mm = mmap.mmap(self.file.fileno(), size)
+        HEADER.pack_into(self.mm, 0, MAGIC, VERSION, self.capacity, self.generation)
+        self._write_keys()
+
+        old = self._open_old()
+        os.replace(tmp, path)
+        if old:
+            self._retire(*old)
+
+        print(f"🧮 LTP table at {path}: {self.capacity} slots")
+
+    def _open_old(self):
+        try:
+            f = open(self.path, "r+b")
+        except FileNotFoundError:
+            return None
+        try:
+            return f, mmap.mmap(f.fileno(), HEADER.size)
+        except (ValueError, OSError):
+            f.close()
+            return None
+
+    def _retire(self, f, mm):
+        # Readers still mapping the replaced file see its generation move and remap
+        generation, = GENERATION.unpack_from(mm, GENERATION_OFFSET)
+        GENERATION.pack_into(mm, GENERATION_OFFSET, (generation + 1) & 0xFFFFFFFF)
+        mm.close()
+        f.close()
+
+    def _write_keys(self):
+        tmp = _keys_path(self.path) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.slots, f)
+        os.replace(tmp, _keys_path(self.path))
+
+    def _assign(self, instrument):
+        if self.next_slot >= self.capacity:
+            return None
+
+        slot = self.next_slot
+        self.next_slot += 1
+        self.slots[instrument] = slot
+
+        self._write_keys()
+        self.generation = (self.generation + 1) & 0xFFFFFFFF
+        GENERATION.pack_into(self.mm, GENERATION_OFFSET, self.generation)
+        return slot
+
+    def write(self, instrument, ltp, ts, source="upstox"):
+        slot = self.slots.get(instrument)
+        if slot is None:
+            slot = self._assign(instrument)
+            if slot is None:
+                return
+
+        offset = _slot_offset(slot)
+        seq, = SEQ.unpack_from(self.mm, offset)
+        SEQ.pack_into(self.mm, offset, seq + 1)
+        VALUE.pack_into(self.mm, offset + 8, ltp, ts, SOURCES.get(source, 0))
+        SEQ.pack_into(self.mm, offset, (seq + 2) & 0xFFFFFFFF)
+
+    # Tick listener on LiveLTPManager
+    def on_tick(self, instrument, ltp):
+        value = self.manager.last_values.get(instrument)
+        if value:
+            self.write(instrument, ltp, value[2], value[1])
+
+    def close(self):
+        self.mm.close()
+        self.file.close()
+
+
+# -------------------------
+# READER (strategy side)
+# -------------------------
+class LtpTableReader:
+    def __init__(self, path=LTP_SHM_PATH):
+        self.path = path
+        self.generation = 0
+        self.slots = {}
+        self.open()
+
+    def open(self):
+        self.file = open(self.path, "rb")
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.capacity, _ = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"❌ {self.path} is not an LTP table")
+        self.reload_keys()
+
+    def refresh(self):
+        # Generation moved: new keys, or a restarted writer replaced the file
+        if os.stat(self.path).st_ino != os.fstat(self.file.fileno()).st_ino:
+            self.close()
+            self.open()
+        else:
+            self.reload_keys()
+
+    def reload_keys(self):
+        self.generation, = GENERATION.unpack_from(self.mm, GENERATION_OFFSET)
+        with open(_keys_path(self.path), encoding="utf-8") as f:
+            self.slots = json.load(f)
+
+    def read_slot(self, slot):
+        offset = _slot_offset(slot)
+        mm = self.mm
+        while True:
+            before, = SEQ.unpack_from(mm, offset)
+            if before & 1:
+                continue
+            ltp, ts, source = VALUE.unpack_from(mm, offset + 8)
+            after, = SEQ.unpack_from(mm, offset)
+            if before == after:
+                return ltp, ts, source
+
+    def get(self, instrument):
+        """Returns (ltp, timestamp, source) or None if never written."""
+
+        # A memory load, no syscall unless the table changed
+        generation, = GENERATION.unpack_from(self.mm, GENERATION_OFFSET)
+        if generation != self.generation:
+            self.refresh()
+
+        slot = self.slots.get(instrument)
+        if slot is None:
+            return None
+
+        ltp, ts, source = self.read_slot(slot)
+        if not ts:
+            return None
+        return ltp, ts, SOURCE_NAMES.get(source)
+
+    def close(self):
+        self.mm.close()
+        self.file.close()
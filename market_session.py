@@ -0,0 +1,183 @@
+"""
+Market session tracking and scheduling.
+
+Knows whether each segment is trading from the exchange calendar, which
+a close status in the feed's market_info (received since today's
+calendar open) can cut short but never extend, and fires callbacks on
+session transitions:
+
+    prewarm  PREWARM_MINUTES before the open: token, clients, instruments, feed
+    open     trading hours
+    closed   everything else: feed paused, no background broker / Groww polling
+
+    MARKET_SESSION_ENABLED=0        treat the market as always open
+    MARKET_HOLIDAYS=2026-10-20,...  exchange holidays (YYYY-MM-DD)
+    PREWARM_MINUTES=10
+"""
+import asyncio
+import logging
+import os
+from datetime import datetime, time as dtime, timedelta, timezone
+
+log = logging.getLogger("market_session")
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+MARKET_SESSION_ENABLED = os.getenv("MARKET_SESSION_ENABLED", "1") == "1"
+MARKET_HOLIDAYS = {d.strip() for d in os.getenv("MARKET_HOLIDAYS", "").split(",") if d.strip()}
+PREWARM_MINUTES = float(os.getenv("PREWARM_MINUTES", "10"))
+SESSION_CHECK_SECONDS = 15
+
+# Regular trading hours per exchange (IST)
+EXCHANGE_HOURS = {
+    "NSE": (dtime(9, 15), dtime(15, 30)),
+    "BSE": (dtime(9, 15), dtime(15, 30)),
+    "MCX": (dtime(9, 0), dtime(23, 30)),
+}
+
+# Segments whose session drives the app (index options)
+SESSION_SEGMENTS = ("NSE_FO", "BSE_FO")
+
+PHASE_PREWARM = "prewarm"
+PHASE_OPEN = "open"
+PHASE_CLOSED = "closed"
+
+
+def segment_exchange(segment):
+    return segment.split("_")[0] if segment else "NSE"
+
+
+def feed_trading(status):
+    # NORMAL_OPEN / CLOSING_START trade; PRE_OPEN_* and *_CLOSE / *_END don't
+    return ("OPEN" in status and "PRE_OPEN" not in status) or "CLOSING_START" in status
+
+
+class MarketSession:
+    def __init__(self, enabled=MARKET_SESSION_ENABLED, holidays=MARKET_HOLIDAYS, prewarm_minutes=PREWARM_MINUTES):
+        self.enabled = enabled
+        self.holidays = set(holidays)
+        self.prewarm = timedelta(minutes=prewarm_minutes)
+
+        # segment → (status, IST datetime received) from the feed's market_info
+        self.feed_status = {}
+
+        self.phase = None
+        self.listeners = {PHASE_PREWARM: [], PHASE_OPEN: [], PHASE_CLOSED: []}
+
+    # -------------------------
+    # STATUS
+    # -------------------------
+    def update_from_feed(self, segment_status, now=None):
+        now = now or datetime.now(IST)
+        for segment, status in segment_status.items():
+            self.feed_status[segment] = (status, now)
+
+    def is_trading_day(self, day):
+        return day.weekday() < 5 and day.isoformat() not in self.holidays
+
+    def calendar_open(self, segment, now):
+        if not self.is_trading_day(now.date()):
+            return False
+        start, end = EXCHANGE_HOURS.get(segment_exchange(segment), EXCHANGE_HOURS["NSE"])
+        return start <= now.time() < end
+
+    def feed_status_for(self, segment, now):
+        """
+        The feed's status for segment if it is still current: received
+        today and not before today's calendar open. A PRE_OPEN / CLOSE seen
+        by the prewarm connect must not keep the session closed past the
+        open, or the feed is paused before NORMAL_OPEN can arrive.
+        """
+
+        status = self.feed_status.get(segment)
+        if not status:
+            return None
+
+        start, _ = EXCHANGE_HOURS.get(segment_exchange(segment), EXCHANGE_HOURS["NSE"])
+        received = status[1]
+        if received.date() != now.date():
+            return None
+        if now.time() >= start and received.time() < start:
+            return None
+        return status[0]
+
+    def is_open(self, segment=None, now=None):
+        if not self.enabled:
+            return True
+
+        now = now or datetime.now(IST)
+        segments = [segment] if segment else SESSION_SEGMENTS
+
+        for seg in segments:
+            if not self.calendar_open(seg, now):
+                continue
+
+            # Only a close from the feed overrides the calendar (unlisted holiday, halt):
+            # an OPEN left over from a feed that dropped before 15:30 must not outlive the session
+            status = self.feed_status_for(seg, now)
+            if status and not feed_trading(status):
+                continue
+            return True
+        return False
+
+    def next_open(self, now=None):
+        now = now or datetime.now(IST)
+        start, _ = EXCHANGE_HOURS["NSE"]
+        day = now.date()
+
+        for _ in range(15):
+            candidate = datetime.combine(day, start, IST)
+            if self.is_trading_day(day) and candidate > now:
+                return candidate
+            day += timedelta(days=1)
+        return None
+
+    def current_phase(self, now=None):
+        now = now or datetime.now(IST)
+        if self.is_open(now=now):
+            return PHASE_OPEN
+
+        opens_at = self.next_open(now)
+        if opens_at and opens_at - now <= self.prewarm:
+            return PHASE_PREWARM
+        return PHASE_CLOSED
+
+    def status(self):
+        now = datetime.now(IST)
+        opens_at = self.next_open(now)
+        return {
+            "enabled": self.enabled,
+            "phase": self.phase or self.current_phase(now),
+            "open": self.is_open(now=now),
+            "segments": {seg: status for seg, (status, at) in self.feed_status.items() if at.date() == now.date()},
+            "next_open": opens_at.isoformat() if opens_at else None
+        }
+
+    # -------------------------
+    # SCHEDULER
+    # -------------------------
+    def on(self, phase, listener):
+        self.listeners[phase].append(listener)
+
+    async def _fire(self, phase):
+        for listener in self.listeners[phase]:
+            try:
+                result = listener()
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                log.error("❌ Session %s listener error: %s", phase, e)
+
+    async def run(self):
+        while True:
+            phase = self.current_phase()
+            if phase != self.phase:
+                log.info("🕘 Market session: %s → %s", self.phase, phase)
+                self.phase = phase
+                await self._fire(phase)
+
+            await asyncio.sleep(SESSION_CHECK_SECONDS)
+
+
+# Singleton
+market_session = MarketSession()
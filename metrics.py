@@ -0,0 +1,219 @@
+"""
+In-process metrics, rendered in the Prometheus text format at /metrics.
+
+Updates are plain attribute/list increments with no lock: the tick path
+pays one method call, and an increment lost to a thread switch is fine
+for monitoring.
+
+    from metrics import FEED_TICKS, BROKER_SECONDS
+    FEED_TICKS.inc()
+    with BROKER_SECONDS.labels("place_gtt").time():
+        ...
+"""
+import os
+import time
+from bisect import bisect_left
+
+# Seconds; covers a websocket send up to a slow broker call
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+RECOVERY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+REGISTRY = []
+
+
+def _process_started():
+    # Linux: process start from /proc (clock ticks after boot); elsewhere, first import
+    try:
+        with open("/proc/self/stat") as f:
+            started_after_boot = int(f.read().rsplit(")", 1)[1].split()[19]) / os.sysconf("SC_CLK_TCK")
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - (uptime - started_after_boot)
+    except (OSError, ValueError, IndexError):
+        return time.time()
+
+
+PROCESS_STARTED = _process_started()
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help, labelnames=(), register=True):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.children = {}
+        if register:
+            REGISTRY.append(self)
+
+    def labels(self, *values):
+        child = self.children.get(values)
+        if child is None:
+            child = self.children[values] = self._child()
+        return child
+
+    def _series(self):
+        if self.labelnames:
+            return sorted(self.children.items())
+        return [((), self)]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, metric in self._series():
+            lines.extend(metric._samples(self.name, self.labelnames, values))
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.value = 0
+
+    def _child(self):
+        return Counter(self.name, self.help, register=False)
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def _samples(self, name, labelnames, values):
+        return [f"{name}{_format_labels(labelnames, values)} {self.value}"]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, help, labelnames=(), fn=None, register=True):
+        super().__init__(name, help, labelnames, register)
+        self.value = 0
+        self.fn = fn
+
+    def _child(self):
+        return Gauge(self.name, self.help, register=False)
+
+    def set(self, value):
+        self.value = value
+
+    def _samples(self, name, labelnames, values):
+        value = self.fn() if self.fn else self.value
+        return [f"{name}{_format_labels(labelnames, values)} {value}"]
+
+
+class _Timer:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS, register=True):
+        super().__init__(name, help, labelnames, register)
+        self.buckets = tuple(buckets)
+
+        # Per-bucket (not cumulative) counts, last slot is +Inf
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+
+    def _child(self):
+        return Histogram(self.name, self.help, buckets=self.buckets, register=False)
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def time(self):
+        return _Timer(self)
+
+    def _samples(self, name, labelnames, values):
+        lines, total = [], 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            total += count
+            le = ("le", bound if bound == "+Inf" else repr(float(bound)))
+            lines.append(f"{name}_bucket{_format_labels(labelnames, values, le)} {total}")
+        lines.append(f"{name}_sum{_format_labels(labelnames, values)} {self.sum}")
+        lines.append(f"{name}_count{_format_labels(labelnames, values)} {total}")
+        return lines
+
+
+def render():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# -------------------------
+# FEED
+# -------------------------
+FEED_MESSAGES = Counter("feed_messages_total", "Upstox market data messages received")
+FEED_TICKS = Counter("feed_ticks_total", "Instrument updates received from Upstox")
+FEED_MESSAGE_SECONDS = Histogram("feed_message_seconds", "Time spent handling one market data message")
+FALLBACKS = Counter("feed_fallbacks_total", "Groww fallback lookups", ["reason"])
+FALLBACK_SECONDS = Histogram("feed_fallback_seconds", "Groww fallback lookup latency", ["result"])
+FEED_CONNECTS = Counter("feed_connect_attempts_total", "Upstox market feed connect attempts", ["result"])
+FEED_RECOVERY_SECONDS = Histogram("feed_recovery_seconds", "Time from an unplanned feed drop to the next open",
+                                  buckets=RECOVERY_BUCKETS)
+
+# -------------------------
+# BROADCAST
+# -------------------------
+BROADCAST_SECONDS = Histogram("ltp_broadcast_seconds", "Time to send one LTP batch to all clients")
+BROADCAST_BATCH = Histogram("ltp_broadcast_batch_size", "Instruments per broadcast batch", buckets=SIZE_BUCKETS)
+BROADCAST_ERRORS = Counter("ltp_broadcast_errors_total", "Failed sends to LTP websocket clients")
+
+# -------------------------
+# BROKER / STORAGE
+# -------------------------
+BROKER_SECONDS = Histogram("broker_call_seconds", "Upstox REST call latency", ["op"])
+BROKER_ERRORS = Counter("broker_call_errors_total", "Upstox REST calls that failed", ["op"])
+MONGO_SECONDS = Histogram("mongo_write_seconds", "MongoDB write latency", ["op"])
+MONGO_READ_SECONDS = Histogram("mongo_read_seconds", "MongoDB read latency", ["op"])
+TOKEN_CHECKS = Counter("token_checks_total", "Access token validations", ["result"])
+TOKEN_CHECK_SECONDS = Histogram("token_check_seconds", "Access token validation latency")
+
+# -------------------------
+# ORDERS
+# -------------------------
+# result: passed, adjusted (prices rounded to tick), rejected (no broker call), unchecked (instrument unknown)
+ORDER_CHECKS = Counter("order_checks_total", "Pre-trade order validations", ["op", "result"])
+
+
+def _broker_calls_saved():
+    counts = {}
+    for (op, result), child in ORDER_CHECKS.children.items():
+        counts[result] = counts.get(result, 0) + child.value
+    total = sum(counts.values())
+    return round(counts.get("rejected", 0) / total, 4) if total else 0
+
+
+ORDER_CHECKS_SAVED = Gauge("order_checks_broker_calls_saved_ratio",
+                           "Share of order requests rejected locally instead of by the broker",
+                           fn=_broker_calls_saved)
+
+# -------------------------
+# INSTRUMENTS
+# -------------------------
+INSTRUMENT_STAGE_SECONDS = Histogram("instrument_load_stage_seconds", "Instrument bootstrap stage duration", ["stage"])
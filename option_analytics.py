@@ -0,0 +1,377 @@
+import asyncio
+import math
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from instruments import get_snapshot
+from live_ltp_manager import ltp_manager
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+RISK_FREE_RATE = float(os.getenv("RISK_FREE_RATE", "0.065"))
+
+# Conflation window: the chain is recomputed at most once per cycle
+CHAIN_REFRESH_SECONDS = float(os.getenv("CHAIN_REFRESH_SECONDS", "1.0"))
+
+# A /analytics/chain request keeps its chain streaming this long, so polling stays warm
+CHAIN_REQUEST_HOLD_SECONDS = float(os.getenv("CHAIN_REQUEST_HOLD_SECONDS", "60"))
+
+IV_ITERATIONS = 12
+IV_MIN = 1e-4
+IV_MAX = 5.0
+
+SECONDS_PER_YEAR = 365.0 * 24 * 3600
+
+
+# -------------------------
+# VECTORISED BLACK-SCHOLES
+# -------------------------
+def norm_pdf(x):
+    return np.exp(-0.5 * x * x) / math.sqrt(2.0 * math.pi)
+
+
+def norm_cdf(x):
+    # Abramowitz & Stegun 7.1.26 (|error| < 1.5e-7), numpy has no erf
+    z = np.abs(x) / math.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.3275911 * z)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741
+           + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1.0 - poly * np.exp(-z * z)
+    return 0.5 * (1.0 + np.sign(x) * erf)
+
+
+def _d1_d2(spot, strike, t, rate, sigma):
+    sqrt_t = np.sqrt(t)
+    d1 = (np.log(spot / strike) + (rate + 0.5 * sigma * sigma) * t) / (sigma * sqrt_t)
+    return d1, d1 - sigma * sqrt_t, sqrt_t
+
+
+def bs_price(spot, strike, t, rate, sigma, is_call):
+    d1, d2, _ = _d1_d2(spot, strike, t, rate, sigma)
+    disc = strike * np.exp(-rate * t)
+    call = spot * norm_cdf(d1) - disc * norm_cdf(d2)
+    put = disc * norm_cdf(-d2) - spot * norm_cdf(-d1)
+    return np.where(is_call, call, put)
+
+
+def implied_vol(price, spot, strike, t, rate, is_call):
+    """
+    Newton-Raphson over the whole chain at once.
+    Rows with no price or a price below intrinsic come back as NaN.
+    """
+
+    # Brenner-Subrahmanyam starting point
+    sigma = np.clip(np.sqrt(2.0 * math.pi / t) * price / spot, 0.05, 2.0)
+
+    for _ in range(IV_ITERATIONS):
+        d1, _, sqrt_t = _d1_d2(spot, strike, t, rate, sigma)
+        vega = spot * norm_pdf(d1) * sqrt_t
+        diff = bs_price(spot, strike, t, rate, sigma, is_call) - price
+        sigma = np.clip(sigma - diff / np.maximum(vega, 1e-8), IV_MIN, IV_MAX)
+
+    disc = strike * np.exp(-rate * t)
+    intrinsic = np.where(is_call, spot - disc, disc - spot)
+    invalid = ~(price > np.maximum(intrinsic, 0.0))
+    sigma[invalid] = np.nan
+    return sigma
+
+
+def greeks(spot, strike, t, rate, sigma, is_call):
+    d1, d2, sqrt_t = _d1_d2(spot, strike, t, rate, sigma)
+    pdf = norm_pdf(d1)
+    disc = np.exp(-rate * t)
+
+    delta = np.where(is_call, norm_cdf(d1), norm_cdf(d1) - 1.0)
+    gamma = pdf / (spot * sigma * sqrt_t)
+
+    decay = -spot * pdf * sigma / (2.0 * sqrt_t)
+    carry = rate * strike * disc
+    theta = np.where(is_call, decay - carry * norm_cdf(d2), decay + carry * norm_cdf(-d2))
+
+    # theta per calendar day, vega per 1 vol point
+    return delta, gamma, theta / 365.0, spot * pdf * sqrt_t / 100.0
+
+
+# -------------------------
+# CHAIN
+# -------------------------
+def expiry_date(item):
+    expiry = item.get("expiry")
+    if not expiry:
+        return None
+    return datetime.fromtimestamp(expiry / 1000, IST).strftime("%Y-%m-%d")
+
+
+def list_expiries(index_name):
+    today = datetime.now(IST).strftime("%Y-%m-%d")
+    expiries = {
+        expiry_date(item)
+        for item in get_snapshot().filtered.get(index_name, [])
+        if item.get("instrument_type") in ("CE", "PE")
+    }
+    return sorted(e for e in expiries if e and e >= today)
+
+
+class OptionChain:
+    def __init__(self, index_name, expiry, rows, version=None):
+        rows = sorted(rows, key=lambda x: (x["strike_price"], x["instrument_type"]))
+
+        self.index_name = index_name
+        self.expiry = expiry
+        self.version = version
+        self.keys = [row["instrument_key"] for row in rows]
+        self.symbols = [row.get("trading_symbol") for row in rows]
+        self.strike = np.array([row["strike_price"] for row in rows], dtype=float)
+        self.is_call = np.array([row["instrument_type"] == "CE" for row in rows])
+        self.expiry_ts = np.array([row["expiry"] / 1000.0 for row in rows], dtype=float)
+        self.underlying_key = rows[0].get("underlying_key") if rows else None
+
+    @classmethod
+    def build(cls, index_name, expiry=None):
+        index_name = index_name.lower()
+        if expiry is None:
+            expiries = list_expiries(index_name)
+            if not expiries:
+                return None
+            expiry = expiries[0]
+
+        snapshot = get_snapshot()
+        rows = [
+            item for item in snapshot.filtered.get(index_name, [])
+            if item.get("instrument_type") in ("CE", "PE")
+            and expiry_date(item) == expiry
+        ]
+        if not rows:
+            return None
+
+        return cls(index_name, expiry, rows, snapshot.version)
+
+    def evaluate(self, prices, spot, now=None, rate=RISK_FREE_RATE):
+        now = now or time.time()
+
+        price = np.fromiter(
+            (prices.get(k, np.nan) for k in self.keys),
+            dtype=float, count=len(self.keys)
+        )
+        t = np.maximum((self.expiry_ts - now) / SECONDS_PER_YEAR, 1e-6)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            iv = implied_vol(price, spot, self.strike, t, rate, self.is_call)
+            delta, gamma, theta, vega = greeks(spot, self.strike, t, rate, iv, self.is_call)
+
+        return price, iv, delta, gamma, theta, vega
+
+    def put_call_ratio(self, oi):
+        if not oi:
+            return None
+
+        oi_arr = np.fromiter(
+            (oi.get(k, 0.0) for k in self.keys),
+            dtype=float, count=len(self.keys)
+        )
+        call_oi = oi_arr[self.is_call].sum()
+        if call_oi <= 0:
+            return None
+        return float(oi_arr[~self.is_call].sum() / call_oi)
+
+    def compute(self, prices, spot, oi=None, now=None, rate=RISK_FREE_RATE):
+        columns = self.evaluate(prices, spot, now, rate)
+        price, iv, delta, gamma, theta, vega = (
+            np.round(col, 6).tolist() for col in columns
+        )
+        strikes = self.strike.tolist()
+        is_call = self.is_call.tolist()
+
+        return {
+            "index": self.index_name,
+            "expiry": self.expiry,
+            "spot": spot,
+            "pcr": self.put_call_ratio(oi),
+            "rows": [
+                {
+                    "instrument_key": self.keys[i],
+                    "trading_symbol": self.symbols[i],
+                    "strike": strikes[i],
+                    "type": "CE" if is_call[i] else "PE",
+                    "ltp": _num(price[i]),
+                    "iv": _num(iv[i]),
+                    "delta": _num(delta[i]),
+                    "gamma": _num(gamma[i]),
+                    "theta": _num(theta[i]),
+                    "vega": _num(vega[i])
+                }
+                for i in range(len(self.keys))
+            ]
+        }
+
+
+def _num(value):
+    return None if math.isnan(value) or math.isinf(value) else value
+
+
+# -------------------------
+# ANALYTICS STAGE
+# -------------------------
+class ChainAnalytics:
+    def __init__(self, manager=ltp_manager):
+        self.manager = manager
+        self.prices = {}
+        self.oi = {}
+        self.dirty = False
+
+        # (index_name, expiry) → OptionChain
+        self.chains = {}
+        self.results = {}
+
+        # websocket → (index_name, expiry)
+        self.clients = {}
+
+        # (index_name, expiry) → websockets and held requests using the chain
+        self.owners = {}
+
+        # (index_name, expiry) → (option keys, underlying keys) as watched
+        self.watching = {}
+
+        # instrument → number of owned chains that include it (underlyings are shared)
+        self.refs = {}
+
+    def on_tick(self, instrument, ltp):
+        self.prices[instrument] = ltp
+        self.dirty = True
+
+    # Record listener on MarketFeed: chain options stream in option_greeks mode
+    def on_record(self, record):
+        if record.oi is not None:
+            self.oi[record.instrument] = record.oi
+
+    def get_chain(self, index_name, expiry=None):
+        index_name = index_name.lower()
+        if expiry is None:
+            expiries = list_expiries(index_name)
+            if not expiries:
+                return None
+            expiry = expiries[0]
+
+        # Rebuilt when an instrument refresh swapped in a new snapshot
+        chain = self.chains.get((index_name, expiry))
+        if chain is None or chain.version != get_snapshot().version:
+            chain = OptionChain.build(index_name, expiry)
+            if chain is None:
+                return None
+            self.chains[(index_name, expiry)] = chain
+        return chain
+
+    def compute(self, chain):
+        spot = self.prices.get(chain.underlying_key)
+        if not spot:
+            return None
+
+        result = chain.compute(self.prices, spot, self.oi)
+        self.results[(chain.index_name, chain.expiry)] = result
+        return result
+
+    # -------------------------
+    # FEED WATCHES (streamed while a chain has owners)
+    # -------------------------
+    def acquire(self, chain):
+        chain_id = (chain.index_name, chain.expiry)
+        self.owners[chain_id] = self.owners.get(chain_id, 0) + 1
+        if self.owners[chain_id] > 1:
+            return
+
+        options = list(chain.keys)
+        underlying = [chain.underlying_key] if chain.underlying_key else []
+        self.watching[chain_id] = (options, underlying)
+
+        # Options in option_greeks mode for OI (PCR); the underlying needs only ltpc
+        new = self._ref(options, 1)
+        if new:
+            self.manager.watch(new, mode="option_greeks", owner="chains")
+        new = self._ref(underlying, 1)
+        if new:
+            self.manager.watch(new, owner="chains")
+
+    def release(self, chain_id):
+        if chain_id not in self.owners:
+            return
+
+        self.owners[chain_id] -= 1
+        if self.owners[chain_id] > 0:
+            return
+        del self.owners[chain_id]
+
+        options, underlying = self.watching.pop(chain_id)
+        gone = self._ref(options + underlying, -1)
+        if gone:
+            # Only our claim and its option_greeks request: positions or the hub may still watch them
+            self.manager.unwatch(gone, owner="chains")
+
+    def hold(self, chain, seconds=CHAIN_REQUEST_HOLD_SECONDS):
+        self.acquire(chain)
+        asyncio.get_running_loop().call_later(seconds, self.release, (chain.index_name, chain.expiry))
+
+    def _ref(self, keys, delta):
+        changed = []
+        for key in keys:
+            count = self.refs.get(key, 0) + delta
+            if count > 0:
+                self.refs[key] = count
+            else:
+                self.refs.pop(key, None)
+
+            # First owner in, or last owner out
+            if count == (1 if delta > 0 else 0):
+                changed.append(key)
+        return changed
+
+    # -------------------------
+    # CLIENT HANDLING
+    # -------------------------
+    def add_client(self, ws, chain):
+        chain_id = (chain.index_name, chain.expiry)
+        previous = self.clients.get(ws)
+        if previous == chain_id:
+            return
+
+        self.acquire(chain)
+        self.clients[ws] = chain_id
+        if previous:
+            self.release(previous)
+
+    def remove_client(self, ws):
+        chain_id = self.clients.pop(ws, None)
+        if chain_id:
+            self.release(chain_id)
+
+    # -------------------------
+    # CONFLATED RECOMPUTE LOOP
+    # -------------------------
+    async def run(self):
+        while True:
+            await asyncio.sleep(CHAIN_REFRESH_SECONDS)
+
+            if not self.dirty or not self.clients:
+                continue
+            self.dirty = False
+
+            for chain_id in set(self.clients.values()):
+                chain = self.chains.get(chain_id)
+                result = self.compute(chain) if chain else None
+                if result:
+                    await self.broadcast(chain_id, result)
+
+    async def broadcast(self, chain_id, result):
+        for ws, watched in list(self.clients.items()):
+            if watched != chain_id:
+                continue
+            try:
+                await ws.send_json(result)
+            except:
+                pass
+
+
+# Singleton
+chain_analytics = ChainAnalytics()
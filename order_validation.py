@@ -0,0 +1,81 @@
+"""
+Pre-trade checks against the instrument table.
+
+Runs before any broker call so the orders the broker would reject come
+back in microseconds rather than after a network round trip:
+
+    quantity   positive multiple of lot_size, at most freeze_quantity
+    expiry     contract not expired
+    prices     positive, on the tick_size grid (tick_size is in paise)
+
+Off-tick prices are rounded to the nearest tick when ORDER_ROUND_TO_TICK=1
+(default) and rejected otherwise. Instruments missing from the table
+(segments we don't load) pass through unchecked and the broker decides.
+"""
+import os
+import time
+
+from instruments import find_instrument
+from metrics import ORDER_CHECKS
+
+ORDER_ROUND_TO_TICK = os.getenv("ORDER_ROUND_TO_TICK", "1") == "1"
+
+
+def _reject(op, message):
+    ORDER_CHECKS.labels(op, "rejected").inc()
+    return {"status": "error", "message": message}
+
+
+def validate_order(instrument_token, quantity, prices, op="place", now_ms=None):
+    """
+    prices: {"entry_price": 38.0, ...}; None values (fields not being
+    modified) are skipped.
+
+    Returns {"status": "success", "quantity", "prices", "adjusted", "checked"}
+    with prices on the tick grid, or an error dict to return as is.
+    """
+
+    item = find_instrument(instrument_key=instrument_token) if instrument_token else None
+    if item is None:
+        ORDER_CHECKS.labels(op, "unchecked").inc()
+        return {"status": "success", "quantity": quantity, "prices": prices, "adjusted": [], "checked": False}
+
+    symbol = item.get("trading_symbol") or instrument_token
+
+    lot = int(item.get("lot_size") or 1)
+    if quantity <= 0 or quantity % lot:
+        return _reject(op, f"{symbol}: quantity {quantity} is not a multiple of lot size {lot}")
+
+    freeze = item.get("freeze_quantity")
+    if freeze and quantity > freeze:
+        return _reject(op, f"{symbol}: quantity {quantity} is over the freeze limit {int(freeze)}")
+
+    expiry = item.get("expiry")
+    if expiry and expiry < (now_ms or time.time() * 1000):
+        return _reject(op, f"{symbol} expired on {time.strftime('%d %b %Y', time.gmtime(expiry / 1000))}")
+
+    # Compare in ticks (paise / tick_size) so 0.05 steps don't hit float error
+    tick = item.get("tick_size") or 5.0
+    checked, adjusted = {}, []
+
+    for name, price in prices.items():
+        if price is None:
+            checked[name] = None
+            continue
+        if price <= 0:
+            return _reject(op, f"{symbol}: {name} must be positive")
+
+        ticks = price * 100 / tick
+        nearest = round(ticks)
+        if abs(ticks - nearest) > 1e-6:
+            if not ORDER_ROUND_TO_TICK:
+                return _reject(op, f"{symbol}: {name} {price} is not a multiple of tick {tick / 100:g}")
+
+            rounded = round(max(nearest, 1) * tick / 100, 2)
+            adjusted.append(f"{name} {price} → {rounded}")
+            price = rounded
+
+        checked[name] = price
+
+    ORDER_CHECKS.labels(op, "adjusted" if adjusted else "passed").inc()
+    return {"status": "success", "quantity": quantity, "prices": checked, "adjusted": adjusted, "checked": True}
@@ -0,0 +1,302 @@
+"""
+In-process position book with tick-driven mark-to-market.
+
+Fills come from orders placed by triggered GTT rules. reconcile() walks
+the ACTIVE GTTs in gtt_collection, asks the broker which rules turned
+into orders and what they filled at, and records each fill once on the
+GTT's Mongo document. load() replays those fills at startup.
+
+Unrealised P&L is updated per tick: on_tick() is a dict lookup for the
+instrument and, for an open position, one multiply and a running-total
+adjustment, so cost doesn't grow with the number of positions. Changed
+positions go to /ws/positions clients at most once per refresh cycle.
+
+    POSITIONS_REFRESH_SECONDS=0.5   websocket conflation window
+    POSITIONS_RECONCILE_SECONDS=30  broker reconciliation interval (market hours)
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+
+from config import get_gtt_collection
+from live_ltp_manager import ltp_manager
+from metrics import Gauge, MONGO_READ_SECONDS, MONGO_SECONDS
+
+log = logging.getLogger("positions")
+
+POSITIONS_REFRESH_SECONDS = float(os.getenv("POSITIONS_REFRESH_SECONDS", "0.5"))
+POSITIONS_RECONCILE_SECONDS = float(os.getenv("POSITIONS_RECONCILE_SECONDS", "30"))
+
+# Rule states that can still turn into an order
+OPEN_RULE_STATES = {"SCHEDULED", "PENDING", "OPEN", "ACTIVE"}
+
+# Order states after which filled_quantity won't change
+FINAL_ORDER_STATES = {"complete", "cancelled", "rejected"}
+
+
+class Position:
+    __slots__ = ("instrument", "symbol", "quantity", "avg_price", "realised", "ltp", "unrealised")
+
+    def __init__(self, instrument, symbol=None):
+        self.instrument = instrument
+        self.symbol = symbol
+
+        # Signed: long > 0, short < 0
+        self.quantity = 0
+        self.avg_price = 0.0
+        self.realised = 0.0
+        self.ltp = None
+        self.unrealised = 0.0
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class PositionBook:
+    def __init__(self):
+        # instrument → Position (flat positions stay for their realised P&L)
+        self.positions = {}
+
+        # Order ids already applied
+        self.fills = set()
+
+        # Running totals, adjusted per tick rather than summed
+        self.unrealised = 0.0
+        self.realised = 0.0
+
+        # Instruments changed since the last broadcast
+        self.dirty = set()
+        self.clients = set()
+
+        # Fills land from the reconcile thread while ticks mark from the feed thread
+        self.lock = threading.Lock()
+
+        # Watches go through the loop: in worker mode they write to the hub socket
+        self.loop = None
+
+    def set_loop(self, loop):
+        self.loop = loop
+
+    # -------------------------
+    # FILLS (average cost)
+    # -------------------------
+    def apply_fill(self, instrument, side, quantity, price, order_id=None, symbol=None):
+        signed = quantity if side.upper() == "BUY" else -quantity
+
+        with self.lock:
+            if order_id:
+                if order_id in self.fills:
+                    return False
+                self.fills.add(order_id)
+
+            position = self.positions.get(instrument)
+            if position is None:
+                position = self.positions[instrument] = Position(instrument, symbol)
+
+            held = position.quantity
+            if held == 0 or (held > 0) == (signed > 0):
+                # Adding to the position
+                total = abs(held) + quantity
+                position.avg_price = (position.avg_price * abs(held) + price * quantity) / total
+            else:
+                # Reducing / closing, maybe flipping through zero
+                closed = min(quantity, abs(held))
+                pnl = closed * (price - position.avg_price) * (1 if held > 0 else -1)
+                position.realised += pnl
+                self.realised += pnl
+                if abs(signed) > abs(held):
+                    position.avg_price = price
+
+            position.quantity = held + signed
+            if position.quantity == 0:
+                position.avg_price = 0.0
+
+            last = ltp_manager.last_values.get(instrument)
+            self._mark(position, last[0] if last else position.ltp or price)
+
+        # Keep the instrument streaming for as long as we hold it
+        if not held and position.quantity:
+            self._on_loop(ltp_manager.watch, [instrument], owner="positions")
+        elif held and not position.quantity:
+            self._on_loop(ltp_manager.unwatch, [instrument], owner="positions")
+
+        log.info("📒 Fill %s %s %d @ %.2f → net %d", side, symbol or instrument, quantity, price, position.quantity)
+        return True
+
+    def _on_loop(self, fn, *args, **kwargs):
+        if self.loop is None:
+            fn(*args, **kwargs)
+        else:
+            self.loop.call_soon_threadsafe(lambda: fn(*args, **kwargs))
+
+    # -------------------------
+    # MARK TO MARKET (tick listener on LiveLTPManager)
+    # -------------------------
+    def on_tick(self, instrument, ltp):
+        position = self.positions.get(instrument)
+        if position is None or position.ltp == ltp:
+            return
+
+        with self.lock:
+            self._mark(position, ltp)
+
+    def _mark(self, position, ltp):
+        unrealised = (ltp - position.avg_price) * position.quantity
+        self.unrealised += unrealised - position.unrealised
+        position.unrealised = unrealised
+        position.ltp = ltp
+        self.dirty.add(position.instrument)
+
+    def totals(self):
+        return {
+            "unrealised": round(self.unrealised, 2),
+            "realised": round(self.realised, 2),
+            "open": sum(1 for p in self.positions.values() if p.quantity)
+        }
+
+    def snapshot(self):
+        return {
+            "type": "positions",
+            "snapshot": True,
+            "positions": [p.as_dict() for p in self.positions.values()],
+            "totals": self.totals()
+        }
+
+    # -------------------------
+    # PERSISTENCE / BROKER RECONCILIATION
+    # -------------------------
+    def load(self):
+        """Replays fills recorded on GTT documents (startup)."""
+
+        with MONGO_READ_SECONDS.labels("load_fills").time():
+            docs = list(get_gtt_collection().find(
+                {"fills.0": {"$exists": True}},
+                {"instrument_token": 1, "fills": 1}
+            ))
+
+        count = 0
+        for doc in docs:
+            for fill in doc["fills"]:
+                count += self.apply_fill(doc["instrument_token"], fill["side"], fill["quantity"],
+                                         fill["price"], fill["order_id"], fill.get("symbol"))
+        log.info("📒 Position book loaded: %d fills, %d open positions", count, self.totals()["open"])
+
+    def reconcile(self):
+        """Picks up fills of triggered GTT rules. Runs in a worker thread."""
+
+        from utils.gtt.get_gtt_order_details import get_gtt_order_details
+        from utils.gtt.get_order_status import get_order_status
+
+        collection = get_gtt_collection()
+        with MONGO_READ_SECONDS.labels("find_active_gtt").time():
+            docs = list(collection.find({"status": "ACTIVE"}, {"gtt_order_id": 1, "instrument_token": 1}))
+
+        for doc in docs:
+            gtt_id = doc["gtt_order_id"]
+            result = get_gtt_order_details(gtt_id)
+            if result["status"] != "success":
+                continue
+
+            data = result["data"]
+            data = data.to_dict() if hasattr(data, "to_dict") else data
+            details = (data.get("data") or [None])[0]
+            if not details:
+                continue
+
+            done = True
+            for rule in details.get("rules") or []:
+                order_id = rule.get("order_id")
+                if (rule.get("status") or "").upper() in OPEN_RULE_STATES:
+                    done = False
+                if not order_id or order_id in self.fills:
+                    continue
+
+                order = get_order_status(order_id)
+                if order["status"] != "success":
+                    done = False
+                    continue
+
+                order = order["data"]
+                if order.get("status") not in FINAL_ORDER_STATES:
+                    done = False
+                    continue
+                if not order.get("filled_quantity"):
+                    with self.lock:
+                        self.fills.add(order_id)
+                    continue
+
+                fill = {
+                    "order_id": order_id,
+                    "strategy": rule.get("strategy"),
+                    "side": order.get("transaction_type") or rule.get("transaction_type"),
+                    "quantity": order["filled_quantity"],
+                    "price": order.get("average_price") or 0.0,
+                    "symbol": details.get("trading_symbol"),
+                    "filled_at": time.time()
+                }
+
+                # Guarded on order_id so concurrent workers record a fill once
+                with MONGO_SECONDS.labels("record_fill").time():
+                    collection.update_one(
+                        {"gtt_order_id": gtt_id, "fills.order_id": {"$ne": order_id}},
+                        {"$push": {"fills": fill}}
+                    )
+                self.apply_fill(doc["instrument_token"], fill["side"], fill["quantity"],
+                                fill["price"], order_id, fill["symbol"])
+
+            expired = details.get("expires_at") and details["expires_at"] < time.time() * 1000
+            if done or expired:
+                with MONGO_SECONDS.labels("close_gtt").time():
+                    collection.update_one({"gtt_order_id": gtt_id}, {"$set": {"status": "CLOSED"}})
+
+    # -------------------------
+    # CLIENT HANDLING
+    # -------------------------
+    def add_client(self, ws):
+        self.clients.add(ws)
+
+    def remove_client(self, ws):
+        self.clients.discard(ws)
+
+    # -------------------------
+    # CONFLATED BROADCAST LOOP
+    # -------------------------
+    async def run(self):
+        while True:
+            await asyncio.sleep(POSITIONS_REFRESH_SECONDS)
+
+            if not self.dirty or not self.clients:
+                continue
+
+            with self.lock:
+                changed, self.dirty = self.dirty, set()
+                message = {
+                    "type": "positions",
+                    "positions": [self.positions[i].as_dict() for i in changed],
+                    "totals": self.totals()
+                }
+
+            for ws in list(self.clients):
+                try:
+                    await ws.send_json(message)
+                except:
+                    self.clients.discard(ws)
+
+    async def reconcile_loop(self, is_open=None):
+        while True:
+            if is_open is None or is_open():
+                try:
+                    await asyncio.to_thread(self.reconcile)
+                except Exception as e:
+                    log.error("❌ Position reconcile failed: %s", e)
+
+            await asyncio.sleep(POSITIONS_RECONCILE_SECONDS)
+
+
+# Singleton
+position_book = PositionBook()
+
+Gauge("positions_open", "Open positions in the position book", fn=lambda: position_book.totals()["open"])
+Gauge("positions_unrealised_pnl", "Unrealised P&L across positions", fn=lambda: round(position_book.unrealised, 2))
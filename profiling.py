@@ -0,0 +1,200 @@
+"""
+Opt-in profiling, all off by default.
+
+    PROFILING_ENABLED=1   allow the /debug/* endpoints (sampling profiler, span toggle)
+    TRACE_SPANS=1         time each tick from on_message to broadcast completion
+    TRACE_SLOW_MS=50      log ticks slower than this end to end
+    LOOP_STALL_MS=200     log event loop stalls longer than this, with the loop's stack
+
+Disabled, the tick path pays one attribute check per message.
+"""
+import asyncio
+import collections
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+
+from metrics import Counter, Histogram
+
+log = logging.getLogger("profiling")
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+TRACE_SPANS = os.getenv("TRACE_SPANS", "0") == "1"
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "50"))
+LOOP_STALL_MS = float(os.getenv("LOOP_STALL_MS", "0"))
+
+SPAN_SECONDS = Histogram("tick_span_seconds", "Tick latency per pipeline stage", ["stage"])
+LOOP_STALLS = Counter("event_loop_stalls_total", "Event loop stalls above LOOP_STALL_MS")
+LOOP_STALL_SECONDS = Histogram("event_loop_stall_seconds", "Duration of event loop stalls")
+
+
+# -------------------------
+# TICK SPANS (on_message → update_ltp → broadcast)
+# -------------------------
+class SpanTracer:
+    def __init__(self, enabled=TRACE_SPANS, slow_ms=TRACE_SLOW_MS):
+        self.enabled = enabled
+        self.slow = slow_ms / 1000.0
+
+    def start(self):
+        """Receipt timestamp for a message, 0 when tracing is off."""
+        return time.perf_counter() if self.enabled else 0
+
+    def span(self, stage, start):
+        if not start:
+            return 0
+        elapsed = time.perf_counter() - start
+        SPAN_SECONDS.labels(stage).observe(elapsed)
+        return elapsed
+
+    def done(self, received, batch_size):
+        """Called after broadcast completes for a batch received at `received`."""
+        elapsed = self.span("tick_to_broadcast", received)
+        if elapsed > self.slow:
+            log.warning("🐢 Slow tick path: %.1f ms from receipt to broadcast (%d instruments)",
+                        elapsed * 1000, batch_size)
+
+
+tracer = SpanTracer()
+
+
+# -------------------------
+# SAMPLING PROFILER (toggled at runtime)
+# -------------------------
+class SamplingProfiler:
+    """
+    Samples every thread's stack on a timer and counts collapsed stacks
+    ("a;b;c count" lines, flamegraph.pl / speedscope compatible).
+    """
+
+    def __init__(self):
+        self.thread = None
+        self.running = False
+        self.interval = 0.005
+        self.samples = collections.Counter()
+        self.started_at = None
+        self.sample_count = 0
+
+    def start(self, interval_ms=5):
+        if self.running:
+            return False
+
+        self.interval = max(interval_ms, 1) / 1000.0
+        self.samples = collections.Counter()
+        self.sample_count = 0
+        self.started_at = time.time()
+        self.running = True
+
+        self.thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self.thread.start()
+        log.info("🔬 Sampling profiler started (%.0f ms interval)", self.interval * 1000)
+        return True
+
+    def stop(self):
+        if not self.running:
+            return False
+        self.running = False
+        self.thread.join()
+        log.info("🔬 Sampling profiler stopped after %d samples", self.sample_count)
+        return True
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+
+        while self.running:
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+
+                stack.append(names.get(ident, str(ident)))
+                self.samples[";".join(reversed(stack))] += 1
+
+            self.sample_count += 1
+            time.sleep(self.interval)
+
+    def collapsed(self, limit=None):
+        return "\n".join(
+            f"{stack} {count}" for stack, count in self.samples.most_common(limit)
+        ) + "\n"
+
+    def status(self):
+        return {
+            "running": self.running,
+            "interval_ms": self.interval * 1000,
+            "samples": self.sample_count,
+            "started_at": self.started_at
+        }
+
+
+profiler = SamplingProfiler()
+
+
+# -------------------------
+# EVENT LOOP STALL DETECTOR
+# -------------------------
+class LoopStallMonitor:
+    """
+    The loop bumps a heartbeat; a watchdog thread notices when it stops
+    and logs what the loop thread is executing at that moment.
+    """
+
+    def __init__(self, threshold_ms=LOOP_STALL_MS):
+        self.threshold = threshold_ms / 1000.0
+        self.heartbeat = time.monotonic()
+        self.loop_thread = None
+        self.stalled_since = None
+
+    async def beat(self):
+        self.loop_thread = threading.get_ident()
+        interval = self.threshold / 4
+
+        while True:
+            now = time.monotonic()
+            if self.stalled_since is not None:
+                stall = now - self.stalled_since
+                LOOP_STALL_SECONDS.observe(stall)
+                log.warning("🐢 Event loop recovered after %.0f ms", stall * 1000)
+                self.stalled_since = None
+
+            self.heartbeat = now
+            await asyncio.sleep(interval)
+
+    def watch(self):
+        while True:
+            time.sleep(self.threshold / 2)
+            if self.stalled_since is not None:
+                continue
+
+            late = time.monotonic() - self.heartbeat
+            if late < self.threshold:
+                continue
+
+            self.stalled_since = self.heartbeat
+            LOOP_STALLS.inc()
+
+            frame = sys._current_frames().get(self.loop_thread)
+            stack = "".join(traceback.format_stack(frame)) if frame else "<unavailable>"
+            log.warning("🐢 Event loop stalled for %.0f ms, loop is in:\n%s", late * 1000, stack)
+
+    def start(self):
+        if self.threshold <= 0:
+            return
+        asyncio.create_task(self.beat())
+        threading.Thread(target=self.watch, name="loop-stall-watchdog", daemon=True).start()
+        log.info("🐢 Loop stall detection on (> %.0f ms)", self.threshold * 1000)
+
+
+stall_monitor = LoopStallMonitor()
@@ -9,8 +9,13 @@ let ltpSocket = null;
 let balanceSocket = null;
 let autoPriceEnabled = true;
 
-const CACHE_KEY = "upstox_instruments_cache";
-const CACHE_VERSION = "v2";
+// Binary /ws/ltp session: instrument id → instrument_key
+let ltpInstrumentIds = {};
+
+// Instrument cache: IndexedDB, kept current through /instruments/sync
+const CACHE_KEY = "upstox_instruments_cache"; // old localStorage cache, removed on load
+const CACHE_DB = "upstox_cache";
+const CACHE_DB_VERSION = 1;
 
 // Dummy values
 let BALANCE = 0;
@@ -120,27 +125,32 @@ function connectLtpSocket(callback) {
     return;
   }
 
-  ltpSocket = new WebSocket(getWsBaseUrl() + "/ws/ltp");
+  ltpSocket = new WebSocket(getWsBaseUrl() + "/ws/ltp?format=binary");
+  ltpSocket.binaryType = "arraybuffer";
+  ltpInstrumentIds = {};
+
   ltpSocket.onopen = function () {
     console.log("✅ LTP Socket Connected");
     if (callback) callback();
   };
 
   ltpSocket.onmessage = function (event) {
-    const data = JSON.parse(event.data);
-
-    if (data.ltp) {
-      liveLtp = data.ltp;
-
-      document.getElementById("liveLtpDisplay").innerHTML =
-        `₹${liveLtp.toFixed(2)}`;
-      document.getElementById("ltpValue").innerHTML = `₹${liveLtp.toFixed(2)}`;
+    if (event.data instanceof ArrayBuffer) {
+      decodeLtpFrame(event.data);
+      return;
+    }
 
-      // ✅ Auto update Entry / Target / Stoploss
-      updateDefaultOrderPrices();
+    const data = JSON.parse(event.data);
 
-      updateMarginCalculations();
+    // Instrument ids for this session, sent before their first frame
+    if (data.type === "map") {
+      Object.entries(data.ids).forEach(([key, id]) => {
+        ltpInstrumentIds[id] = key;
+      });
+      return;
     }
+
+    applyLtp(data.instrument, data.ltp);
   };
 
   ltpSocket.onerror = function (err) {
@@ -148,6 +158,36 @@ function connectLtpSocket(callback) {
   };
 }
 
+// Frame: uint16 count, then count x (uint16 id, float64 ltp), little endian
+function decodeLtpFrame(buffer) {
+  const view = new DataView(buffer);
+  const count = view.getUint16(0, true);
+
+  for (let i = 0, offset = 2; i < count; i++, offset += 10) {
+    const id = view.getUint16(offset, true);
+    const ltp = view.getFloat64(offset + 2, true);
+    applyLtp(ltpInstrumentIds[id], ltp);
+  }
+}
+
+function applyLtp(instrument, ltp) {
+  if (!ltp) return;
+  if (selectedInstrument && instrument && instrument !== selectedInstrument) {
+    return;
+  }
+
+  liveLtp = ltp;
+
+  document.getElementById("liveLtpDisplay").innerHTML =
+    `₹${liveLtp.toFixed(2)}`;
+  document.getElementById("ltpValue").innerHTML = `₹${liveLtp.toFixed(2)}`;
+
+  // ✅ Auto update Entry / Target / Stoploss
+  updateDefaultOrderPrices();
+
+  updateMarginCalculations();
+}
+
 function connectBalanceSocket() {
   if (balanceSocket && balanceSocket.readyState === WebSocket.OPEN) return;
 
@@ -193,37 +233,108 @@ function connectBalanceSocket() {
   };
 }
 
+// ----------------------------
+// INSTRUMENT CACHE (IndexedDB: "rows" by instrument_key, "meta" holds the version)
+// ----------------------------
+function openInstrumentDb() {
+  return new Promise((resolve, reject) => {
+    if (!window.indexedDB) return reject(new Error("IndexedDB unavailable"));
+
+    const req = indexedDB.open(CACHE_DB, CACHE_DB_VERSION);
+    req.onupgradeneeded = () => {
+      const db = req.result;
+      db.createObjectStore("rows", { keyPath: "instrument_key" });
+      db.createObjectStore("meta");
+    };
+    req.onsuccess = () => resolve(req.result);
+    req.onerror = () => reject(req.error);
+  });
+}
+
+function idbRequest(req) {
+  return new Promise((resolve, reject) => {
+    req.onsuccess = () => resolve(req.result);
+    req.onerror = () => reject(req.error);
+  });
+}
+
+async function readInstrumentCache(db) {
+  const tx = db.transaction(["rows", "meta"], "readonly");
+  const [version, rows] = await Promise.all([
+    idbRequest(tx.objectStore("meta").get("version")),
+    idbRequest(tx.objectStore("rows").getAll()),
+  ]);
+  return version ? { version, rows } : null;
+}
+
+function writeInstrumentCache(db, sync) {
+  return new Promise((resolve, reject) => {
+    const tx = db.transaction(["rows", "meta"], "readwrite");
+    const rows = tx.objectStore("rows");
+
+    if (sync.mode === "full") {
+      rows.clear();
+      sync.data.forEach((item) => rows.put(item));
+    } else {
+      sync.remove.forEach((key) => rows.delete(key));
+      sync.upsert.forEach((item) => rows.put(item));
+    }
+    tx.objectStore("meta").put(sync.version, "version");
+
+    tx.oncomplete = resolve;
+    tx.onerror = () => reject(tx.error);
+  });
+}
+
+function applyInstrumentSync(rows, sync) {
+  if (sync.mode === "full") return sync.data;
+
+  const byKey = new Map(rows.map((item) => [item.instrument_key, item]));
+  sync.remove.forEach((key) => byKey.delete(key));
+  sync.upsert.forEach((item) => byKey.set(item.instrument_key, item));
+  return Array.from(byKey.values());
+}
+
 // ----------------------------
 // LOAD INSTRUMENTS
 // ----------------------------
 async function loadInstruments() {
-  const today = new Date().toISOString().split("T")[0];
-
-  const cacheRaw = localStorage.getItem(CACHE_KEY);
-  if (cacheRaw) {
-    const cache = JSON.parse(cacheRaw);
-    if (cache.version === CACHE_VERSION && cache.date === today) {
-      allInstruments = cache.data;
-      instrumentsLoaded = true;
-      return;
-    }
+  localStorage.removeItem(CACHE_KEY);
+
+  let db = null;
+  let cache = null;
+  try {
+    db = await openInstrumentDb();
+    cache = await readInstrumentCache(db);
+  } catch (err) {
+    console.warn("Instrument cache unavailable:", err);
+  }
+
+  // Cached list is usable straight away; the sync below only patches it
+  if (cache && !instrumentsLoaded) {
+    allInstruments = cache.rows;
+    instrumentsLoaded = true;
   }
 
-  // ✅ REAL API FETCH
-  const res = await fetch("/instruments/all");
-  const json = await res.json();
+  // ✅ REAL API FETCH (a few bytes when nothing changed)
+  const version = cache ? cache.version : "";
+  const res = await fetch(`/instruments/sync?version=${encodeURIComponent(version)}`);
+  const sync = await res.json();
 
-  allInstruments = json.data;
+  // Server still loading the instrument master in the background
+  if (sync.status !== "success") {
+    setTimeout(loadInstruments, 2000);
+    return;
+  }
+
+  if (sync.mode === "unchanged") return;
+
+  allInstruments = applyInstrumentSync(cache ? cache.rows : [], sync);
   instrumentsLoaded = true;
 
-  localStorage.setItem(
-    CACHE_KEY,
-    JSON.stringify({
-      version: CACHE_VERSION,
-      date: today,
-      data: allInstruments,
-    }),
-  );
+  if (db) {
+    writeInstrumentCache(db, sync).catch((err) => console.warn("Instrument cache not saved:", err));
+  }
 }
 
 function syncQuantityFromLots() {
@@ -626,7 +737,8 @@ document
       const json = await res.json();
 
       if (json.status === "success") {
-        showToast("✅ GTT Order Placed: " + json.gtt_order_id);
+        const adjusted = json.adjusted && json.adjusted.length ? ` (rounded to tick: ${json.adjusted.join(", ")})` : "";
+        showToast("✅ GTT Order Placed: " + json.gtt_order_id + adjusted);
       } else {
         showToast("❌ " + json.message);
       }
@@ -0,0 +1,142 @@
+"""
+Static files and pages, compressed once instead of on every request.
+
+build() reads every file under static/, gives it a content-hashed name
+(css/style.css → css/style.3f2a9c1b0d.css) and keeps gzip and, if the
+optional brotli package is installed, brotli copies next to the raw
+bytes. Pages are rendered once with their /static/ links rewritten to
+the hashed names.
+
+    hashed asset   Cache-Control: public, max-age=31536000, immutable
+    plain asset    no-cache + ETag (old links still work, revalidated)
+    page           no-cache + ETag, so a deploy shows on the next load
+"""
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import threading
+
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+log = logging.getLogger("static_assets")
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+# Below this, compression costs more than the bytes it saves (same as GZipMiddleware)
+MIN_COMPRESS_SIZE = 1000
+
+STATIC_LINK = re.compile(r"/static/[\w./-]+")
+
+
+class Asset:
+    __slots__ = ("content_type", "etag", "bodies")
+
+    def __init__(self, body, content_type):
+        self.content_type = content_type
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+
+        # Preferred encoding first
+        self.bodies = {}
+        if len(body) >= MIN_COMPRESS_SIZE:
+            if brotli is not None:
+                self.bodies["br"] = brotli.compress(body, quality=11)
+            self.bodies["gzip"] = gzip.compress(body, 9, mtime=0)
+        self.bodies["identity"] = body
+
+    def response(self, request, cache_control=REVALIDATE):
+        headers = {"Cache-Control": cache_control, "ETag": self.etag, "Vary": "Accept-Encoding"}
+
+        if self.etag in request.headers.get("if-none-match", ""):
+            return Response(status_code=304, headers=headers)
+
+        accept = request.headers.get("accept-encoding", "")
+        for encoding, body in self.bodies.items():
+            if encoding == "identity" or encoding in accept:
+                break
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+
+        return Response(body, media_type=self.content_type, headers=headers)
+
+
+class AssetStore:
+    def __init__(self, static_dir="static", url_prefix="/static"):
+        self.static_dir = static_dir
+        self.url_prefix = url_prefix
+        self.lock = threading.Lock()
+        self.built = False
+
+        # path under static/ → (Asset, Cache-Control); plain and hashed names
+        self.files = {}
+
+        # "/static/css/style.css" → "/static/css/style.<hash>.css"
+        self.urls = {}
+
+        # page name → Asset
+        self.pages = {}
+
+    def build(self):
+        files, urls = {}, {}
+
+        for root, _, names in os.walk(self.static_dir):
+            for name in names:
+                path = os.path.join(root, name)
+                rel = os.path.relpath(path, self.static_dir).replace(os.sep, "/")
+
+                with open(path, "rb") as f:
+                    body = f.read()
+
+                content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+                if content_type.startswith("text/") or content_type.endswith("javascript"):
+                    content_type += "; charset=utf-8"
+                asset = Asset(body, content_type)
+
+                stem, ext = os.path.splitext(rel)
+                hashed = f"{stem}.{asset.etag[1:11]}{ext}"
+
+                files[rel] = (asset, REVALIDATE)
+                files[hashed] = (asset, IMMUTABLE)
+                urls[f"{self.url_prefix}/{rel}"] = f"{self.url_prefix}/{hashed}"
+
+        with self.lock:
+            self.files, self.urls = files, urls
+            self.built = True
+
+        size = sum(len(asset.bodies["identity"]) for asset, cache in files.values() if cache == IMMUTABLE)
+        log.info("📦 Static assets: %d files, %d bytes, brotli %s", len(urls), size, "on" if brotli else "off")
+
+    def _ensure(self):
+        if not self.built:
+            self.build()
+
+    def rewrite(self, html):
+        self._ensure()
+        return STATIC_LINK.sub(lambda m: self.urls.get(m.group(0), m.group(0)), html)
+
+    def add_page(self, name, html):
+        self.pages[name] = Asset(self.rewrite(html).encode("utf-8"), "text/html; charset=utf-8")
+
+    def page(self, name, request):
+        return self.pages[name].response(request)
+
+    def file(self, path, request):
+        self._ensure()
+        entry = self.files.get(path)
+        if entry is None:
+            return Response(status_code=404)
+
+        asset, cache_control = entry
+        return asset.response(request, cache_control)
+
+
+# Singleton
+asset_store = AssetStore()
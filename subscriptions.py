@@ -0,0 +1,182 @@
+"""
+Live subscriptions persisted in subscribed_symbols and restored at startup.
+
+Every change to what LiveLTPManager streams (the active instrument and
+watched instruments, with their symbol and feed mode) marks the store
+dirty; at most once per SUBSCRIPTION_FLUSH_SECONDS the difference from
+what was last written goes to Mongo as a single bulk_write, which also
+re-stamps updated_at on everything still streamed (last seen, not last
+changed). Shutdown flushes once more.
+
+restore() runs before the feed connects and puts the saved instruments
+back into the manager without touching the streamer, so the feed's open
+replays them in one chunked bulk subscribe and prices are flowing before
+the first browser reconnects. Restored watches are held under their own
+owner for SUBSCRIPTION_CLAIM_SECONDS, then released: whatever a chain,
+position or hub worker watched again by then keeps streaming.
+
+    SUBSCRIPTION_FLUSH_SECONDS=2
+    SUBSCRIPTION_MAX_AGE_DAYS=3     entries not seen for longer are not restored
+    SUBSCRIPTION_RESTORE_TIMEOUT=5
+    SUBSCRIPTION_CLAIM_SECONDS=300
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+
+from config import get_subscribed_collection
+from live_ltp_manager import ltp_manager
+from metrics import MONGO_READ_SECONDS, MONGO_SECONDS
+
+log = logging.getLogger("subscriptions")
+
+SUBSCRIPTION_FLUSH_SECONDS = float(os.getenv("SUBSCRIPTION_FLUSH_SECONDS", "2"))
+SUBSCRIPTION_MAX_AGE_DAYS = float(os.getenv("SUBSCRIPTION_MAX_AGE_DAYS", "3"))
+
+# Startup waits this long for Mongo before connecting the feed without restored keys
+SUBSCRIPTION_RESTORE_TIMEOUT = float(os.getenv("SUBSCRIPTION_RESTORE_TIMEOUT", "5"))
+
+# Chains, positions and workers have this long after startup to take restored watches over
+SUBSCRIPTION_CLAIM_SECONDS = float(os.getenv("SUBSCRIPTION_CLAIM_SECONDS", "300"))
+
+
+class SubscriptionStore:
+    def __init__(self, manager=ltp_manager, collection=get_subscribed_collection):
+        self.manager = manager
+        self.collection = collection
+
+        # instrument → (trading_symbol, mode, active, watched) as last written
+        self.persisted = {}
+
+        self.lock = threading.Lock()
+        self.timer = None
+        self.restoring = False
+
+        # Watched keys put back by restore(), until release_restored()
+        self.restored = set()
+
+    def state(self):
+        manager = self.manager
+        active = manager.active_instrument
+
+        return {
+            key: (
+                manager.instrument_to_symbol.get(key),
+                manager.active_mode if key == active else manager.watch_mode(key),
+                key in manager.subscribed,
+                key in manager.watched
+            )
+            for key in manager.subscribed | manager.watched
+        }
+
+    # -------------------------
+    # DEBOUNCED WRITES
+    # -------------------------
+    def on_change(self):
+        if self.restoring:
+            return
+
+        with self.lock:
+            if self.timer is not None:
+                return
+            self.timer = threading.Timer(SUBSCRIPTION_FLUSH_SECONDS, self.flush)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def flush(self):
+        from pymongo import DeleteMany, UpdateMany, UpdateOne
+
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+            self.timer = None
+
+        current = self.state()
+        now = time.time()
+        ops = [
+            UpdateOne({"_id": key}, {"$set": {
+                "instrument_key": key, "trading_symbol": symbol, "mode": mode,
+                "active": active, "watched": watched, "updated_at": now
+            }}, upsert=True)
+            for key, (symbol, mode, active, watched) in current.items()
+            if self.persisted.get(key) != (symbol, mode, active, watched)
+        ]
+
+        # Still streamed but unchanged: only re-stamp, so long-lived watches don't age out
+        unchanged = [key for key, entry in current.items() if self.persisted.get(key) == entry]
+        if unchanged:
+            ops.append(UpdateMany({"_id": {"$in": unchanged}}, {"$set": {"updated_at": now}}))
+
+        gone = [key for key in self.persisted if key not in current]
+        if gone:
+            ops.append(DeleteMany({"_id": {"$in": gone}}))
+        if not ops:
+            return
+
+        try:
+            with MONGO_SECONDS.labels("save_subscriptions").time():
+                self.collection().bulk_write(ops, ordered=False)
+            self.persisted = current
+        except Exception as e:
+            log.error("❌ Saving subscriptions failed: %s", e)
+
+    # -------------------------
+    # STARTUP RESTORE
+    # -------------------------
+    def restore(self):
+        cutoff = time.time() - SUBSCRIPTION_MAX_AGE_DAYS * 86400
+
+        with MONGO_READ_SECONDS.labels("load_subscriptions").time():
+            docs = list(self.collection().find({"updated_at": {"$gte": cutoff}}))
+
+        manager = self.manager
+        by_mode = {}
+        active = None
+
+        self.restoring = True
+        try:
+            for doc in docs:
+                key = doc["_id"]
+                if doc.get("trading_symbol"):
+                    manager.instrument_to_symbol[key] = doc["trading_symbol"]
+                if doc.get("watched"):
+                    by_mode.setdefault(doc.get("mode"), []).append(key)
+
+                # One active instrument at a time: the most recently touched
+                if doc.get("active") and (active is None or doc["updated_at"] > active["updated_at"]):
+                    active = doc
+
+            for mode, keys in by_mode.items():
+                manager.watch(keys, mode, owner="restored")
+            if active:
+                manager.subscribe(active["_id"], active.get("trading_symbol"), active.get("mode"))
+        finally:
+            self.restoring = False
+
+        self.persisted = self.state()
+        self.restored = {key for keys in by_mode.values() for key in keys}
+        log.info("♻️ Restored %d subscriptions (%d watched, active %s)",
+                 len(self.persisted), sum(len(k) for k in by_mode.values()),
+                 active["_id"] if active else "none")
+        return len(self.persisted)
+
+    # -------------------------
+    # RESTORED WATCHES (held until their real owners are back)
+    # -------------------------
+    def release_restored(self):
+        restored, self.restored = list(self.restored), set()
+        if restored:
+            before = len(self.manager.watched)
+            self.manager.unwatch(restored, owner="restored")
+            log.info("🧹 Released %d restored watches, %d nobody took over",
+                     len(restored), before - len(self.manager.watched))
+
+    async def release_restored_after(self, seconds=SUBSCRIPTION_CLAIM_SECONDS):
+        await asyncio.sleep(seconds)
+        self.release_restored()
+
+
+# Singleton
+subscription_store = SubscriptionStore()
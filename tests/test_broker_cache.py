@@ -0,0 +1,48 @@
+import asyncio
+import threading
+
+from broker_cache import SingleFlightCache
+
+
+def test_cancelled_leader_does_not_strand_joiners():
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return {"status": "success", "data": len(calls)}
+
+    async def run():
+        cache = SingleFlightCache("test", ttl=0)
+        leader = asyncio.create_task(cache.get("k", fetch))
+        await asyncio.sleep(0.01)
+        joiner = asyncio.create_task(cache.get("k", fetch))
+        await asyncio.sleep(0.01)
+
+        # Client of the leader goes away mid-request
+        leader.cancel()
+        await asyncio.sleep(0.01)
+        release.set()
+
+        result = await asyncio.wait_for(joiner, 2)
+        assert leader.cancelled()
+        return result
+
+    assert asyncio.run(run())["status"] == "success"
+
+
+def test_joiners_share_one_call():
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        threading.Event().wait(0.05)
+        return {"status": "success"}
+
+    async def run():
+        cache = SingleFlightCache("test", ttl=0)
+        return await asyncio.gather(*(cache.get("k", fetch) for _ in range(5)))
+
+    assert len(asyncio.run(run())) == 5
+    assert len(calls) == 1
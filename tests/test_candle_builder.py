@@ -0,0 +1,35 @@
+from candle_builder import CandleBuilder
+
+
+def test_ticks_only_schedule_broadcasts_for_watched_instruments(monkeypatch):
+    scheduled = []
+
+    def run_coroutine_threadsafe(coro, loop):
+        scheduled.append(coro.cr_frame.f_locals["instrument"])
+        coro.close()
+
+    monkeypatch.setattr("candle_builder.asyncio.run_coroutine_threadsafe", run_coroutine_threadsafe)
+
+    builder = CandleBuilder()
+    builder.set_loop(object())
+    builder.add_client("ws1")
+    builder.add_client("ws2")
+    builder.watch("ws1", "NIFTY")
+    builder.watch("ws2", "NIFTY")
+    builder.watch("ws2", "NIFTY")
+
+    builder.on_tick("BANKNIFTY", 100.0, ts=0)
+    builder.on_tick("NIFTY", 200.0, ts=0)
+    assert scheduled == ["NIFTY"]
+
+    builder.remove_client("ws1")
+    builder.on_tick("NIFTY", 201.0, ts=1)
+    assert scheduled == ["NIFTY", "NIFTY"]
+
+    builder.remove_client("ws2")
+    builder.on_tick("NIFTY", 202.0, ts=2)
+    assert scheduled == ["NIFTY", "NIFTY"]
+    assert builder.watched == {}
+
+    # Bars still build for unwatched instruments
+    assert builder.get_candles("BANKNIFTY")[0]["close"] == 100.0
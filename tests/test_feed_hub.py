@@ -0,0 +1,55 @@
+import asyncio
+import os
+import tempfile
+
+from feed_decode import FeedRecord
+from feed_hub import FeedHub, FeedHubClient
+from live_ltp_manager import LiveLTPManager
+
+
+class NullStreamer:
+    def subscribe(self, keys, mode):
+        pass
+
+    def unsubscribe(self, keys):
+        pass
+
+    def change_mode(self, keys, mode):
+        pass
+
+
+def test_rich_mode_records_reach_the_worker():
+    async def scenario():
+        path = os.path.join(tempfile.mkdtemp(), "hub.sock")
+        hub_manager = LiveLTPManager()
+        hub_manager.set_streamer(NullStreamer())
+        hub = FeedHub(path=path, manager=hub_manager)
+        server = asyncio.create_task(hub.serve())
+        await asyncio.sleep(0.05)
+
+        client = FeedHubClient(path=path, manager=LiveLTPManager())
+        records = []
+        client.add_record_listener(records.append)
+        worker = asyncio.create_task(client.run())
+        while not hub.connections:
+            await asyncio.sleep(0.01)
+
+        client.subscribe(["OPT"], "option_greeks")
+        client.subscribe(["FUT"], "ltpc")
+        while len(hub.refs) < 2:
+            await asyncio.sleep(0.01)
+
+        hub._fan_out_record(FeedRecord("OPT", 10.0, 9.5, oi=500.0, greeks=(0.5, 0.01, -2.0, 4.0), bid=(9.9, 75)))
+        hub._fan_out_record(FeedRecord("FUT", 20.0, 19.5, oi=900.0))
+        await asyncio.sleep(0.05)
+
+        worker.cancel()
+        server.cancel()
+        return records
+
+    records = asyncio.run(scenario())
+
+    assert [r.instrument for r in records] == ["OPT"]
+    assert records[0].oi == 500.0
+    assert records[0].greeks == (0.5, 0.01, -2.0, 4.0)
+    assert records[0].bid == (9.9, 75)
@@ -0,0 +1,46 @@
+from live_ltp_manager import LiveLTPManager
+
+
+class RecordingStreamer:
+    def __init__(self):
+        self.calls = []
+
+    def subscribe(self, keys, mode):
+        self.calls.append(("subscribe", sorted(keys), mode))
+
+    def unsubscribe(self, keys):
+        self.calls.append(("unsubscribe", sorted(keys)))
+
+    def change_mode(self, keys, mode):
+        self.calls.append(("change_mode", sorted(keys), mode))
+
+
+def test_unwatch_keeps_instruments_another_owner_watches():
+    manager = LiveLTPManager()
+    streamer = RecordingStreamer()
+    manager.set_streamer(streamer)
+
+    manager.watch(["OPT1", "OPT2"], mode="option_greeks", owner="chains")
+    manager.watch(["OPT1"], owner="positions")
+    manager.unwatch(["OPT1", "OPT2"], owner="chains")
+
+    assert manager.watched == {"OPT1"}
+    assert manager.mode_of("OPT1") == "ltpc"
+    assert ("unsubscribe", ["OPT2"]) in streamer.calls
+    assert not any(call[0] == "unsubscribe" and "OPT1" in call[1] for call in streamer.calls)
+
+    manager.unwatch(["OPT1"], owner="positions")
+    assert manager.watched == set()
+    assert streamer.calls[-1] == ("unsubscribe", ["OPT1"])
+
+
+def test_owner_mode_change_releases_previous_mode():
+    manager = LiveLTPManager()
+    manager.watch(["K"], mode="full", owner="a")
+    manager.watch(["K"], mode="option_greeks", owner="a")
+    manager.watch(["K"], mode="full", owner="b")
+
+    assert manager.mode_requests["K"] == {"option_greeks": 1, "full": 1}
+    manager.unwatch(["K"], owner="b")
+    assert manager.mode_of("K") == "option_greeks"
+    assert manager.watch_mode("K") == "option_greeks"
@@ -0,0 +1,51 @@
+from datetime import datetime
+
+from market_session import IST, MarketSession, PHASE_CLOSED, PHASE_OPEN, PHASE_PREWARM
+
+# A Monday
+DAY = (2026, 10, 19)
+
+
+def at(hour, minute, second=0):
+    return datetime(*DAY, hour, minute, second, tzinfo=IST)
+
+
+def test_prewarm_status_does_not_keep_session_closed_past_open():
+    session = MarketSession(enabled=True, holidays=(), prewarm_minutes=10)
+    assert session.current_phase(at(9, 5)) == PHASE_PREWARM
+
+    # The prewarm connect sees the feed's pre-open status
+    session.update_from_feed({"NSE_FO": "NORMAL_CLOSE", "BSE_FO": "PRE_OPEN_START"}, now=at(9, 6))
+    assert session.current_phase(at(9, 10)) == PHASE_PREWARM
+
+    for now in (at(9, 15), at(9, 15, 5), at(10, 0)):
+        assert session.current_phase(now) == PHASE_OPEN
+
+    session.update_from_feed({"NSE_FO": "NORMAL_OPEN", "BSE_FO": "NORMAL_OPEN"}, now=at(9, 15, 2))
+    assert session.current_phase(at(10, 0)) == PHASE_OPEN
+
+
+def test_close_received_after_open_closes_session():
+    session = MarketSession(enabled=True, holidays=(), prewarm_minutes=10)
+
+    # Unlisted holiday: the feed says closed after the calendar open
+    session.update_from_feed({"NSE_FO": "NORMAL_CLOSE", "BSE_FO": "NORMAL_CLOSE"}, now=at(9, 16))
+    assert session.current_phase(at(9, 17)) == PHASE_CLOSED
+    assert session.current_phase(at(11, 0)) == PHASE_CLOSED
+
+
+def test_status_from_yesterday_is_ignored():
+    session = MarketSession(enabled=True, holidays=(), prewarm_minutes=10)
+    session.update_from_feed({"NSE_FO": "NORMAL_CLOSE", "BSE_FO": "NORMAL_CLOSE"},
+                             now=datetime(2026, 10, 16, 15, 40, tzinfo=IST))
+    assert session.current_phase(at(9, 30)) == PHASE_OPEN
+
+
+def test_open_status_does_not_outlive_calendar_close():
+    session = MarketSession(enabled=True, holidays=(), prewarm_minutes=10)
+
+    # Feed dropped before 15:30, so no close status ever arrived
+    session.update_from_feed({"NSE_FO": "NORMAL_OPEN", "BSE_FO": "NORMAL_OPEN"}, now=at(9, 15, 2))
+    assert session.current_phase(at(15, 29)) == PHASE_OPEN
+    for now in (at(15, 45), at(18, 45), at(23, 45)):
+        assert session.current_phase(now) == PHASE_CLOSED
@@ -1,5 +1,7 @@
+import time
 import requests
-from config import UPSTOX_ACCESS_TOKEN,SERIAL_NUM,MSG_API_URL
+from metrics import TOKEN_CHECKS, TOKEN_CHECK_SECONDS
+from config import get_access_token,SERIAL_NUM,MSG_API_URL
 
 
 def update_access_token(access_token: str):
@@ -66,9 +68,17 @@ def update_access_token(access_token: str):
 
 
 def is_token_valid():
+    start = time.perf_counter()
+    valid, error = _check_token()
+    TOKEN_CHECK_SECONDS.observe(time.perf_counter() - start)
+    TOKEN_CHECKS.labels("valid" if valid else "invalid").inc()
+    return valid, error
+
+
+def _check_token():
     url = "https://api.upstox.com/v2/user/get-funds-and-margin"
     headers = {
-        "Authorization": f"Bearer {UPSTOX_ACCESS_TOKEN}",
+        "Authorization": f"Bearer {get_access_token()}",
         "Accept": "application/json"
     }
 
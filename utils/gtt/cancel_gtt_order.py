@@ -1,5 +1,3 @@
-import upstox_client
-from upstox_client.rest import ApiException
 import sys
 import os
 
@@ -7,7 +5,8 @@ ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
 if ROOT_DIR not in sys.path:
     sys.path.append(ROOT_DIR)
 
-from config import UPSTOX_ACCESS_TOKEN
+from config import get_api_client
+from metrics import BROKER_SECONDS, BROKER_ERRORS
 
 
 def cancel_gtt_order(gtt_order_id: str):
@@ -17,25 +16,26 @@ def cancel_gtt_order(gtt_order_id: str):
     :param gtt_order_id: e.g. "GTT-C250303008840"
     """
 
-    configuration = upstox_client.Configuration()
-    configuration.access_token = str(UPSTOX_ACCESS_TOKEN)
+    import upstox_client
+    from upstox_client.rest import ApiException
 
-    api_instance = upstox_client.OrderApiV3(
-        upstox_client.ApiClient(configuration)
-    )
+    # Shared client: always carries the current token
+    api_instance = upstox_client.OrderApiV3(get_api_client())
 
     body = upstox_client.GttCancelOrderRequest(
         gtt_order_id=gtt_order_id
     )
 
     try:
-        response = api_instance.cancel_gtt_order(body=body)
+        with BROKER_SECONDS.labels("cancel_gtt").time():
+            response = api_instance.cancel_gtt_order(body=body)
         return {
             "status": "success",
             "data": response
         }
 
     except ApiException as e:
+        BROKER_ERRORS.labels("cancel_gtt").inc()
         return {
             "status": "error",
             "message": str(e)
@@ -0,0 +1,45 @@
+import sys
+import os
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from config import get_api_client
+from metrics import BROKER_SECONDS, BROKER_ERRORS
+
+
+def get_order_status(order_id: str):
+    """
+    Fetch the latest state of an order, e.g. one placed by a triggered GTT rule.
+
+    :param order_id: e.g. "250303000123456"
+    """
+
+    import upstox_client
+    from upstox_client.rest import ApiException
+
+    # Shared client: always carries the current token
+    api_instance = upstox_client.OrderApi(get_api_client())
+
+    try:
+        with BROKER_SECONDS.labels("get_order_status").time():
+            response = api_instance.get_order_status(order_id=order_id)
+
+        return {
+            "status": "success",
+            "data": response.data.to_dict() if response.data else {}
+        }
+
+    except ApiException as e:
+        BROKER_ERRORS.labels("get_order_status").inc()
+        return {
+            "status": "error",
+            "message": str(e)
+        }
+
+
+# # from utils.gtt.get_order_status import get_order_status
+
+# result = get_order_status("250303000123456")
+# print(result)
@@ -1,5 +1,3 @@
-import upstox_client
-from upstox_client.rest import ApiException
 import sys
 import os
 from typing import Optional
@@ -8,7 +6,8 @@ ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
 if ROOT_DIR not in sys.path:
     sys.path.append(ROOT_DIR)
 
-from config import UPSTOX_ACCESS_TOKEN
+from config import get_api_client
+from metrics import BROKER_SECONDS, BROKER_ERRORS
 
 
 def modify_gtt_order(
@@ -31,12 +30,11 @@ def modify_gtt_order(
             "message": "No modify flag enabled. Set at least one flag."
         }
 
-    configuration = upstox_client.Configuration()
-    configuration.access_token = str(UPSTOX_ACCESS_TOKEN)
+    import upstox_client
+    from upstox_client.rest import ApiException
 
-    api_instance = upstox_client.OrderApiV3(
-        upstox_client.ApiClient(configuration)
-    )
+    # Shared client: always carries the current token
+    api_instance = upstox_client.OrderApiV3(get_api_client())
 
     rules = []
 
@@ -83,7 +81,8 @@ def modify_gtt_order(
     )
 
     try:
-        response = api_instance.modify_gtt_order(body=body)
+        with BROKER_SECONDS.labels("modify_gtt").time():
+            response = api_instance.modify_gtt_order(body=body)
         return {
             "status": "success",
             "modified": {
@@ -95,6 +94,7 @@ def modify_gtt_order(
         }
 
     except ApiException as e:
+        BROKER_ERRORS.labels("modify_gtt").inc()
         return {
             "status": "error",
             "message": str(e)
@@ -1,19 +1,20 @@
-import upstox_client
-from upstox_client.rest import ApiException
 import sys
 import os
+import logging
 
 ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
 if ROOT_DIR not in sys.path:
     sys.path.append(ROOT_DIR)
 
-from config import UPSTOX_ACCESS_TOKEN
+from config import get_api_client
+from metrics import BROKER_SECONDS, BROKER_ERRORS
+
+log = logging.getLogger("gtt")
+
 
 def print_layout_msg(content,flag=False):
-    if flag:            
-        print(30*"--")
-        print(content)
-        print(30*"--")
+    # Order payloads at DEBUG (LOG_LEVELS=gtt=DEBUG); flag forces INFO
+    log.log(logging.INFO if flag else logging.DEBUG, "%s", content)
 
 def place_gtt_order(
     instrument_token: str,
@@ -37,9 +38,11 @@ def place_gtt_order(
     :param product: D / I / etc
     """
 
-    configuration = upstox_client.Configuration()
-    configuration.access_token = str(UPSTOX_ACCESS_TOKEN)
-    api_instance = upstox_client.OrderApiV3(upstox_client.ApiClient(configuration))
+    import upstox_client
+    from upstox_client.rest import ApiException
+
+    # Shared client: always carries the current token
+    api_instance = upstox_client.OrderApiV3(get_api_client())
 
     # Build rules dynamically
     entry_rule = upstox_client.GttRule(
@@ -72,7 +75,8 @@ def place_gtt_order(
     )
     print_layout_msg(body)
     try:
-        response = api_instance.place_gtt_order(body=body).to_dict()
+        with BROKER_SECONDS.labels("place_gtt").time():
+            response = api_instance.place_gtt_order(body=body).to_dict()
         # s = f"{response}\n{type(response)}\n{dir(response)}"
         # print_layout_msg(s)
         return {
@@ -81,6 +85,7 @@ def place_gtt_order(
         }
 
     except ApiException as e:
+        BROKER_ERRORS.labels("place_gtt").inc()
         return {
             "status": "error",
             "message": str(e)
@@ -1,4 +1,3 @@
-import aiohttp
 import asyncio
 
 
@@ -7,6 +6,8 @@ async def _get_latest_option_candle_async(option_symbol):
     Async internal candle fetcher
     """
 
+    import aiohttp
+
     option_symbol = option_symbol.upper()
 
     # Detect exchange
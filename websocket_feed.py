@@ -1,123 +1,317 @@
-import upstox_client
+import logging
+import os
+import random
 import threading
-from config import api_client
+import time
+from config import get_api_client, token_holder
 from live_ltp_manager import ltp_manager
 from groww_feed import start_alternative_feed
+from metrics import FEED_MESSAGES, FEED_TICKS, FEED_MESSAGE_SECONDS, FALLBACKS, FEED_CONNECTS, FEED_RECOVERY_SECONDS
+from profiling import tracer
+from feed_decode import decode_feed
+from market_session import market_session
+
+log = logging.getLogger("websocket_feed")
+
+# Reconnect backoff: attempt n waits between half and all of min(MAX, BASE * 2**n) seconds
+FEED_BACKOFF_BASE = float(os.getenv("FEED_BACKOFF_BASE", "1"))
+FEED_BACKOFF_MAX = float(os.getenv("FEED_BACKOFF_MAX", "60"))
+
+# A connect that neither opens nor closes within this long counts as failed
+FEED_CONNECT_TIMEOUT = float(os.getenv("FEED_CONNECT_TIMEOUT", "15"))
+
+# A connection that stayed up this long resets the backoff
+FEED_STABLE_SECONDS = float(os.getenv("FEED_STABLE_SECONDS", "30"))
+
+
+def backoff_delay(attempt, base=FEED_BACKOFF_BASE, cap=FEED_BACKOFF_MAX):
+    # Jitter keeps workers / restarts from reconnecting in lockstep
+    delay = min(cap, base * 2 ** (attempt - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
 
 
 class MarketFeed:
-    def __init__(self):
-        self.api_client = api_client
-        
-        # Initialize V3 Streamer
-        self.streamer = upstox_client.MarketDataStreamerV3(self.api_client)
+    def __init__(self, streamer_factory=None):
+        # Streamer (and the token fetch behind it) is created on first connect
+        self.streamer = None
+        self.streamer_factory = streamer_factory
         self.connected = False
+
+        # Disconnected on purpose outside market hours (see market_session)
+        self.paused = False
         
         self.market_status = {}
 
+        # Called with each FeedRecord carrying more than ltpc (oi, greeks, depth)
+        self.record_listeners = []
+
+        # Supervisor: the one thread that connects and reconnects the streamer
+        self.supervisor = None
+        self.start_lock = threading.Lock()
+        self.wake = threading.Event()
+        self.settled = threading.Event()
+        self.restart = False
+        self.attempts = 0
+        self.opened_at = 0
+        self.dropped_at = 0
+
+    def create_streamer(self):
+        if self.streamer_factory:
+            self.streamer = self.streamer_factory()
+        else:
+            import upstox_client
+
+            # Initialize V3 Streamer
+            self.streamer = upstox_client.MarketDataStreamerV3(get_api_client())
+
+            # The supervisor owns reconnects; the SDK's own retries would race it
+            self.streamer.auto_reconnect(False)
+
         # Link streamer
         ltp_manager.set_streamer(self.streamer)
 
         # Bind events
-        self.streamer.on("open", self.on_open)
-        self.streamer.on("message", self.on_message)
-        self.streamer.on("error", self.on_error)
-        self.streamer.on("close", self.on_close)
+        self.streamer.on("open", self._bind(self.streamer, self.on_open))
+        self.streamer.on("message", self._bind(self.streamer, self.on_message))
+        self.streamer.on("error", self._bind(self.streamer, self.on_error))
+        self.streamer.on("close", self._bind(self.streamer, self.on_close))
+
+    def _bind(self, streamer, handler):
+        # Drop late events from a streamer replaced by reconnect()
+        def listener(*args):
+            if streamer is self.streamer:
+                handler(*args)
+        return listener
 
     def on_open(self):
         self.connected = True
-        print("✅ Upstox Market Feed Connected")
-        if ltp_manager.subscribed:
-            tokens = list(ltp_manager.subscribed)
-            print(f"📡 Resubscribing to existing tokens: {tokens}")
-            self.streamer.subscribe(tokens, "ltpc")
+        self.opened_at = time.monotonic()
+        log.info("✅ Upstox Market Feed Connected")
+
+        if ltp_manager.subscribed or ltp_manager.watched:
+            log.info("📡 Resubscribing to %d existing tokens",
+                     len(ltp_manager.subscribed | ltp_manager.watched))
+            try:
+                ltp_manager.resubscribe_all()
+            except Exception as e:
+                log.error("❌ Resubscribe failed: %s", e)
+
+        if self.dropped_at:
+            FEED_RECOVERY_SECONDS.observe(self.opened_at - self.dropped_at)
+            self.dropped_at = 0
+        self.settled.set()
+
+    def add_record_listener(self, listener):
+        self.record_listeners.append(listener)
 
     def on_message(self, message):
+        FEED_MESSAGES.inc()
+        start = time.perf_counter()
+        received = start if tracer.enabled else 0
 
         if message.get("type") == "market_info":
             self.handle_market_info(message.get("marketInfo", {}))
             return
 
         if "feeds" in message:
-            for instrument, data in message["feeds"].items():
-                try:
-                    if "ltpc" in data:
-                        ltpc_data = data["ltpc"]
+            feeds = message["feeds"]
+            FEED_TICKS.inc(len(feeds))
 
-                        ltp = ltpc_data.get("ltp")
-                        if not ltp or ltp == 0:
-                            ltp = ltpc_data.get("cp")
+            for instrument, data in feeds.items():
+                try:
+                    # ltpc entries (the bulk of the stream) skip building a record
+                    ltpc = data.get("ltpc")
+                    if ltpc is not None:
+                        ltp = ltpc.get("ltp") or ltpc.get("cp")
+                    else:
+                        record = decode_feed(instrument, data)
+                        if record is None:
+                            continue
 
-                        if ltp:
-                            ltp_manager.update_ltp(instrument, float(ltp))
-                            return
+                        if record.oi is not None or record.bid is not None or record.greeks is not None:
+                            for listener in self.record_listeners:
+                                listener(record)
+                        ltp = record.price
 
-                        # 🔁 Fallback using trading_symbol
-                        print(f"⚠️ No LTP from Upstox for {instrument}, switching to Groww...")
-                        symbol = ltp_manager.get_trading_symbol(instrument) or instrument.split("|")[-1]
-                        price = start_alternative_feed(symbol)
+                    if ltp:
+                        ltp_manager.update_ltp(instrument, float(ltp), received=received)
+                        continue
 
-                        if price:
-                            ltp_manager.update_ltp(instrument, float(price))
+                    # 🔁 Fallback using trading_symbol
+                    log.warning("⚠️ No LTP from Upstox for %s, switching to Groww", instrument)
+                    self.fallback(instrument, "no_ltp")
 
                 except Exception as e:
-                    print(f"❌ Feed error for {instrument}: {e}")
-                    print("🔁 Switching to Groww fallback...")
-                    symbol = ltp_manager.get_trading_symbol(instrument) or instrument.split("|")[-1]
-                    start_alternative_feed(symbol)
+                    log.error("❌ Feed error for %s: %s, switching to Groww", instrument, e)
+                    self.fallback(instrument, "error")
 
-    def handle_market_info(self, info):
-        self.market_status = info.get("segmentStatus", {})
-        print("\n" + "="*40)
-        print("📊 MARKET STATUS VALIDATION")
-        print("="*40)
+        FEED_MESSAGE_SECONDS.observe(time.perf_counter() - start)
+        tracer.span("on_message", received)
+
+    def fallback(self, instrument, reason="feed_down"):
+        FALLBACKS.labels(reason).inc()
+        symbol = ltp_manager.get_trading_symbol(instrument) or instrument.split("|")[-1]
+        price = start_alternative_feed(symbol)
 
-        for segment, status in self.market_status.items():
-            indicator = "🔴" if "CLOSE" in status else "🟢"
-            print(f"{indicator} {segment.ljust(10)} : {status}")
+        if price:
+            ltp_manager.update_ltp(instrument, float(price), source="groww")
+        return price
 
-            if "CLOSE" in status:
-                for instrument in ltp_manager.subscribed:
-                    symbol = ltp_manager.get_trading_symbol(instrument) or instrument.split("|")[-1]
-                    print(f"🔁 Market closed for {segment}, using Groww fallback for {symbol}")
-                    start_alternative_feed(symbol)
+    def fallback_all(self):
+        # Off hours the last cached price stands; no point polling Groww
+        if self.paused or not market_session.is_open():
+            return
 
-        print("="*40 + "\n")
+        log.warning("🔁 Switching to Groww fallback feed for all active symbols")
+        for instrument in list(ltp_manager.subscribed):
+            self.fallback(instrument)
 
-    def on_error(self, error):
-        print(f"❌ Market Feed Error: {error}")
-        print("🔁 Switching to Groww fallback feed for all active symbols...")
+    def handle_market_info(self, info):
+        self.market_status = info.get("segmentStatus", {})
+        market_session.update_from_feed(self.market_status)
+        log.info("📊 Market status: %s", ", ".join(
+            f"{'🔴' if 'CLOSE' in status else '🟢'} {segment}={status}"
+            for segment, status in self.market_status.items()
+        ))
 
-        for instrument in ltp_manager.subscribed:
-            symbol = ltp_manager.get_trading_symbol(instrument) or instrument.split("|")[-1]
-            start_alternative_feed(symbol)
+        # Closed segment: one Groww lookup for instruments we have no price for
+        if any("CLOSE" in status for status in self.market_status.values()):
+            for instrument in list(ltp_manager.subscribed):
+                if instrument not in ltp_manager.last_values:
+                    log.info("🔁 Market closed, using Groww fallback for %s", instrument)
+                    self.fallback(instrument, "market_closed")
+
+    def on_error(self, error):
+        log.error("❌ Market Feed Error: %s", error)
+        self.fallback_all()
 
     def on_close(self, close_status_code, close_msg):
+        if self.connected and not self.dropped_at:
+            self.dropped_at = time.monotonic()
         self.connected = False
-        print(f"🔌 Market Feed Closed: {close_status_code} - {close_msg}")
+        log.warning("🔌 Market Feed Closed: %s - %s", close_status_code, close_msg)
+        self.fallback_all()
+
+        self.settled.set()
+        self.wake.set()
 
-        print("🔁 Switching to Groww fallback feed for all active symbols...")
-        for instrument in ltp_manager.subscribed:
-            symbol = ltp_manager.get_trading_symbol(instrument) or instrument.split("|")[-1]
-            start_alternative_feed(symbol)
+    # -------------------------
+    # SUPERVISOR
+    # -------------------------
+    def start(self):
+        """Starts the supervisor thread; calling it again is a no-op."""
+
+        with self.start_lock:
+            if self.supervisor and self.supervisor.is_alive():
+                self.wake.set()
+                return
+
+            self.supervisor = threading.Thread(target=self._supervise, name="market-feed", daemon=True)
+            self.supervisor.start()
+
+    def _supervise(self):
+        while True:
+            if self.paused or (self.connected and not self.restart):
+                self.wake.wait()
+                self.wake.clear()
+                continue
+
+            # A connection that held up earns a fresh backoff
+            if self.opened_at and time.monotonic() - self.opened_at >= FEED_STABLE_SECONDS:
+                self.attempts = 0
+            self.opened_at = 0
+
+            if self.attempts and not self.restart:
+                delay = backoff_delay(self.attempts)
+                log.info("⏳ Reconnecting Upstox Market Feed in %.1fs (attempt %d)", delay, self.attempts + 1)
+
+                # resume() / reconnect() cut the wait short; the close that got us here doesn't
+                self.wake.clear()
+                self.wake.wait(delay)
+                self.wake.clear()
+                if self.paused:
+                    continue
+
+            self.attempts += 1
+            self._connect_once()
+
+            settled = self.settled.wait(FEED_CONNECT_TIMEOUT)
+            if self.connected:
+                FEED_CONNECTS.labels("open").inc()
+                continue
+
+            FEED_CONNECTS.labels("failed").inc()
+            if not settled:
+                log.warning("⚠️ Upstox Market Feed did not open within %.0fs", FEED_CONNECT_TIMEOUT)
+                self.fallback_all()
+
+    def _connect_once(self):
+        old = self.streamer
+        self.restart = False
+
+        # A token reconnect leaves this True from the old streamer, whose close _bind drops;
+        # only the new streamer's open may count the attempt as connected
+        self.connected = False
 
-    def connect(self):
         try:
-            print("🔗 Connecting to Upstox Market Feed...")
+            # Fresh streamer each attempt: late events from the old one are dropped by _bind
+            self.create_streamer()
+            self.settled.clear()
+            if old is not None:
+                try:
+                    old.disconnect()
+                except Exception as e:
+                    log.warning("⚠️ Old streamer disconnect failed: %s", e)
+
+            log.info("🔗 Connecting to Upstox Market Feed")
             self.streamer.connect()
         except Exception as e:
-            print(f"❌ Connection attempt failed: {e}")
-            print("🔁 Switching to Groww fallback feed for all active symbols...")
+            log.error("❌ Connection attempt failed: %s", e)
+            self.settled.set()
+
+    def reconnect(self):
+        """
+        Swap in a fresh streamer (e.g. after token rotation).
+        Subscriptions are replayed from ltp_manager in on_open.
+        """
+
+        # Never started, or paused: the next connect builds a streamer with the new token
+        if self.supervisor is None or self.paused:
+            return
+
+        log.info("🔄 Reconnecting Upstox Market Feed with new token")
+        self.restart = True
+        self.attempts = 0
+        self.wake.set()
+
+    # -------------------------
+    # MARKET SESSION
+    # -------------------------
+    def pause(self):
+        if self.paused:
+            return
+
+        self.paused = True
+        self.connected = False
+        if self.streamer is None:
+            return
+
+        log.info("⏸ Market closed, pausing Upstox Market Feed")
+        try:
+            self.streamer.disconnect()
+        except Exception as e:
+            log.warning("⚠️ Streamer disconnect failed: %s", e)
 
-            for instrument in ltp_manager.subscribed:
-                symbol = ltp_manager.get_trading_symbol(instrument) or instrument.split("|")[-1]
-                start_alternative_feed(symbol)
+    def resume(self):
+        if self.paused:
+            log.info("▶️ Resuming Upstox Market Feed")
+            self.paused = False
+            self.attempts = 0
+        self.start()
 
 
 # Singleton
 market_feed = MarketFeed()
 
-
-def start_market_feed():
-    thread = threading.Thread(target=market_feed.connect, daemon=True)
-    thread.start()
+# Only the market data socket needs a restart on token change
+token_holder.add_listener(lambda token: market_feed.reconnect())